@@ -1,3 +1,34 @@
-from .main_agent import coordinator_agent as agent
+import os
 
-root_agent = agent
+from app.utils.logger import get_service_logger
+
+# LiteLLM downloads its model cost map when imported unless told to use the bundled
+# copy; loading the agents must not depend on the network
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+logger = get_service_logger("agents")
+
+DEFAULT_CONVERSATION_ID = "default"
+
+
+def __getattr__(name):
+    # The agents import ADK and LiteLLM, which takes seconds: build them on first use
+    if name in ("agent", "root_agent"):
+        from .main_agent import coordinator_agent
+
+        return coordinator_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def preload_agents() -> None:
+    """Import the agents, train the relevance classifier and open the session store ahead of the first request."""
+    try:
+        from .agent_runner import get_session_service
+        from .relevance import relevance_classifier
+
+        relevance_classifier.ensure_trained()
+        get_session_service()
+        logger.info("Agents preloaded")
+    except Exception as e:
+        # The first agent request retries and reports the error
+        logger.warning("Agent preload failed: %s", e)
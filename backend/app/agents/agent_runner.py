@@ -1,78 +1,137 @@
+import asyncio
 import os
+import threading
+import uuid
+from typing import Optional
 
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory import InMemoryMemoryService
-from google.adk.plugins.logging_plugin import LoggingPlugin
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService, InMemorySessionService
+from google.adk.sessions import BaseSessionService, DatabaseSessionService, InMemorySessionService
 from google.genai import types
 from app.utils.logger import get_service_logger
+from app.utils.tracing import span
 
+from .batch_fetch import BatchFetchPlugin
+from .event_log import RequestEventLog
+from .guardrail import GuardrailPlugin
 from .main_agent import coordinator_agent
+from .parallel_tools import ParallelToolPlugin
+from .relevance import RelevanceNotePlugin
+from .session_compaction import SessionSummaryPlugin
+from .tracing_plugin import TracingPlugin
+from .sub_agents.query_to_apicall_agent.agent import PARALLEL_SAFE_TOOLS, api_executor_agent
 
 logger = get_service_logger("agent_runner")
 DB_URL = os.getenv("DATABASE_URL", None)
-session_service: DatabaseSessionService | InMemorySessionService
-if DB_URL is None:
-    logger.info("No DATABASE_URL env found, using in-memory session service.")
-    session_service = InMemorySessionService()
-else:
-    logger.info("Using database session service")
-    session_service = DatabaseSessionService(db_url=DB_URL)
+_session_service: Optional[BaseSessionService] = None
+_session_service_lock = threading.Lock()
+
+
+def get_session_service() -> BaseSessionService:
+    """
+    The ADK session service, created on first use: the database service connects and
+    creates its tables when constructed.
+    """
+    global _session_service
+    if _session_service is None:
+        with _session_service_lock:
+            if _session_service is None:
+                if DB_URL is None:
+                    logger.info("No DATABASE_URL env found, using in-memory session service.")
+                    _session_service = InMemorySessionService()
+                else:
+                    logger.info("Using database session service")
+                    _session_service = DatabaseSessionService(db_url=DB_URL)
+    return _session_service
+
 
 memory_service = InMemoryMemoryService()
 artifact_service = InMemoryArtifactService()
+# Runs first: the plugin chain stops at the first callback that returns a value
+tracing_plugin = TracingPlugin()
+guardrail_plugin = GuardrailPlugin()
+parallel_tool_plugin = ParallelToolPlugin(PARALLEL_SAFE_TOOLS)
+session_summary_plugin = SessionSummaryPlugin()
+relevance_note_plugin = RelevanceNotePlugin()
+batch_fetch_plugin = BatchFetchPlugin(planner_name=api_executor_agent.name)
 
 
 async def get_or_create_session(
     app_name: str, user_id: str, session_id: str, initial_state: dict
 ):
-    retrieved_session = await session_service.get_session(
-        app_name=app_name, user_id=user_id, session_id=session_id
-    )
-    if retrieved_session:
-        return retrieved_session
-    return await session_service.create_session(
-        app_name=app_name, user_id=user_id, session_id=session_id, state=initial_state
-    )
+    with span("session.get_or_create", **{"session.id": session_id}) as current:
+        # Off the event loop: the first call may still have to connect
+        session_service = _session_service or await asyncio.to_thread(get_session_service)
+        retrieved_session = await session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        current.set_attribute("session.created", retrieved_session is None)
+        if retrieved_session:
+            current.set_attribute("session.events", len(retrieved_session.events))
+            return retrieved_session
+        return await session_service.create_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, state=initial_state
+        )
 
 
 def get_runner(app_name, agent) -> Runner:
     return Runner(
         agent=agent,
         app_name=app_name,
-        session_service=session_service,
+        session_service=get_session_service(),
         memory_service=memory_service,
         artifact_service=artifact_service,
-        plugins=[LoggingPlugin()],
+        plugins=[
+            tracing_plugin,
+            guardrail_plugin,
+            parallel_tool_plugin,
+            session_summary_plugin,
+            relevance_note_plugin,
+            batch_fetch_plugin,
+        ],
     )
 
 
-async def call_agent_async(query: str, runner: Runner, user_id: str, session_id: str):
-    """Sends a query to the agent and prints the final response."""
-    print(f"\n>>> User Query: {query}")
+async def call_agent_async(
+    query: str,
+    runner: Runner,
+    user_id: str,
+    session_id: str,
+    state_delta: Optional[dict] = None,
+    verbose: bool = False,
+) -> str:
+    """
+    Sends a query to the agent and returns the final response.
+
+    Events are recorded through the sampled agent event log; `verbose` logs every event
+    of this request with larger payload limits.
+    """
+    event_log = RequestEventLog(uuid.uuid4().hex, user_id, session_id, verbose=verbose)
+    event_log.query(query)
 
     content = types.Content(role="user", parts=[types.Part(text=query)])
 
     final_response_text = "Agent did not produce a final response."  # Default
 
-    async for event in runner.run_async(
-        user_id=user_id, session_id=session_id, new_message=content
-    ):
-        print(
-            f"  [Event] Author: {event.author}, Type: {type(event).__name__}, Final: {event.is_final_response()}, Content: {event.content}"
-        )
-
-        if event.is_final_response():
-            if event.content and event.content.parts and event.content.parts[0].text:
-                final_response_text = event.content.parts[0].text
-            elif event.actions and event.actions.escalate:
-                final_response_text = (
-                    f"Agent escalated: {event.error_message or 'No specific message.'}"
-                )
-            break  # Stop processing events once the final response is found
-
-    print(f"<<< Agent Response: {final_response_text}")
+    # Drain the whole run: each sub-agent of the sequential coordinator produces its own
+    # final response, and the answer is the last one. Tool calls started ahead of ADK
+    # are cancelled if the run fails or the request is cancelled.
+    with parallel_tool_plugin.run_scope():
+        async for event in runner.run_async(
+            user_id=user_id, session_id=session_id, new_message=content, state_delta=state_delta
+        ):
+            event_log.event(event)
+
+            if event.is_final_response():
+                if event.content and event.content.parts and event.content.parts[0].text:
+                    final_response_text = event.content.parts[0].text
+                elif event.actions and event.actions.escalate:
+                    final_response_text = (
+                        f"Agent escalated: {event.error_message or 'No specific message.'}"
+                    )
+
+    event_log.finish(final_response_text)
     return final_response_text
 
 
@@ -97,12 +156,11 @@ async def main():
         text = input("Enter your query: ")
         if text.lower() == "exit":
             break
-        await call_agent_async(
-            text, runner=runner, user_id=USER_ID, session_id=SESSION_ID
+        response = await call_agent_async(
+            text, runner=runner, user_id=USER_ID, session_id=SESSION_ID, verbose=True
         )
+        print(f"<<< Agent Response: {response}")
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(main())
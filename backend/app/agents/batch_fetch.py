@@ -0,0 +1,235 @@
+import asyncio
+import contextvars
+import copy
+import json
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("batch_fetch")
+
+# Longest a data request waits for the other questions of its batch to catch up
+BATCH_FETCH_WINDOW_SECONDS = float(os.getenv("BATCH_FETCH_WINDOW_SECONDS", "2"))
+
+Fetch = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+_current_batch: contextvars.ContextVar[Optional["FetchBatch"]] = contextvars.ContextVar(
+    "youtube_fetch_batch", default=None
+)
+_current_participant: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "youtube_fetch_participant", default=None
+)
+
+
+def current_batch() -> Optional["FetchBatch"]:
+    """The fetch batch of the question being answered, if it is part of a batch request."""
+    return _current_batch.get()
+
+
+def split_csv(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def normalize_query(args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill in the defaults `execute_dynamic_youtube_query` applies, so calls that differ
+    only in spelled-out defaults or whitespace compare equal.
+    """
+    args = {k: v for k, v in args.items() if v is not None}
+    args.setdefault("max_results", 100)
+    if args.get("query_type") == "analytics":
+        args.setdefault("start_date", (date.today() - timedelta(days=30)).isoformat())
+        args.setdefault("end_date", date.today().isoformat())
+        args["metrics"] = ",".join(split_csv(args.get("metrics")) or ["views", "likes", "comments"])
+        if args.get("dimensions"):
+            args["dimensions"] = ",".join(split_csv(args["dimensions"]))
+    elif args.get("query_type") == "my_videos":
+        args.setdefault("order", "date")
+    return args
+
+
+def _key(args: Dict[str, Any]) -> str:
+    return json.dumps(args, sort_keys=True, default=str)
+
+
+def _merge_key(args: Dict[str, Any]) -> Optional[str]:
+    """Analytics queries that only differ in their metrics share a merge key."""
+    if args.get("query_type") != "analytics":
+        return None
+    return _key({k: v for k, v in args.items() if k != "metrics"})
+
+
+def project_report(response: Dict[str, Any], metrics: List[str]) -> Dict[str, Any]:
+    """Cut a merged analytics report down to the dimensions plus the requested metrics."""
+    headers = response.get("columnHeaders")
+    if not headers or "error" in response:
+        return copy.deepcopy(response)
+    keep = [
+        i for i, header in enumerate(headers)
+        if header.get("columnType") == "DIMENSION" or header.get("name") in metrics
+    ]
+    # Put metrics back in the order they were asked for
+    position = {name: i for i, name in enumerate(metrics)}
+    keep.sort(key=lambda i: (headers[i].get("columnType") != "DIMENSION", position.get(headers[i].get("name"), -1)))
+    projected = copy.deepcopy({k: v for k, v in response.items() if k not in ("columnHeaders", "rows")})
+    projected["columnHeaders"] = [copy.deepcopy(headers[i]) for i in keep]
+    projected["rows"] = [[row[i] for i in keep] for row in response.get("rows", [])]
+    return projected
+
+
+class FetchBatch:
+    """
+    Collects the YouTube data requests of all questions in a batch and runs each
+    distinct need once.
+
+    Every question registers as a participant while its planner is running. A data
+    request waits until every participant still planning has asked for something (or
+    BATCH_FETCH_WINDOW_SECONDS pass); the pending requests are then deduplicated,
+    analytics reports that differ only in their metrics are merged into one report
+    with the union of the metrics, and each caller gets its own projection back.
+    Results are kept for the rest of the batch, so later rounds reuse them too.
+    """
+
+    def __init__(self, fetch: Fetch, window: float = BATCH_FETCH_WINDOW_SECONDS):
+        self._fetch = fetch
+        self._window = window
+        self._planning: Set[int] = set()
+        self._pending: List[Tuple[int, Dict[str, Any], asyncio.Future]] = []
+        self._results: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._next_participant = 0
+        self.requests = 0
+        self.upstream_calls = 0
+
+    @contextmanager
+    def participant(self) -> Iterator[int]:
+        """Run the enclosed question as a participant of this batch."""
+        participant = self._next_participant
+        self._next_participant += 1
+        self._planning.add(participant)
+        batch_token = _current_batch.set(self)
+        participant_token = _current_participant.set(participant)
+        try:
+            yield participant
+        finally:
+            _current_participant.reset(participant_token)
+            _current_batch.reset(batch_token)
+            self.done_planning(participant)
+
+    def done_planning(self, participant: Optional[int] = None) -> None:
+        """Mark a participant as having issued all of its data requests."""
+        if participant is None:
+            participant = _current_participant.get()
+        if participant in self._planning:
+            self._planning.discard(participant)
+            self._maybe_flush()
+
+    async def fetch(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests += 1
+        args = normalize_query(args)
+        cached = self._results.get(_key(args))
+        if cached is not None:
+            return copy.deepcopy(await asyncio.shield(cached))
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((_current_participant.get(), args, future))
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._window, self._flush)
+        self._maybe_flush()
+        return copy.deepcopy(await future)
+
+    def _maybe_flush(self) -> None:
+        waiting = {participant for participant, _, _ in self._pending}
+        if self._pending and self._planning <= waiting:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        # Exact duplicates share one result; analytics reports are grouped for merging
+        callers: Dict[str, List[asyncio.Future]] = defaultdict(list)
+        distinct: Dict[str, Dict[str, Any]] = {}
+        for _, args, future in pending:
+            key = _key(args)
+            callers[key].append(future)
+            distinct.setdefault(key, args)
+        groups: Dict[str, List[str]] = defaultdict(list)
+        for key, args in distinct.items():
+            groups[_merge_key(args) or key].append(key)
+
+        for keys in groups.values():
+            task = asyncio.ensure_future(self._run_group([distinct[k] for k in keys]))
+            for i, key in enumerate(keys):
+                result = asyncio.get_running_loop().create_future()
+                self._results[key] = result
+                task.add_done_callback(self._resolver(result, callers[key], i))
+
+        logger.info(
+            "Batch flush: %s data requests, %s distinct, %s upstream groups",
+            len(pending),
+            len(distinct),
+            len(groups),
+        )
+
+    @staticmethod
+    def _resolver(result: asyncio.Future, futures: List[asyncio.Future], index: int):
+        def resolve(task: asyncio.Future) -> None:
+            if task.cancelled():
+                outcome: Dict[str, Any] = {"error": "Batched YouTube request was cancelled"}
+            elif task.exception() is not None:
+                outcome = {"error": str(task.exception())}
+            else:
+                outcome = task.result()[index]
+            result.set_result(outcome)
+            for future in futures:
+                if not future.done():
+                    future.set_result(outcome)
+
+        return resolve
+
+    async def _run_group(self, queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if len(queries) == 1:
+            self.upstream_calls += 1
+            return [await self._fetch(queries[0])]
+
+        per_query = [split_csv(q["metrics"]) for q in queries]
+        union = list(dict.fromkeys(m for metrics in per_query for m in metrics))
+        self.upstream_calls += 1
+        merged = await self._fetch({**queries[0], "metrics": ",".join(union)})
+        if "error" not in merged:
+            return [project_report(merged, metrics) for metrics in per_query]
+
+        # Some metrics can't be combined in one report; ask for each set on its own
+        logger.info("Merged analytics query failed, running %s queries separately: %s", len(queries), merged['error'])
+        self.upstream_calls += len(queries)
+        return list(await asyncio.gather(*(self._fetch(q) for q in queries)))
+
+
+class BatchFetchPlugin(BasePlugin):
+    """Tells the fetch batch when a question's planner agent has finished issuing requests."""
+
+    def __init__(self, planner_name: str, name: str = "batch_fetch"):
+        super().__init__(name=name)
+        self.planner_name = planner_name
+
+    async def after_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        batch = current_batch()
+        if batch is not None and agent.name == self.planner_name:
+            batch.done_planning()
+        return None
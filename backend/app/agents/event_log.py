@@ -0,0 +1,131 @@
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Tuple
+
+from google.adk.events import Event
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("agent_events")
+
+# Share of requests whose individual events are logged; 0 logs only per-request summaries
+AGENT_EVENT_LOG_SAMPLE_RATE = float(os.getenv("AGENT_EVENT_LOG_SAMPLE_RATE", "0.05"))
+# Longest text/payload kept per field of an event record
+AGENT_EVENT_LOG_MAX_CHARS = int(os.getenv("AGENT_EVENT_LOG_MAX_CHARS", "300"))
+AGENT_EVENT_LOG_VERBOSE_MAX_CHARS = int(os.getenv("AGENT_EVENT_LOG_VERBOSE_MAX_CHARS", "20000"))
+
+
+def _truncate_sized(value: Any, limit: int) -> Tuple[Any, int]:
+    """The value, cut to `limit` characters of its JSON form, and the full length of that form."""
+    if value is None:
+        return None, 0
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    if len(text) <= limit:
+        return value, len(text)
+    return f"{text[:limit]}... [{len(text)} chars]", len(text)
+
+
+def _truncate(value: Any, limit: int) -> Any:
+    return _truncate_sized(value, limit)[0]
+
+
+def event_record(event: Event, max_chars: int) -> Dict[str, Any]:
+    """Flatten an ADK event into a small, JSON-serializable record."""
+    record: Dict[str, Any] = {
+        "event_id": event.id,
+        "author": event.author,
+        "final": event.is_final_response(),
+    }
+    if event.partial:
+        record["partial"] = True
+    if event.error_code:
+        record["error"] = {"code": event.error_code, "message": _truncate(event.error_message, max_chars)}
+    if event.actions and event.actions.state_delta:
+        record["state_keys"] = sorted(event.actions.state_delta)
+    parts = event.content.parts if event.content and event.content.parts else []
+    for part in parts:
+        if part.text:
+            record.setdefault("text", []).append(_truncate(part.text, max_chars))
+        if part.function_call:
+            record.setdefault("function_calls", []).append(
+                {"name": part.function_call.name, "args": _truncate(part.function_call.args, max_chars)}
+            )
+        if part.function_response:
+            # One serialization gives both the size and the truncated payload
+            response, size = _truncate_sized(part.function_response.response, max_chars)
+            record.setdefault("function_responses", []).append(
+                {"name": part.function_response.name, "size": size, "response": response}
+            )
+    return record
+
+
+class _EventMessage:
+    """
+    A log message that serializes its record when formatted. The app logger queues
+    records for its writer thread, so the JSON is built there, not on the event loop.
+    """
+
+    __slots__ = ("record",)
+
+    def __init__(self, record: Dict[str, Any]):
+        self.record = record
+
+    def __str__(self) -> str:
+        return json.dumps(self.record, default=str, ensure_ascii=False)
+
+
+class RequestEventLog:
+    """
+    Event logging for one agent request.
+
+    The sampling decision is made once per request so that a sampled request is logged
+    completely. Every request emits a single summary record when it finishes.
+    """
+
+    def __init__(self, request_id: str, user_id: str, session_id: str, verbose: bool = False):
+        self.request_id = request_id
+        self.user_id = user_id
+        self.session_id = session_id
+        self.verbose = verbose
+        self.sampled = verbose or random.random() < AGENT_EVENT_LOG_SAMPLE_RATE
+        self.max_chars = AGENT_EVENT_LOG_VERBOSE_MAX_CHARS if verbose else AGENT_EVENT_LOG_MAX_CHARS
+        self.started = time.perf_counter()
+        self.events = 0
+        self.tool_calls = 0
+        self.errors = 0
+
+    def _emit(self, kind: str, **fields: Any) -> None:
+        logger.info(_EventMessage({
+            "kind": kind,
+            "ts": time.time(),
+            "request_id": self.request_id,
+            "user_id": self.user_id,
+            "session_id": self.session_id,
+            **fields,
+        }))
+
+    def query(self, text: str) -> None:
+        if self.sampled:
+            self._emit("query", text=_truncate(text, self.max_chars))
+
+    def event(self, event: Event) -> None:
+        self.events += 1
+        if event.get_function_calls():
+            self.tool_calls += len(event.get_function_calls())
+        if event.error_code:
+            self.errors += 1
+        if self.sampled:
+            self._emit("event", **event_record(event, self.max_chars))
+
+    def finish(self, response: str) -> None:
+        self._emit(
+            "summary",
+            duration_ms=round((time.perf_counter() - self.started) * 1000, 1),
+            events=self.events,
+            tool_calls=self.tool_calls,
+            errors=self.errors,
+            sampled=self.sampled,
+            response=_truncate(response, self.max_chars) if self.sampled else None,
+        )
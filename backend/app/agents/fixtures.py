@@ -0,0 +1,250 @@
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("fixtures")
+
+# Record every agent request (model completions and YouTube tool results) to
+# <dir>/agent_sessions.jsonl, for replay by benchmarks/agent_replay.py
+FIXTURE_RECORD_DIR = os.getenv("AGENT_FIXTURE_RECORD_DIR")
+FIXTURE_FILE_NAME = "agent_sessions.jsonl"
+
+# ADK labels every model request with the agent that sends it
+_AGENT_NAME_LABEL = "adk_agent_name"
+
+_current_case: contextvars.ContextVar[Optional["FixtureCase"]] = contextvars.ContextVar(
+    "agent_fixture_case", default=None
+)
+_write_lock = threading.Lock()
+
+
+class FixtureMissError(Exception):
+    """Raised during replay when a fixture has no recording for a model or tool call."""
+
+
+def _json_safe(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+def _args_key(args: Dict[str, Any]) -> str:
+    return json.dumps({k: v for k, v in args.items() if v is not None}, sort_keys=True, default=str)
+
+
+@dataclass
+class SimulatedLatency:
+    """
+    Latency added to replayed calls. A fixed value (seconds) replaces the recorded
+    duration; None replays the recorded duration multiplied by `scale`.
+    """
+
+    llm: Optional[float] = None
+    youtube: Optional[float] = None
+    scale: float = 1.0
+
+    def delay(self, stage: str, recorded: float) -> float:
+        fixed = self.llm if stage == "llm" else self.youtube
+        return fixed if fixed is not None else recorded * self.scale
+
+
+@dataclass
+class FixtureCase:
+    """The recorded model and tool calls of one agent request."""
+
+    query: str
+    response: Optional[str] = None
+    llm_calls: List[Dict[str, Any]] = field(default_factory=list)
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    recorded_at: Optional[str] = None
+    # Replay state
+    latency: Optional[SimulatedLatency] = None
+    # (stage, started, finished) of every replayed call, perf_counter seconds
+    timings: List[Tuple[str, float, float]] = field(default_factory=list)
+    _llm_cursor: Dict[str, int] = field(default_factory=dict)
+    _used_tools: set = field(default_factory=set)
+
+    @property
+    def replaying(self) -> bool:
+        return self.latency is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "query": self.query,
+            "response": self.response,
+            "recorded_at": self.recorded_at,
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FixtureCase":
+        return cls(
+            query=data["query"],
+            response=data.get("response"),
+            llm_calls=data.get("llm_calls", []),
+            tool_calls=data.get("tool_calls", []),
+            recorded_at=data.get("recorded_at"),
+        )
+
+    def next_llm_call(self, agent: str) -> Dict[str, Any]:
+        """The next recorded completion of an agent; each agent's calls replay in order."""
+        calls = [call for call in self.llm_calls if call["agent"] == agent]
+        index = self._llm_cursor.get(agent, 0)
+        if index >= len(calls):
+            raise FixtureMissError(f"No recorded model call #{index + 1} for agent '{agent}' ({self.query!r})")
+        self._llm_cursor[agent] = index + 1
+        return calls[index]
+
+    def find_tool_call(self, tool: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The recorded result of a tool call: an unused recording with the same arguments,
+        else the next unused one of the same tool and query type (dates defaulted to
+        "today" differ between recording and replay).
+        """
+        key = _args_key(args)
+        kind = args.get("query_type") or args.get("endpoint")
+        candidates = [
+            (i, call) for i, call in enumerate(self.tool_calls)
+            if call["tool"] == tool and i not in self._used_tools
+        ]
+        match = next((c for c in candidates if _args_key(c[1]["args"]) == key), None)
+        if match is None:
+            match = next(
+                (c for c in candidates if (c[1]["args"].get("query_type") or c[1]["args"].get("endpoint")) == kind),
+                None,
+            )
+        if match is None:
+            raise FixtureMissError(f"No recorded {tool} call for {key} ({self.query!r})")
+        self._used_tools.add(match[0])
+        return match[1]
+
+
+def current_case() -> Optional[FixtureCase]:
+    """The fixture case being recorded or replayed for the current agent request, if any."""
+    return _current_case.get()
+
+
+def load_cases(path: str) -> List[Dict[str, Any]]:
+    """Read recorded cases from a fixtures file (one JSON object per line)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@contextmanager
+def record_case(query: str, directory: Optional[str] = FIXTURE_RECORD_DIR) -> Iterator[Optional[FixtureCase]]:
+    """
+    Record the enclosed agent request as a fixture case when recording is enabled.
+
+    The caller sets `case.response` to the final answer; the case is appended to the
+    fixtures file on exit.
+    """
+    if not directory:
+        yield None
+        return
+    case = FixtureCase(query=query, recorded_at=datetime.now(timezone.utc).isoformat())
+    token = _current_case.set(case)
+    try:
+        yield case
+    finally:
+        _current_case.reset(token)
+        os.makedirs(directory, exist_ok=True)
+        line = json.dumps(case.to_dict(), ensure_ascii=False, default=str)
+        with _write_lock, open(os.path.join(directory, FIXTURE_FILE_NAME), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        logger.info("Recorded fixture: %s model calls, %s tool calls", len(case.llm_calls), len(case.tool_calls))
+
+
+@contextmanager
+def replay_case(data: Dict[str, Any], latency: SimulatedLatency) -> Iterator[FixtureCase]:
+    """Serve the model and tool calls of the enclosed agent request from a recorded case."""
+    case = FixtureCase.from_dict(data)
+    case.latency = latency
+    token = _current_case.set(case)
+    try:
+        yield case
+    finally:
+        _current_case.reset(token)
+
+
+async def through_fixtures(tool: str, args: Dict[str, Any], call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Run a YouTube tool call, recording its result or serving it from the replayed case."""
+    case = current_case()
+    if case is None:
+        return await call()
+    if case.replaying:
+        started = time.perf_counter()
+        recorded = case.find_tool_call(tool, args)
+        await asyncio.sleep(case.latency.delay("youtube", recorded.get("seconds", 0.0)))
+        case.timings.append(("youtube", started, time.perf_counter()))
+        return json.loads(json.dumps(recorded["result"]))
+
+    started = time.perf_counter()
+    result = await call()
+    case.tool_calls.append({
+        "tool": tool,
+        "args": _json_safe(args),
+        "result": _json_safe(result),
+        "seconds": round(time.perf_counter() - started, 4),
+    })
+    return result
+
+
+class FixtureLlm(BaseLlm):
+    """
+    Wraps the agents' model to record its completions into the current fixture case, or
+    to replay them from it. Outside a fixture case calls go straight to the wrapped model.
+    """
+
+    inner: Optional[BaseLlm] = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        case = current_case()
+        labels = llm_request.config.labels if llm_request.config and llm_request.config.labels else {}
+        agent = labels.get(_AGENT_NAME_LABEL, "")
+
+        if case is not None and case.replaying:
+            started = time.perf_counter()
+            recorded = case.next_llm_call(agent)
+            await asyncio.sleep(case.latency.delay("llm", recorded.get("seconds", 0.0)))
+            case.timings.append((f"llm.{agent}", started, time.perf_counter()))
+            for response in recorded["responses"]:
+                yield LlmResponse.model_validate_json(json.dumps(response))
+            return
+
+        if self.inner is None:
+            raise FixtureMissError("Fixture model used outside a replayed case")
+        started = time.perf_counter()
+        responses = []
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            responses.append(json.loads(response.model_dump_json(exclude_none=True)))
+            yield response
+        if case is not None:
+            case.llm_calls.append({
+                "agent": agent,
+                "responses": responses,
+                "seconds": round(time.perf_counter() - started, 4),
+            })
+
+
+def use_fixture_models(agent: BaseAgent) -> None:
+    """Wrap the model of every LLM agent in the tree with FixtureLlm."""
+    if isinstance(agent, LlmAgent) and isinstance(agent.model, BaseLlm) and not isinstance(agent.model, FixtureLlm):
+        agent.model = FixtureLlm(model=agent.model.model, inner=agent.model)
+    for sub_agent in agent.sub_agents:
+        use_fixture_models(sub_agent)
@@ -1,58 +1,111 @@
-from typing import Optional
+import os
+import re
+from typing import Iterable, Optional
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models.llm_request import LlmRequest
 from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
 from google.genai import types  # For creating response content
 
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("guardrail")
+
+
+def _keywords_from_env(name: str, default: str = "") -> list[str]:
+    return [k.strip() for k in os.getenv(name, default).split(",") if k.strip()]
+
+
+class GuardrailEngine:
+    """
+    Keyword guardrail compiled into a single case-insensitive regex.
+
+    Block and allow phrases become one alternation, so a message is scanned once
+    regardless of how many keywords are configured. Allow phrases take precedence:
+    a blocked keyword that only occurs inside an allowed phrase (e.g. "block" in an
+    allowed "unblock my video") doesn't trigger the guardrail.
+    """
+
+    def __init__(self, block: Iterable[str], allow: Iterable[str] = (), whole_words: bool = True):
+        self.block = [k for k in block if k]
+        self.allow = [k for k in allow if k]
+        self._pattern = self._compile(whole_words)
+
+    def _compile(self, whole_words: bool) -> Optional[re.Pattern]:
+        if not self.block:
+            return None
+
+        def alternation(keywords: list[str]) -> str:
+            # Longest first so overlapping phrases resolve to the most specific match
+            escaped = (re.escape(k) for k in sorted(set(keywords), key=len, reverse=True))
+            body = "|".join(escaped)
+            return rf"\b(?:{body})\b" if whole_words else f"(?:{body})"
+
+        branches = []
+        if self.allow:
+            branches.append(f"(?P<allow>{alternation(self.allow)})")
+        branches.append(f"(?P<block>{alternation(self.block)})")
+        return re.compile("|".join(branches), re.IGNORECASE)
+
+    def find_blocked(self, text: str) -> Optional[str]:
+        """Return the first blocked keyword found in text, or None."""
+        if self._pattern is None or not text:
+            return None
+        for match in self._pattern.finditer(text):
+            if match.lastgroup == "block":
+                return match.group("block")
+        return None
+
+
+guardrail_engine = GuardrailEngine(
+    block=_keywords_from_env("GUARDRAIL_BLOCK_KEYWORDS", "BLOCK"),
+    allow=_keywords_from_env("GUARDRAIL_ALLOW_KEYWORDS"),
+    whole_words=os.getenv("GUARDRAIL_WHOLE_WORDS", "true").lower() in ("1", "true", "yes"),
+)
+
+
+def _user_message_text(user_content: Optional[types.Content]) -> str:
+    # Only the user turn that started the invocation: the request contents also carry other
+    # agents' output (tool results included) as role 'user' "For context:" messages
+    if user_content is None or not user_content.parts:
+        return ""
+    return "".join(part.text for part in user_content.parts if part.text)
+
 
 def block_keyword_guardrail(
     callback_context: CallbackContext, llm_request: LlmRequest
 ) -> Optional[LlmResponse]:
     """
-    Inspects the latest user message for blocked keywords. If found, blocks the LLM call
+    Inspects the user's message for blocked keywords. If found, blocks the LLM call
     and returns a predefined LlmResponse. Otherwise, returns None to proceed.
     """
-    agent_name = (
-        callback_context.agent_name
-    )  # Get the name of the agent whose model call is being intercepted
-    print(f"--- Callback: block_keyword_guardrail running for agent: {agent_name} ---")
-
-    # Extract the text from the latest user message in the request history
-    last_user_message_text = ""
-    if llm_request.contents:
-        # Find the most recent message with role 'user'
-        for content in reversed(llm_request.contents):
-            if content.role == "user" and content.parts:
-                # Assuming text is in the first part for simplicity
-                if content.parts[0].text:
-                    last_user_message_text = content.parts[0].text
-                    break  # Found the last user message text
-
-    print(
-        f"--- Callback: Inspecting last user message: '{last_user_message_text[:100]}...' ---"
-    )  # Log first 100 chars
-
-    # --- Guardrail Logic ---
-    keywords_to_block = ["BLOCK"]
-    for keyword in keywords_to_block:
-        if keyword in last_user_message_text.upper():  # Case-insensitive check
-            print(f"--- Callback: Found '{keyword}'. Blocking LLM call! ---")
-            # Optionally, set a flag in state to record the block event
-            callback_context.state["guardrail_block_keyword_triggered"] = True
-            print(
-                "--- Callback: Set state 'guardrail_block_keyword_triggered': True ---"
-            )
-            return LlmResponse(
-                content=types.Content(
-                    role="model",
-                    parts=[
-                        types.Part(
-                            text=f"I'm sorry, I cannot process this request because it contains the blocked keyword '{keyword}'."
-                        )
-                    ],
+    keyword = guardrail_engine.find_blocked(_user_message_text(callback_context.user_content))
+    if keyword is None:
+        return None
+
+    logger.debug("Guardrail blocked LLM call for agent %s on keyword '%s'", callback_context.agent_name, keyword)
+    # Record the block event in state
+    callback_context.state["guardrail_block_keyword_triggered"] = True
+    return LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[
+                types.Part(
+                    text=f"I'm sorry, I cannot process this request because it contains the blocked keyword '{keyword}'."
                 )
-            )
+            ],
+        )
+    )
+
+
+class GuardrailPlugin(BasePlugin):
+    """Applies the keyword guardrail before every model call of every agent in the runner."""
+
+    def __init__(self, name: str = "keyword_guardrail"):
+        super().__init__(name=name)
 
-    # If no blocked keywords found, return None to proceed
-    return None
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        return block_keyword_guardrail(callback_context, llm_request)
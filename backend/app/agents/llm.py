@@ -0,0 +1,63 @@
+import os
+from typing import Any, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.lite_llm import LiteLlm, LiteLLMClient
+
+from .fixtures import FIXTURE_RECORD_DIR, FixtureLlm
+
+# Opt-in provider-side prompt caching. Instructions start with a static core followed by
+# the sections picked for the request, the fetched data and plugin notes; the core is
+# sent as its own leading system message marked with cache_control (Gemini context
+# caching, Anthropic prompt caching), so the cached prefix is the same on every request.
+# Keep it off for models or prompt sizes the provider won't cache.
+PROMPT_CACHING = os.getenv("LLM_PROMPT_CACHING", "false").lower() in ("1", "true", "yes")
+
+# ADK sends the instruction as a "developer" message
+_INSTRUCTION_ROLES = ("system", "developer")
+
+
+def split_cacheable_prefix(messages: List[Dict[str, Any]], prefix: str) -> List[Dict[str, Any]]:
+    """
+    Send the instruction's static prefix as a separate, cache-marked message ahead of
+    the rest of the instruction. Other messages are left alone.
+    """
+    for i, message in enumerate(messages):
+        if message.get("role") not in _INSTRUCTION_ROLES:
+            continue
+        content = message.get("content")
+        if not isinstance(content, str) or not content.startswith(prefix):
+            return messages
+        static = {
+            **message,
+            "content": [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}],
+        }
+        rest = content[len(prefix):].strip()
+        dynamic = [{**message, "content": rest}] if rest else []
+        return messages[:i] + [static] + dynamic + messages[i + 1:]
+    return messages
+
+
+class _PrefixCachingClient(LiteLLMClient):
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    async def acompletion(self, model, messages, tools, **kwargs):
+        return await super().acompletion(model, split_cacheable_prefix(messages, self.prefix), tools, **kwargs)
+
+    def completion(self, model, messages, tools, stream=False, **kwargs):
+        return super().completion(model, split_cacheable_prefix(messages, self.prefix), tools, stream, **kwargs)
+
+
+def get_model(model_name: str, cacheable_prefix: Optional[str] = None) -> BaseLlm:
+    """
+    Create the LiteLlm model wrapper used by the agents, recording it when fixture
+    recording is on. `cacheable_prefix` is the static start of the agent's instruction.
+    """
+    kwargs = {}
+    if PROMPT_CACHING and cacheable_prefix:
+        kwargs["llm_client"] = _PrefixCachingClient(cacheable_prefix)
+    model = LiteLlm(model_name, **kwargs)
+    if FIXTURE_RECORD_DIR:
+        return FixtureLlm(model=model.model, inner=model)
+    return model
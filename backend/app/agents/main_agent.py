@@ -1,6 +1,5 @@
 from google.adk.agents import SequentialAgent
 
-from .guardrail import block_keyword_guardrail
 from .sub_agents import (
     api_executor_agent,
     response_generator_agent,
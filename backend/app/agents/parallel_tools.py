@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import copy
+import functools
+import inspect
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("parallel_tools")
+
+MAX_TOOL_WORKERS = int(os.getenv("AGENT_TOOL_MAX_WORKERS", "8"))
+
+# Shared, bounded pool for blocking tool functions (Google API clients are synchronous)
+_executor = ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS, thread_name_prefix="agent-tool")
+
+
+def run_in_tool_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> asyncio.Future:
+    """Run a blocking function on the shared tool pool, preserving the caller's contextvars."""
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(_executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+# Invocations that started calls within the current run_scope()
+_scope_invocations: contextvars.ContextVar[Optional[Set[str]]] = contextvars.ContextVar(
+    "parallel_tool_invocations", default=None
+)
+
+
+def _call_key(name: str, args: Optional[Dict[str, Any]]) -> str:
+    return f"{name}:{json.dumps(args or {}, sort_keys=True, default=str)}"
+
+
+class ParallelToolPlugin(BasePlugin):
+    """
+    Runs independent tool calls issued in the same model turn concurrently.
+
+    ADK executes the function calls of one LlmResponse one after another. As soon as
+    the model response arrives, this plugin starts every call to a registered
+    tool on the shared bounded executor (or as a task, for async tools). ADK then
+    walks the calls in their original order and `before_tool_callback` hands back
+    the already running result, so the tool phase of a turn takes as long as its
+    slowest call instead of the sum of all calls.
+
+    Only tools that are free of side effects and don't take a `tool_context`
+    should be registered. Runs go inside `run_scope()`, which drops the calls of a run
+    that fails or is cancelled; ADK only calls `after_run_callback` when a run completes.
+    """
+
+    def __init__(self, tools: Iterable[Callable[..., Any]], name: str = "parallel_tools"):
+        super().__init__(name=name)
+        self.tools: Dict[str, Callable[..., Any]] = {}
+        for func in tools:
+            if "tool_context" in inspect.signature(func).parameters:
+                raise ValueError(f"{func.__name__} uses tool_context and cannot run ahead of ADK")
+            self.tools[func.__name__] = func
+        # invocation_id -> call key -> running future
+        self._pending: Dict[str, Dict[str, asyncio.Future]] = {}
+
+    def _start(self, func: Callable[..., Any], args: Dict[str, Any]) -> asyncio.Future:
+        # Mirror FunctionTool, which drops arguments that aren't named parameters
+        params = inspect.signature(func).parameters
+        args = {k: v for k, v in args.items() if k in params}
+        if inspect.iscoroutinefunction(func):
+            return asyncio.ensure_future(func(**args))
+        return run_in_tool_executor(func, **args)
+
+    def _discard(self, invocation_id: str) -> None:
+        for future in self._pending.pop(invocation_id, {}).values():
+            future.cancel()
+
+    @contextmanager
+    def run_scope(self) -> Iterator[None]:
+        """Cancel and forget the calls started by the enclosed runs, however they end."""
+        invocations: Set[str] = set()
+        token = _scope_invocations.set(invocations)
+        try:
+            yield
+        finally:
+            _scope_invocations.reset(token)
+            for invocation_id in invocations:
+                self._discard(invocation_id)
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        # A new model response means the previous turn's calls have all been consumed
+        self._discard(callback_context.invocation_id)
+
+        if not llm_response.content or not llm_response.content.parts:
+            return None
+        calls = [
+            part.function_call for part in llm_response.content.parts
+            if part.function_call and part.function_call.name in self.tools
+        ]
+        if len(calls) < 2:
+            return None
+
+        pending: Dict[str, asyncio.Future] = {}
+        for call in calls:
+            key = _call_key(call.name, call.args)
+            if key not in pending:
+                pending[key] = self._start(self.tools[call.name], copy.deepcopy(call.args or {}))
+        self._pending[callback_context.invocation_id] = pending
+        invocations = _scope_invocations.get()
+        if invocations is not None:
+            invocations.add(callback_context.invocation_id)
+        logger.info("Started %s tool calls concurrently (%s requested)", len(pending), len(calls))
+        return None
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext
+    ) -> Optional[dict]:
+        pending = self._pending.get(tool_context.invocation_id)
+        if not pending:
+            return None
+        future = pending.get(_call_key(tool.name, tool_args))
+        if future is None:
+            return None
+        try:
+            result = await asyncio.shield(future)
+        except Exception as e:
+            # Fall back to the regular in-line call so ADK's error handling applies
+            logger.warning("Concurrent call to %s failed, retrying in-line: %s", tool.name, e)
+            return None
+        # The same result may be handed to duplicate calls; keep them independent
+        return copy.deepcopy(result)
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        self._discard(invocation_context.invocation_id)
@@ -0,0 +1,150 @@
+import asyncio
+import contextvars
+import copy
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app.utils.logger import get_service_logger
+
+from .batch_fetch import Fetch, normalize_query, project_report, split_csv
+from .sub_agents.query_to_apicall_agent.prompt import detect_categories
+
+logger = get_service_logger("prefetch")
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+# Which speculative fetches may run: channel, uploads, overview
+PREFETCH_KINDS = set(split_csv(os.getenv("PREFETCH_KINDS", "channel,uploads,overview")))
+
+# The recent-uploads prefetch asks for the most a single playlist page returns and
+# serves any smaller request for the same order from it
+UPLOADS_PREFETCH_SIZE = 50
+# Wide enough to answer most "how is my channel doing" questions for the default 30 days
+OVERVIEW_METRICS = [
+    "views",
+    "estimatedMinutesWatched",
+    "averageViewDuration",
+    "likes",
+    "comments",
+    "shares",
+    "subscribersGained",
+    "subscribersLost",
+]
+
+# Query categories (from the planner prompt) that make each prefetch likely to be used
+_TRIGGERS = {
+    "channel": {"channel"},
+    "uploads": {"videos"},
+    "overview": {"channel", "time", "engagement", "subscribers"},
+}
+
+_PREFETCH_QUERIES: Dict[str, Dict[str, Any]] = {
+    "channel": {"query_type": "channel_details"},
+    "uploads": {"query_type": "my_videos", "max_results": UPLOADS_PREFETCH_SIZE, "order": "date"},
+    "overview": {"query_type": "analytics", "metrics": ",".join(OVERVIEW_METRICS)},
+}
+
+# Process-wide counters for tuning the policy
+prefetch_stats: Counter = Counter()
+
+_current_cache: contextvars.ContextVar[Optional["RequestDataCache"]] = contextvars.ContextVar(
+    "youtube_request_data_cache", default=None
+)
+
+
+def current_request_cache() -> Optional["RequestDataCache"]:
+    """The data cache of the agent request being handled, if any."""
+    return _current_cache.get()
+
+
+def choose_prefetches(query: str) -> List[str]:
+    """
+    Pick the speculative fetches worth starting for a user query. A query that matches
+    none of the categories gives no hint of what it needs, so nothing is prefetched.
+    """
+    categories = detect_categories(query)
+    return [kind for kind, triggers in _TRIGGERS.items() if kind in PREFETCH_KINDS and categories & triggers]
+
+
+def _matches(kind: str, args: Dict[str, Any]) -> bool:
+    """Whether a normalized tool call can be answered from the prefetch of the given kind."""
+    if kind == "uploads":
+        wanted = {k: v for k, v in args.items() if k != "max_results"}
+        same_listing = wanted == {"query_type": "my_videos", "order": "date"}
+        return same_listing and args["max_results"] <= UPLOADS_PREFETCH_SIZE
+    if kind == "overview":
+        base = normalize_query(_PREFETCH_QUERIES["overview"])
+        same_report = {k: v for k, v in args.items() if k != "metrics"} == {
+            k: v for k, v in base.items() if k != "metrics"
+        }
+        return same_report and set(split_csv(args.get("metrics"))) <= set(OVERVIEW_METRICS)
+    return args == normalize_query(_PREFETCH_QUERIES[kind])
+
+
+def _serve(kind: str, prefetched: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    """Cut a prefetched result down to what the tool call asked for."""
+    if kind == "uploads":
+        served = copy.deepcopy(prefetched)
+        served["items"] = served.get("items", [])[: args["max_results"]]
+        return served
+    if kind == "overview":
+        return project_report(prefetched, split_csv(args.get("metrics")))
+    return copy.deepcopy(prefetched)
+
+
+class RequestDataCache:
+    """
+    YouTube data fetched speculatively for one agent request.
+
+    Prefetches start as soon as the request arrives, while the planner model is still
+    thinking. Tool calls that one of them can answer await it instead of going
+    upstream; prefetches nobody used are counted when the request finishes.
+    """
+
+    def __init__(self, fetch: Fetch):
+        self._fetch = fetch
+        self._prefetches: Dict[str, asyncio.Task] = {}
+        self._used: set = set()
+        self._token: Optional[contextvars.Token] = None
+
+    def start(self, kinds: List[str]) -> None:
+        for kind in kinds:
+            query = normalize_query(_PREFETCH_QUERIES[kind])
+            self._prefetches[kind] = asyncio.ensure_future(self._fetch(query))
+            prefetch_stats[f"issued.{kind}"] += 1
+
+    async def lookup(self, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the answer to a tool call from a prefetch, or None on a miss."""
+        args = normalize_query(args)
+        kind = next((k for k in self._prefetches if _matches(k, args)), None)
+        if kind is None:
+            return None
+        try:
+            prefetched = await asyncio.shield(self._prefetches[kind])
+        except Exception:
+            return None
+        if "error" in prefetched:
+            # Let the real call run and report its own error
+            return None
+        if kind not in self._used:
+            self._used.add(kind)
+            prefetch_stats[f"used.{kind}"] += 1
+        return _serve(kind, prefetched, args)
+
+    def __enter__(self) -> "RequestDataCache":
+        self._token = _current_cache.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current_cache.reset(self._token)
+        unused = [kind for kind in self._prefetches if kind not in self._used]
+        for kind in unused:
+            prefetch_stats[f"unused.{kind}"] += 1
+            self._prefetches[kind].cancel()
+        if self._prefetches:
+            logger.info(
+                "Prefetch: %s of %s used%s",
+                len(self._used),
+                len(self._prefetches),
+                f", unused: {', '.join(unused)}" if unused else "",
+            )
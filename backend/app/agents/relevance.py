@@ -0,0 +1,209 @@
+import asyncio
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("relevance")
+
+RELEVANCE_CHECK_ENABLED = os.getenv("RELEVANCE_CHECK_ENABLED", "true").lower() in ("1", "true", "yes")
+# Below this probability of being on-topic a query is answered without the agent
+RELEVANCE_REJECT_BELOW = float(os.getenv("RELEVANCE_REJECT_BELOW", "0.2"))
+# Between the two thresholds the query goes to the agent with a note attached
+RELEVANCE_BORDERLINE_BELOW = float(os.getenv("RELEVANCE_BORDERLINE_BELOW", "0.5"))
+
+TRAINING_DATA_PATH = Path(__file__).parent / "data" / "relevance_examples.tsv"
+NOTE_STATE_KEY = "relevance_note"
+
+OFF_TOPIC_RESPONSE = (
+    "I can only help with questions about YouTube, such as your channel's views, subscribers, "
+    "watch time, audience, traffic sources, revenue or videos. Try asking something like "
+    "\"What were my top videos last month?\""
+)
+MALFORMED_RESPONSE = (
+    "I couldn't understand that question. Please ask about your YouTube channel, for example "
+    "\"How many views did I get this week?\""
+)
+BORDERLINE_NOTE = (
+    "A relevance check flagged the latest user message as possibly unrelated to YouTube data "
+    "(confidence {score:.2f}). If it isn't about the user's channel or YouTube content, don't call "
+    "any tools; briefly say what you can help with instead."
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_N_FEATURES = 1 << 18
+
+
+def _features(text: str) -> List[int]:
+    """Hashed word uni/bigrams plus character trigrams (which keep typos close to the real word)."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    grams = [f"w:{t}" for t in tokens]
+    grams += [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for token in tokens:
+        padded = f" {token} "
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return sorted({zlib.crc32(g.encode()) % _N_FEATURES for g in grams})
+
+
+@dataclass(frozen=True)
+class RelevanceVerdict:
+    label: str  # "on_topic", "borderline", "off_topic" or "malformed"
+    score: float  # probability that the query is about YouTube data
+
+    @property
+    def answer(self) -> Optional[str]:
+        """Canned reply when the agent should not be called at all."""
+        if self.label == "malformed":
+            return MALFORMED_RESPONSE
+        if self.label == "off_topic":
+            return OFF_TOPIC_RESPONSE
+        return None
+
+    @property
+    def note(self) -> str:
+        """Hint for the agents; empty unless the query is borderline."""
+        return BORDERLINE_NOTE.format(score=self.score) if self.label == "borderline" else ""
+
+
+class RelevanceClassifier:
+    """
+    Logistic regression over hashed n-gram features, trained on a small labelled set.
+
+    Training takes a fraction of a second and runs when the agents are preloaded (or in
+    a worker thread on first use); classifying a query is a handful of array lookups, so
+    it's cheap enough to run before every agent request.
+    """
+
+    def __init__(self, data_path: Path = TRAINING_DATA_PATH, epochs: int = 300, l2: float = 1e-4):
+        self.data_path = data_path
+        self.epochs = epochs
+        self.l2 = l2
+        self._weights: Optional[np.ndarray] = None
+        self._bias = 0.0
+        self._train_lock = threading.Lock()
+
+    @staticmethod
+    def _load(path: Path) -> List[Tuple[int, str]]:
+        examples = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                label, text = line.rstrip("\n").split("\t", 1)
+                examples.append((int(label), text))
+        return examples
+
+    def train(self) -> None:
+        examples = self._load(self.data_path)
+        # Queries without any word characters are handled as malformed before scoring
+        examples = [(label, idx) for label, text in examples if (idx := _features(text))]
+        labels = np.array([label for label, _ in examples], dtype=np.float64)
+        rows, cols, vals = [], [], []
+        for i, (_, idx) in enumerate(examples):
+            rows += [i] * len(idx)
+            cols += idx
+            vals += [1.0 / np.sqrt(len(idx))] * len(idx)
+        rows, cols, vals = np.array(rows), np.array(cols), np.array(vals)
+
+        # Balance the classes so the decision threshold stays meaningful
+        positives = labels.sum()
+        sample_weight = np.where(
+            labels == 1, len(labels) / (2 * positives), len(labels) / (2 * (len(labels) - positives))
+        )
+
+        # Full-batch gradient descent on the sparse (rows, cols, vals) design matrix
+        weights = np.zeros(_N_FEATURES)
+        bias = 0.0
+        learning_rate = 2.0
+        for _ in range(self.epochs):
+            logits = np.bincount(rows, weights=weights[cols] * vals, minlength=len(labels)) + bias
+            error = (1.0 / (1.0 + np.exp(-logits)) - labels) * sample_weight / len(labels)
+            gradient = np.bincount(cols, weights=error[rows] * vals, minlength=_N_FEATURES)
+            weights -= learning_rate * (gradient + self.l2 * weights)
+            bias -= learning_rate * error.sum()
+
+        self._weights, self._bias = weights, bias
+        logger.info("Trained relevance classifier on %s examples", len(examples))
+
+    @property
+    def trained(self) -> bool:
+        return self._weights is not None
+
+    def ensure_trained(self) -> None:
+        if self._weights is None:
+            with self._train_lock:
+                if self._weights is None:
+                    self.train()
+
+    def score(self, text: str) -> float:
+        """Probability that text is a question about YouTube data."""
+        self.ensure_trained()
+        idx = _features(text)
+        if not idx:
+            return 0.0
+        logit = self._weights[idx].sum() / np.sqrt(len(idx)) + self._bias
+        return float(1.0 / (1.0 + np.exp(-logit)))
+
+    def classify(self, text: str, previous: Optional[str] = None) -> RelevanceVerdict:
+        """
+        Classify a query; `previous` is the user's last message in the same conversation,
+        which gives follow-ups like "and for shares?" their context.
+        """
+        if sum(c.isalpha() for c in text) < 2:
+            return RelevanceVerdict("malformed", 0.0)
+        score = self.score(text)
+        if previous and score < RELEVANCE_BORDERLINE_BELOW:
+            in_context = self.score(f"{previous}\n{text}")
+            if in_context >= RELEVANCE_BORDERLINE_BELOW:
+                # The previous turn carries the topic, which also makes anything look on-topic:
+                # never reject, but keep flagging messages that look unrelated on their own
+                if score < RELEVANCE_REJECT_BELOW:
+                    return RelevanceVerdict("borderline", score)
+                return RelevanceVerdict("on_topic", in_context)
+        if score < RELEVANCE_REJECT_BELOW:
+            return RelevanceVerdict("off_topic", score)
+        if score < RELEVANCE_BORDERLINE_BELOW:
+            return RelevanceVerdict("borderline", score)
+        return RelevanceVerdict("on_topic", score)
+
+
+relevance_classifier = RelevanceClassifier()
+
+
+async def check_relevance(query: str, previous: Optional[str] = None) -> RelevanceVerdict:
+    """Classify a user query before it reaches the agents, in the context of the previous turn if any."""
+    if not RELEVANCE_CHECK_ENABLED:
+        return RelevanceVerdict("on_topic", 1.0)
+    if not relevance_classifier.trained:
+        # Not preloaded: train off the event loop
+        await asyncio.to_thread(relevance_classifier.ensure_trained)
+    verdict = relevance_classifier.classify(query, previous)
+    if verdict.label != "on_topic":
+        logger.info("Relevance check: %s (score %.2f)", verdict.label, verdict.score)
+    return verdict
+
+
+class RelevanceNotePlugin(BasePlugin):
+    """Passes the relevance note of a borderline query on to every model call of the turn."""
+
+    def __init__(self, name: str = "relevance_note"):
+        super().__init__(name=name)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        note = callback_context.state.get(NOTE_STATE_KEY)
+        if note:
+            llm_request.append_instructions([note])
+        return None
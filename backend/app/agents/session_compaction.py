@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event, EventActions
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.sessions import (
+    BaseSessionService,
+    DatabaseSessionService,
+    InMemorySessionService,
+    Session,
+)
+from google.adk.sessions.database_session_service import StorageEvent
+from google.genai import types
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("session_compaction")
+
+# Turns kept verbatim after compaction
+SESSION_KEEP_TURNS = int(os.getenv("SESSION_KEEP_TURNS", "4"))
+# Compaction only runs once this many extra turns have piled up, so its cost is amortized
+SESSION_COMPACT_BATCH = int(os.getenv("SESSION_COMPACT_BATCH", "4"))
+SESSION_SUMMARY_MAX_CHARS = int(os.getenv("SESSION_SUMMARY_MAX_CHARS", "4000"))
+# Tool responses larger than this are stripped from every turn except the latest
+SESSION_TOOL_PAYLOAD_MAX_CHARS = int(os.getenv("SESSION_TOOL_PAYLOAD_MAX_CHARS", "2000"))
+
+SUMMARY_STATE_KEY = "conversation_summary"
+COMPACTION_AUTHOR = "session_compaction"
+OMITTED_MARKER = "omitted_by_compaction"
+
+
+def _split_turns(events: List[Event]) -> List[List[Event]]:
+    """Group events into turns; a turn starts with each message authored by the user."""
+    turns: List[List[Event]] = []
+    for event in events:
+        if event.author == "user" or not turns:
+            turns.append([])
+        turns[-1].append(event)
+    return turns
+
+
+def _first_text(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return next((part.text for part in event.content.parts if part.text), "")
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def _summarize_turn(turn: List[Event]) -> str:
+    question = _first_text(turn[0]) if turn[0].author == "user" else ""
+    answer = next(
+        (_first_text(e) for e in reversed(turn) if e.author != "user" and _first_text(e)),
+        "",
+    )
+    lines = [f"- User: {_clip(question, 200)}"] if question else []
+    if answer:
+        lines.append(f"  Assistant: {_clip(answer, 300)}")
+    return "\n".join(lines)
+
+
+def _fold_summary(previous: str, turns: List[List[Event]]) -> str:
+    lines = [line for line in (_summarize_turn(t) for t in turns) if line]
+    summary = "\n".join(filter(None, [previous] + lines))
+    if len(summary) <= SESSION_SUMMARY_MAX_CHARS:
+        return summary
+    # Keep the most recent part of the running summary, cut at an entry boundary
+    tail = summary[-SESSION_SUMMARY_MAX_CHARS:]
+    start = tail.find("\n- ")
+    return tail[start + 1:] if start != -1 else tail
+
+
+def _strip_tool_payloads(event: Event) -> Optional[types.Content]:
+    """Return a copy of the event content with bulky function responses replaced, or None."""
+    if not event.content or not event.content.parts:
+        return None
+    changed = False
+    parts = []
+    for part in event.content.parts:
+        response = part.function_response
+        if response and response.response and OMITTED_MARKER not in response.response:
+            size = len(json.dumps(response.response, default=str))
+            if size > SESSION_TOOL_PAYLOAD_MAX_CHARS:
+                part = part.model_copy(deep=True)
+                part.function_response.response = {
+                    OMITTED_MARKER: True,
+                    "note": f"{size} chars of tool output dropped from history",
+                    "keys": list(response.response.keys())[:20],
+                }
+                changed = True
+        parts.append(part)
+    if not changed:
+        return None
+    return types.Content(role=event.content.role, parts=parts)
+
+
+def _apply_to_database(
+    service: DatabaseSessionService,
+    session: Session,
+    dropped_ids: List[str],
+    slimmed: Dict[str, types.Content],
+) -> None:
+    with service.database_session_factory() as sql_session:
+        events = sql_session.query(StorageEvent).filter(
+            StorageEvent.app_name == session.app_name,
+            StorageEvent.user_id == session.user_id,
+            StorageEvent.session_id == session.id,
+        )
+        if dropped_ids:
+            events.filter(StorageEvent.id.in_(dropped_ids)).delete(synchronize_session=False)
+        for storage_event in events.filter(StorageEvent.id.in_(list(slimmed))):
+            storage_event.content = slimmed[storage_event.id].model_dump(exclude_none=True, mode="json")
+        sql_session.commit()
+
+
+def _apply_in_memory(
+    service: InMemorySessionService,
+    session: Session,
+    dropped_ids: List[str],
+    slimmed: Dict[str, types.Content],
+) -> None:
+    stored = service.sessions.get(session.app_name, {}).get(session.user_id, {}).get(session.id)
+    if stored is None:
+        return
+    dropped = set(dropped_ids)
+    stored.events = [e for e in stored.events if e.id not in dropped]
+    for event in stored.events:
+        if event.id in slimmed:
+            event.content = slimmed[event.id]
+
+
+async def compact_session(
+    session_service: BaseSessionService, app_name: str, user_id: str, session_id: str
+) -> bool:
+    """
+    Bound the stored history of a session.
+
+    Keeps the last SESSION_KEEP_TURNS turns verbatim, folds older turns into a
+    running summary stored in session state under SUMMARY_STATE_KEY, deletes
+    their events and strips bulky tool payloads from all but the latest turn.
+
+    Returns:
+        True if the session was compacted
+    """
+    session = await session_service.get_session(
+        app_name=app_name, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        return False
+
+    turns = _split_turns(session.events)
+    if len(turns) <= SESSION_KEEP_TURNS + SESSION_COMPACT_BATCH:
+        return False
+
+    folded, kept = turns[:-SESSION_KEEP_TURNS], turns[-SESSION_KEEP_TURNS:]
+    dropped_ids = [e.id for turn in folded for e in turn]
+    slimmed = {
+        e.id: content
+        for turn in kept[:-1]
+        for e in turn
+        if (content := _strip_tool_payloads(e)) is not None
+    }
+    summary = _fold_summary(session.state.get(SUMMARY_STATE_KEY, ""), folded)
+
+    if isinstance(session_service, DatabaseSessionService):
+        await asyncio.to_thread(_apply_to_database, session_service, session, dropped_ids, slimmed)
+    elif isinstance(session_service, InMemorySessionService):
+        _apply_in_memory(session_service, session, dropped_ids, slimmed)
+    else:
+        logger.warning("Session compaction not supported for %s", type(session_service).__name__)
+        return False
+
+    # Record the summary through a state-only event so every session service persists it
+    await session_service.append_event(
+        session,
+        Event(
+            invocation_id=Event.new_id(),
+            author=COMPACTION_AUTHOR,
+            actions=EventActions(state_delta={SUMMARY_STATE_KEY: summary}),
+        ),
+    )
+    logger.info(
+        "Compacted session %s: folded %s turns (%s events), slimmed %s events",
+        session_id,
+        len(folded),
+        len(dropped_ids),
+        len(slimmed),
+    )
+    return True
+
+
+class SessionSummaryPlugin(BasePlugin):
+    """Adds the running conversation summary of a compacted session to each model call."""
+
+    def __init__(self, name: str = "session_summary"):
+        super().__init__(name=name)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        summary = callback_context.state.get(SUMMARY_STATE_KEY)
+        if summary:
+            llm_request.append_instructions(
+                [f"Summary of the earlier conversation with this user (older turns are not shown):\n{summary}"]
+            )
+        return None
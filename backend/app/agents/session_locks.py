@@ -0,0 +1,39 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, Tuple
+
+
+class SessionLocks:
+    """
+    Per-key asyncio locks that only exist while someone holds or waits for them.
+
+    Turns of the same conversation are serialized, while different conversations
+    never contend with each other. Entries are reference counted and removed once
+    the last holder releases, so the registry doesn't grow with the number of
+    sessions ever seen.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, Tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users <= 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+session_locks = SessionLocks()
@@ -1,20 +1,27 @@
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 
+from ...llm import get_model
 from . import prompt, tools
 
 AGENT_MODEL = "gemini/gemini-2.0-flash"
 
+# Read-only tools that may run concurrently when issued in the same model turn
+PARALLEL_SAFE_TOOLS = [
+    tools.execute_dynamic_youtube_query,
+    tools.execute_youtube_api_call,
+]
+
 # Create the agent instance with output_key for sequential chaining
 api_executor_agent = Agent(
     name="api_executor_agent",
-    model=LiteLlm(AGENT_MODEL),
+    model=get_model(AGENT_MODEL, cacheable_prefix=prompt.CORE_INSTRUCTION),
     description="Understands user queries about YouTube data and dynamically constructs and executes the appropriate YouTube API calls to fetch any requested information.",
-    instruction=prompt.INSTRUCTION,
+    instruction=prompt.build_instruction,  # Assembled per request from the relevant sections
     tools=[
         tools.execute_dynamic_youtube_query,  # Primary tool - handles ANY YouTube query dynamically
         tools.execute_youtube_api_call,        # Legacy tool - kept for backwards compatibility
     ],
     output_key="api_response",  # Store output in state for next agent to access
+    after_tool_callback=tools.record_fetched_response,  # Tool results for the analysis tool
 )
 
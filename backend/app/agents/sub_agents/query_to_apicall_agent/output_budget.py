@@ -0,0 +1,193 @@
+import base64
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Rough size of a tool result as the model sees it; JSON averages about 4 characters per token
+TOOL_OUTPUT_TOKEN_BUDGET = int(os.getenv("TOOL_OUTPUT_TOKEN_BUDGET", "4000"))
+CHARS_PER_TOKEN = 4
+# Longest comment or description text kept per item
+ITEM_TEXT_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_ITEM_TEXT_MAX_CHARS", "500"))
+REPLIES_PER_COMMENT = 2
+
+
+def estimate_tokens(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str)) // CHARS_PER_TOKEN
+
+
+def encode_cursor(offset: int, page_token: Optional[str] = None) -> str:
+    position: Dict[str, Any] = {"offset": offset}
+    if page_token:
+        position["page_token"] = page_token
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[Optional[str], int]:
+    """(upstream page token, offset into that page's ranked items); (None, 0) for no or a bad cursor."""
+    if not cursor:
+        return None, 0
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        page_token = position.get("page_token")
+        return (page_token if isinstance(page_token, str) else None), max(0, int(position["offset"]))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None, 0
+
+
+def _clip(text: Optional[str], limit: int = ITEM_TEXT_MAX_CHARS) -> str:
+    text = text or ""
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+# Comments: rank by likes, keep the fields an answer needs
+
+def _comment_snippet(thread: Dict[str, Any]) -> Dict[str, Any]:
+    return thread.get("snippet", {}).get("topLevelComment", {}).get("snippet", {})
+
+
+def _comment_rank(thread: Dict[str, Any]) -> int:
+    return _int(_comment_snippet(thread).get("likeCount"))
+
+
+def _slim_comment(thread: Dict[str, Any]) -> Dict[str, Any]:
+    snippet = _comment_snippet(thread)
+    slim = {
+        "id": thread.get("id"),
+        "author": snippet.get("authorDisplayName"),
+        "text": _clip(snippet.get("textOriginal") or snippet.get("textDisplay")),
+        "likeCount": _int(snippet.get("likeCount")),
+        "publishedAt": snippet.get("publishedAt"),
+        "totalReplyCount": _int(thread.get("snippet", {}).get("totalReplyCount")),
+    }
+    replies = thread.get("replies", {}).get("comments", [])
+    if replies:
+        top = sorted(replies, key=lambda r: _int(r.get("snippet", {}).get("likeCount")), reverse=True)
+        slim["topReplies"] = [
+            {
+                "author": r.get("snippet", {}).get("authorDisplayName"),
+                "text": _clip(r.get("snippet", {}).get("textOriginal"), ITEM_TEXT_MAX_CHARS // 2),
+                "likeCount": _int(r.get("snippet", {}).get("likeCount")),
+            }
+            for r in top[:REPLIES_PER_COMMENT]
+        ]
+    return slim
+
+
+def _summarize_comments(rest: List[Dict[str, Any]]) -> Dict[str, Any]:
+    dates = sorted(s for s in (_comment_snippet(t).get("publishedAt") for t in rest) if s)
+    return {
+        "omittedLikes": sum(_comment_rank(t) for t in rest),
+        "omittedReplies": sum(_int(t.get("snippet", {}).get("totalReplyCount")) for t in rest),
+        "omittedDateRange": [dates[0], dates[-1]] if dates else None,
+    }
+
+
+# Videos: rank by views, drop thumbnails, tags and long descriptions
+
+def _video_rank(video: Dict[str, Any]) -> int:
+    return _int(video.get("statistics", {}).get("viewCount"))
+
+
+def _slim_video(video: Dict[str, Any]) -> Dict[str, Any]:
+    snippet = video.get("snippet", {})
+    if "resourceId" in snippet:
+        # A playlist item: its own id is not the video's
+        video_id = snippet["resourceId"].get("videoId")
+    else:
+        video_id = video.get("id") if isinstance(video.get("id"), str) else video.get("id", {}).get("videoId")
+    slim = {
+        "id": video_id,
+        "title": snippet.get("title"),
+        "publishedAt": snippet.get("publishedAt"),
+        "description": _clip(snippet.get("description"), ITEM_TEXT_MAX_CHARS // 2),
+        "statistics": video.get("statistics", {}),
+        "embedUrl": video.get("embedUrl"),
+        "watchUrl": video.get("watchUrl"),
+    }
+    duration = video.get("contentDetails", {}).get("duration")
+    if duration:
+        slim["duration"] = duration
+    return {k: v for k, v in slim.items() if v not in (None, "", {})}
+
+
+def _summarize_videos(rest: List[Dict[str, Any]]) -> Dict[str, Any]:
+    views = [_video_rank(v) for v in rest]
+    dates = sorted(d for d in (v.get("snippet", {}).get("publishedAt") for v in rest) if d)
+    return {
+        "omittedViews": sum(views),
+        "omittedAverageViews": round(sum(views) / len(views)) if views else 0,
+        "omittedDateRange": [dates[0], dates[-1]] if dates else None,
+    }
+
+
+Policy = Tuple[Callable[[Dict], int], Callable[[Dict], Dict], Callable[[List[Dict]], Dict], str]
+
+# query_type -> (rank, slim item, summarize omitted items, ranking description)
+_POLICIES: Dict[str, Policy] = {
+    "comments": (_comment_rank, _slim_comment, _summarize_comments, "most liked first"),
+    "my_videos": (_video_rank, _slim_video, _summarize_videos, "most viewed first"),
+    "search": (lambda item: 0, _slim_video, lambda rest: {}, "API order"),
+}
+
+
+def fit_to_budget(
+    query_type: str,
+    response: Dict[str, Any],
+    cursor: Optional[str] = None,
+    budget_tokens: int = TOOL_OUTPUT_TOKEN_BUDGET,
+) -> Dict[str, Any]:
+    """
+    Trim a list-shaped tool result to a token budget.
+
+    Items of the upstream page are ranked (top-liked comments, most-viewed videos),
+    slimmed to the fields an answer needs and added until the budget is used up.
+    Whatever doesn't fit is summarized under `truncated`, together with a cursor that
+    returns the next items when passed back with otherwise identical arguments: the
+    rest of this page, and once it is used up, the next upstream page (the cursor then
+    carries its page token). Results that already fit and have no cursor are returned
+    unchanged.
+    """
+    policy = _POLICIES.get(query_type)
+    items = response.get("items") if isinstance(response, dict) else None
+    if policy is None or not isinstance(items, list):
+        return response
+    page_token, offset = decode_cursor(cursor)
+    if offset == 0 and page_token is None and estimate_tokens(response) <= budget_tokens:
+        return response
+
+    rank, slim, summarize, order = policy
+    # Stable sort, so the same cursor always continues where the previous call ended
+    ranked = sorted(items, key=rank, reverse=True)[offset:]
+    next_page_token = response.get("nextPageToken")
+    result = {k: v for k, v in response.items() if k not in ("items", "nextPageToken")}
+    result["items"] = []
+    used = estimate_tokens(result) + 100  # room for the truncation note
+    for item in ranked:
+        slimmed = slim(item)
+        cost = estimate_tokens(slimmed)
+        if result["items"] and used + cost > budget_tokens:
+            break
+        result["items"].append(slimmed)
+        used += cost
+
+    rest = ranked[len(result["items"]):]
+    result["truncated"] = {
+        "order": order,
+        "returned": len(result["items"]),
+        "offset": offset,
+        "omitted": len(rest),
+        "more_pages": bool(next_page_token),
+        **(summarize(rest) if rest else {}),
+    }
+    if rest:
+        result["truncated"]["cursor"] = encode_cursor(offset + len(result["items"]), page_token)
+    elif next_page_token:
+        result["truncated"]["cursor"] = encode_cursor(0, next_page_token)
+    return result
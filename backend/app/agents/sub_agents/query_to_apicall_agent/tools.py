@@ -1,43 +1,147 @@
+import asyncio
+import contextvars
+import threading
 from typing import Any, Dict, Optional
 from datetime import datetime, date, timedelta
 from ....services.youtube_service import YouTubeService
+from ...batch_fetch import current_batch
+from ...fixtures import through_fixtures
+from ...parallel_tools import run_in_tool_executor
+# Module import: prefetch imports this package, so it may still be initializing here
+from ... import prefetch
+from .output_budget import decode_cursor, fit_to_budget
 import os
+import httplib2
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 
-youtube_service = YouTubeService()
+from app.utils.tracing import TracedHttpRequest, refresh_credentials
+
+_youtube_service: Optional[YouTubeService] = None
+_youtube_service_lock = threading.Lock()
+
+# Upper bound for one tool call, and for each HTTP request it makes
+TOOL_TIMEOUT_SECONDS = float(os.getenv("YOUTUBE_TOOL_TIMEOUT_SECONDS", "30"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("YOUTUBE_HTTP_TIMEOUT_SECONDS", "20"))
+
+# Set by the async tool wrappers; checked before every upstream request so a
+# cancelled or timed-out call stops issuing further requests from its worker thread
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "youtube_tool_cancel_event", default=None
+)
+
+
+class ToolCancelledError(Exception):
+    """Raised inside a worker thread when its tool call was cancelled."""
+
+
+def _execute(request):
+    """Execute a Google API request unless the owning tool call has been cancelled."""
+    cancel_event = _cancel_event.get()
+    if cancel_event is not None and cancel_event.is_set():
+        raise ToolCancelledError("Tool call cancelled")
+    return request.execute()
+
+
+async def _run_tool(func, *args, **kwargs) -> Dict[str, Any]:
+    """
+    Run a blocking tool implementation off the event loop with a timeout.
+
+    On timeout or cancellation the worker is signalled to stop before its next
+    upstream request; the HTTP timeout bounds the request already in flight.
+    """
+    cancel_event = threading.Event()
+    token = _cancel_event.set(cancel_event)
+    try:
+        future = run_in_tool_executor(func, *args, **kwargs)
+    finally:
+        _cancel_event.reset(token)
+
+    try:
+        return await asyncio.wait_for(future, timeout=TOOL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        cancel_event.set()
+        return {"error": f"YouTube API call timed out after {TOOL_TIMEOUT_SECONDS:g} seconds"}
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+
+def get_youtube_service() -> YouTubeService:
+    """The shared YouTubeService, created on first use so the agents import without credentials."""
+    global _youtube_service
+    with _youtube_service_lock:
+        if _youtube_service is None:
+            # Its requests go through _execute, so a cancelled or timed-out tool call stops
+            _youtube_service = YouTubeService(execute=_execute)
+        return _youtube_service
+
+_credentials: Optional[Credentials] = None
+_credentials_lock = threading.Lock()
+_uploads_playlist_id: Optional[str] = None
+
+
+def _get_credentials() -> Credentials:
+    """
+    The agent's YouTube credentials, refreshed only when the access token is missing or
+    about to expire. Concurrent tool calls, such as the prefetches started for one
+    request, wait for a single refresh instead of each doing their own.
+    """
+    global _credentials
+    with _credentials_lock:
+        if _credentials is not None and _credentials.valid:
+            return _credentials
+
+        client_id = os.getenv("YT_CLIENT_ID")
+        client_secret = os.getenv("YT_CLIENT_SECRET")
+        refresh_token = os.getenv("YT_REFRESH_TOKEN")
+
+        if not all([client_id, client_secret, refresh_token]):
+            raise Exception("YouTube OAuth credentials not configured")
+
+        creds = Credentials(
+            None,
+            refresh_token=refresh_token,
+            token_uri="https://oauth2.googleapis.com/token",
+            client_id=client_id,
+            client_secret=client_secret,
+            scopes=[
+                "https://www.googleapis.com/auth/youtube.readonly",
+                "https://www.googleapis.com/auth/yt-analytics.readonly"
+            ],
+        )
+        refresh_credentials(creds, Request())
+        _credentials = creds
+        return creds
 
 def _get_youtube_clients():
     """Get authenticated YouTube Data and Analytics API clients."""
-    client_id = os.getenv("YT_CLIENT_ID")
-    client_secret = os.getenv("YT_CLIENT_SECRET")
-    refresh_token = os.getenv("YT_REFRESH_TOKEN")
-    
-    if not all([client_id, client_secret, refresh_token]):
-        raise Exception("YouTube OAuth credentials not configured")
+    creds = _get_credentials()
     
-    creds = Credentials(
-        None,
-        refresh_token=refresh_token,
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=client_id,
-        client_secret=client_secret,
-        scopes=[
-            "https://www.googleapis.com/auth/youtube.readonly",
-            "https://www.googleapis.com/auth/yt-analytics.readonly"
-        ],
+    # Each client gets its own Http object (httplib2 is not thread-safe) with a bounded timeout
+    youtube_data = build(
+        "youtube", "v3", cache_discovery=False, requestBuilder=TracedHttpRequest,
+        http=AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS)),
+    )
+    youtube_analytics = build(
+        "youtubeAnalytics", "v2", cache_discovery=False, requestBuilder=TracedHttpRequest,
+        http=AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS)),
     )
-    
-    request = Request()
-    creds.refresh(request)
-    
-    youtube_data = build("youtube", "v3", credentials=creds, cache_discovery=False)
-    youtube_analytics = build("youtubeAnalytics", "v2", credentials=creds, cache_discovery=False)
     
     return youtube_data, youtube_analytics
 
-def execute_dynamic_youtube_query(
+def _get_uploads_playlist_id(youtube_data) -> str:
+    """The ID of the channel's uploads playlist; it never changes, so it is looked up once."""
+    global _uploads_playlist_id
+    if _uploads_playlist_id is None:
+        channels = _execute(youtube_data.channels().list(part="contentDetails", mine=True))
+        if not channels.get("items"):
+            raise Exception("No YouTube channel found for the configured credentials")
+        _uploads_playlist_id = channels["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
+    return _uploads_playlist_id
+
+def _execute_dynamic_youtube_query_sync(
     query_type: str,
     metrics: Optional[str] = None,
     dimensions: Optional[str] = None,
@@ -49,60 +153,7 @@ def execute_dynamic_youtube_query(
     user_id: Optional[str] = None,
     **additional_params
 ) -> Dict[str, Any]:
-    """
-    Dynamically execute ANY YouTube Analytics or Data API query.
-    
-    This is the most flexible tool - it can handle any YouTube API query by 
-    constructing the appropriate API call based on the parameters provided.
-    
-    Args:
-        query_type: Type of query - "analytics", "search", "video_details", "channel_details", "my_videos", "playlists", "comments"
-        metrics: Comma-separated metrics for analytics (e.g., "views,likes,comments,shares"). Optional, defaults to "views,likes,comments" for analytics.
-        dimensions: Comma-separated dimensions for analytics (e.g., "day", "video", "country"). Optional.
-        filters: Filters for analytics (e.g., "video==VIDEO_ID"). Optional.
-        sort: Sort order (e.g., "-views" for descending views). Optional.
-        start_date: Start date for analytics (YYYY-MM-DD). Optional, defaults to 30 days ago for analytics.
-        end_date: End date for analytics (YYYY-MM-DD). Optional, defaults to today for analytics.
-        max_results: Maximum results to return. Optional, defaults to 100.
-        additional_params: Any other parameters specific to the query type
-    
-    Returns:
-        Dict containing the API response
-    
-    Examples:
-        # Get views for all videos in the last 7 days
-        execute_dynamic_youtube_query(
-            query_type="analytics",
-            metrics="views,likes,comments",
-            dimensions="video",
-            start_date="2024-01-01",
-            end_date="2024-01-07",
-            sort="-views"
-        )
-        
-        # Get daily views trend
-        execute_dynamic_youtube_query(
-            query_type="analytics",
-            metrics="views,estimatedMinutesWatched",
-            dimensions="day",
-            start_date="2024-01-01",
-            end_date="2024-01-31"
-        )
-        
-        # Search for videos
-        execute_dynamic_youtube_query(
-            query_type="search",
-            q="Python tutorial",
-            max_results=10
-        )
-        
-        # Get my most recent videos
-        execute_dynamic_youtube_query(
-            query_type="my_videos",
-            max_results=5,
-            order="date"
-        )
-    """
+    """Blocking implementation of `execute_dynamic_youtube_query`."""
     try:
         youtube_data, youtube_analytics = _get_youtube_clients()
         
@@ -135,7 +186,7 @@ def execute_dynamic_youtube_query(
             if sort:
                 query_params["sort"] = sort
             
-            response = youtube_analytics.reports().query(**query_params).execute()
+            response = _execute(youtube_analytics.reports().query(**query_params))
             
             # If the response includes video IDs, enrich with video titles
             if dimensions and "video" in dimensions and "rows" in response:
@@ -152,10 +203,10 @@ def execute_dynamic_youtube_query(
                     # YouTube Data API allows max 50 IDs per request
                     for i in range(0, len(video_ids), 50):
                         batch_ids = video_ids[i:i+50]
-                        videos_response = youtube_data.videos().list(
+                        videos_response = _execute(youtube_data.videos().list(
                             part="snippet,statistics",
                             id=",".join(batch_ids)
-                        ).execute()
+                        ))
                         
                         for video in videos_response.get("items", []):
                             video_id = video["id"]
@@ -190,8 +241,10 @@ def execute_dynamic_youtube_query(
                 search_params["relevanceLanguage"] = additional_params["relevance_language"]
             if "region_code" in additional_params:
                 search_params["regionCode"] = additional_params["region_code"]
+            if additional_params.get("page_token"):
+                search_params["pageToken"] = additional_params["page_token"]
                 
-            response = youtube_data.search().list(**search_params).execute()
+            response = _execute(youtube_data.search().list(**search_params))
             return response
             
         elif query_type == "video_details":
@@ -200,31 +253,43 @@ def execute_dynamic_youtube_query(
             if not video_id:
                 return {"error": "video_id is required for video_details query"}
             
-            response = youtube_data.videos().list(
+            response = _execute(youtube_data.videos().list(
                 part="snippet,statistics,contentDetails,status",
                 id=video_id
-            ).execute()
+            ))
             return response
             
         elif query_type == "my_videos":
             # Get authenticated user's videos
-            search_params = {
-                "part": "snippet",
-                "forMine": True,
-                "type": "video",
-                "maxResults": max_results,
-                "order": additional_params.get("order", "date")
-            }
-            
-            response = youtube_data.search().list(**search_params).execute()
+            order = additional_params.get("order", "date")
+            page = {"pageToken": additional_params["page_token"]} if additional_params.get("page_token") else {}
+            if order == "date":
+                # The uploads playlist lists the channel's videos newest first, for 1 quota
+                # unit a page where search.list costs 100
+                response = _execute(youtube_data.playlistItems().list(
+                    part="snippet,contentDetails",
+                    playlistId=_get_uploads_playlist_id(youtube_data),
+                    maxResults=min(max_results, 50),
+                    **page
+                ))
+                video_ids = [item["snippet"]["resourceId"]["videoId"] for item in response.get("items", [])]
+            else:
+                response = _execute(youtube_data.search().list(
+                    part="snippet",
+                    forMine=True,
+                    type="video",
+                    maxResults=max_results,
+                    order=order,
+                    **page
+                ))
+                video_ids = [item["id"]["videoId"] for item in response.get("items", [])]
             
             # If we need statistics, make a second call to get video details
-            if additional_params.get("include_statistics", True) and response.get("items"):
-                video_ids = [item["id"]["videoId"] for item in response["items"]]
-                videos_response = youtube_data.videos().list(
+            if additional_params.get("include_statistics", True) and video_ids:
+                videos_response = _execute(youtube_data.videos().list(
                     part="snippet,statistics,contentDetails",
                     id=",".join(video_ids)
-                ).execute()
+                ))
                 
                 # Add embed URLs to each video
                 for video in videos_response.get("items", []):
@@ -232,32 +297,33 @@ def execute_dynamic_youtube_query(
                     video["embedUrl"] = f"https://www.youtube.com/embed/{video_id}"
                     video["watchUrl"] = f"https://www.youtube.com/watch?v={video_id}"
                 
+                # Keep the listing's position, so the next page can be asked for
+                if response.get("nextPageToken"):
+                    videos_response["nextPageToken"] = response["nextPageToken"]
                 return videos_response
             
             # Add embed URLs even if statistics not requested
-            for item in response.get("items", []):
-                if "videoId" in item.get("id", {}):
-                    video_id = item["id"]["videoId"]
-                    item["embedUrl"] = f"https://www.youtube.com/embed/{video_id}"
-                    item["watchUrl"] = f"https://www.youtube.com/watch?v={video_id}"
+            for item, video_id in zip(response.get("items", []), video_ids):
+                item["embedUrl"] = f"https://www.youtube.com/embed/{video_id}"
+                item["watchUrl"] = f"https://www.youtube.com/watch?v={video_id}"
             
             return response
             
         elif query_type == "channel_details":
             # Get channel information
-            response = youtube_data.channels().list(
+            response = _execute(youtube_data.channels().list(
                 part="snippet,statistics,contentDetails,brandingSettings",
                 mine=True
-            ).execute()
+            ))
             return response
             
         elif query_type == "playlists":
             # Get user's playlists
-            response = youtube_data.playlists().list(
+            response = _execute(youtube_data.playlists().list(
                 part="snippet,contentDetails",
                 mine=True,
                 maxResults=max_results
-            ).execute()
+            ))
             return response
             
         elif query_type == "comments":
@@ -266,12 +332,14 @@ def execute_dynamic_youtube_query(
             if not video_id:
                 return {"error": "video_id is required for comments query"}
             
-            response = youtube_data.commentThreads().list(
+            page = {"pageToken": additional_params["page_token"]} if additional_params.get("page_token") else {}
+            response = _execute(youtube_data.commentThreads().list(
                 part="snippet,replies",
                 videoId=video_id,
                 maxResults=max_results,
-                order=additional_params.get("order", "relevance")
-            ).execute()
+                order=additional_params.get("order", "relevance"),
+                **page
+            ))
             return response
             
         else:
@@ -292,32 +360,10 @@ def execute_dynamic_youtube_query(
             }
         }
 
-def execute_youtube_api_call(api_type: str, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Execute a YouTube API call based on the specified parameters
-    
-    Args:
-        api_type: Type of API ('data' or 'analytics')
-        endpoint: The API endpoint to call
-        params: Dictionary of parameters for the API call
-    
-    Returns:
-        Dictionary containing the API response
-    
-    Examples:
-        # Search for videos
-        execute_youtube_api_call("data", "search", {"query": "Python tutorial", "max_results": 10})
-        
-        # Get video details
-        execute_youtube_api_call("data", "videos", {"video_id": "dQw4w9WgXcQ"})
-        
-        # Get channel info
-        execute_youtube_api_call("data", "channels", {})
-        
-        # Get top videos analytics
-        execute_youtube_api_call("analytics", "top_videos", {"days": 30, "limit": 10})
-    """
+def _execute_youtube_api_call_sync(api_type: str, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Blocking implementation of `execute_youtube_api_call`."""
     try:
+        youtube_service = get_youtube_service()
         if api_type == "data":
             # Handle YouTube Data API calls
             if endpoint == "search":
@@ -380,3 +426,160 @@ def execute_youtube_api_call(api_type: str, endpoint: str, params: Dict[str, Any
             "params": params
         }
 
+async def execute_dynamic_youtube_query(
+    query_type: str,
+    metrics: Optional[str] = None,
+    dimensions: Optional[str] = None,
+    filters: Optional[str] = None,
+    sort: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    max_results: Optional[int] = None,
+    user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    **additional_params
+) -> Dict[str, Any]:
+    """
+    Dynamically execute ANY YouTube Analytics or Data API query.
+    
+    This is the most flexible tool - it can handle any YouTube API query by 
+    constructing the appropriate API call based on the parameters provided.
+    
+    Args:
+        query_type: Type of query - "analytics", "search", "video_details", "channel_details", "my_videos", "playlists", "comments"
+        metrics: Comma-separated metrics for analytics (e.g., "views,likes,comments,shares"). Optional, defaults to "views,likes,comments" for analytics.
+        dimensions: Comma-separated dimensions for analytics (e.g., "day", "video", "country"). Optional.
+        filters: Filters for analytics (e.g., "video==VIDEO_ID"). Optional.
+        sort: Sort order (e.g., "-views" for descending views). Optional.
+        start_date: Start date for analytics (YYYY-MM-DD). Optional, defaults to 30 days ago for analytics.
+        end_date: End date for analytics (YYYY-MM-DD). Optional, defaults to today for analytics.
+        max_results: Maximum results to return. Optional, defaults to 100.
+        cursor: Continuation cursor from a previous result's `truncated.cursor`. Pass it with otherwise identical arguments to get the next items. Optional.
+        additional_params: Any other parameters specific to the query type
+    
+    Returns:
+        Dict containing the API response. Large comment, video and search lists are trimmed to a size budget; the omitted items are then summarized under `truncated`.
+    
+    Examples:
+        # Get views for all videos in the last 7 days
+        execute_dynamic_youtube_query(
+            query_type="analytics",
+            metrics="views,likes,comments",
+            dimensions="video",
+            start_date="2024-01-01",
+            end_date="2024-01-07",
+            sort="-views"
+        )
+        
+        # Get daily views trend
+        execute_dynamic_youtube_query(
+            query_type="analytics",
+            metrics="views,estimatedMinutesWatched",
+            dimensions="day",
+            start_date="2024-01-01",
+            end_date="2024-01-31"
+        )
+        
+        # Search for videos
+        execute_dynamic_youtube_query(
+            query_type="search",
+            q="Python tutorial",
+            max_results=10
+        )
+        
+        # Get my most recent videos
+        execute_dynamic_youtube_query(
+            query_type="my_videos",
+            max_results=5,
+            order="date"
+        )
+    """
+    args = dict(
+        query_type=query_type,
+        metrics=metrics,
+        dimensions=dimensions,
+        filters=filters,
+        sort=sort,
+        start_date=start_date,
+        end_date=end_date,
+        max_results=max_results,
+        user_id=user_id,
+        **additional_params
+    )
+    # A cursor that moved past the first upstream page names the page to fetch
+    page_token, _ = decode_cursor(cursor)
+    if page_token:
+        args["page_token"] = page_token
+    result = await through_fixtures("execute_dynamic_youtube_query", args, lambda: _fetch_dynamic_query(args))
+    return fit_to_budget(query_type, result, cursor)
+
+async def _fetch_dynamic_query(args: Dict[str, Any]) -> Dict[str, Any]:
+    # Questions of a batch request share their data fetches
+    batch = current_batch()
+    if batch is not None:
+        return await batch.fetch(args)
+    # Data prefetched for this request while the planner was running
+    cache = prefetch.current_request_cache()
+    if cache is not None:
+        cached = await cache.lookup(args)
+        if cached is not None:
+            return cached
+    return await run_dynamic_query(args)
+
+async def run_dynamic_query(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one `execute_dynamic_youtube_query` call, given its arguments as a dict."""
+    return await _run_tool(_execute_dynamic_youtube_query_sync, **args)
+
+async def execute_youtube_api_call(api_type: str, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute a YouTube API call based on the specified parameters
+    
+    Args:
+        api_type: Type of API ('data' or 'analytics')
+        endpoint: The API endpoint to call
+        params: Dictionary of parameters for the API call
+    
+    Returns:
+        Dictionary containing the API response
+    
+    Examples:
+        # Search for videos
+        execute_youtube_api_call("data", "search", {"query": "Python tutorial", "max_results": 10})
+        
+        # Get video details
+        execute_youtube_api_call("data", "videos", {"video_id": "dQw4w9WgXcQ"})
+        
+        # Get channel info
+        execute_youtube_api_call("data", "channels", {})
+        
+        # Get top videos analytics
+        execute_youtube_api_call("analytics", "top_videos", {"days": 30, "limit": 10})
+    """
+    return await through_fixtures(
+        "execute_youtube_api_call",
+        {"api_type": api_type, "endpoint": endpoint, "params": params},
+        lambda: _run_tool(_execute_youtube_api_call_sync, api_type, endpoint, params),
+    )
+
+
+# Session state key holding the YouTube tool results of the current request, for the
+# response generator: {"invocation_id": ..., "responses": {function_call_id: result}}
+FETCHED_RESPONSES_KEY = "fetched_youtube_responses"
+FETCH_TOOLS = ("execute_dynamic_youtube_query", "execute_youtube_api_call")
+
+
+def record_fetched_response(tool, args, tool_context, tool_response) -> None:
+    """
+    after_tool_callback of the API executor: keep each YouTube tool result in session
+    state. Results are keyed by call id, so the state deltas of calls made in the same
+    model turn merge instead of overwriting each other; a new request starts over.
+    """
+    if tool.name not in FETCH_TOOLS or not isinstance(tool_response, dict):
+        return None
+    fetched = tool_context.state.get(FETCHED_RESPONSES_KEY) or {}
+    responses = fetched.get("responses", {}) if fetched.get("invocation_id") == tool_context.invocation_id else {}
+    tool_context.state[FETCHED_RESPONSES_KEY] = {
+        "invocation_id": tool_context.invocation_id,
+        "responses": {**responses, tool_context.function_call_id: tool_response},
+    }
+    return None
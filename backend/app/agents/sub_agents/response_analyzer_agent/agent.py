@@ -1,15 +1,17 @@
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 
-from . import prompt
+from ...llm import get_model
+from . import prompt, tools
 
 AGENT_MODEL = "gemini/gemini-2.0-flash"
 
 
 response_generator_agent = Agent(
     name="response_generator_agent",
-    model=LiteLlm(AGENT_MODEL),
+    model=get_model(AGENT_MODEL, cacheable_prefix=prompt.CORE_INSTRUCTION),
     description="Transforms raw YouTube API responses into clear, insightful natural language responses with actionable recommendations.",
-    instruction=prompt.INSTRUCTION,
-    tools=[],  # This agent doesn't need tools - it analyzes data using its LLM capabilities
+    instruction=prompt.build_instruction,  # Assembled per request from the relevant sections
+    tools=[
+        tools.analyze_youtube_data,  # Precomputes totals, averages, growth, trends and top performers
+    ],
 )
\ No newline at end of file
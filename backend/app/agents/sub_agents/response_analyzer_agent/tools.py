@@ -1,22 +1,83 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
-def analyze_youtube_data(api_response: Dict[str, Any]) -> Dict[str, Any]:
+import numpy as np
+from google.adk.tools.tool_context import ToolContext
+
+from ..query_to_apicall_agent.tools import FETCHED_RESPONSES_KEY
+
+# Metrics that are ratios or per-view figures. Summing them across rows is
+# meaningless, so they are averaged (weighted by views when available) instead.
+NON_ADDITIVE_METRICS = {
+    "averageViewDuration",
+    "averageViewPercentage",
+    "averageTimeInPlaylist",
+    "viewerPercentage",
+    "audienceWatchRatio",
+    "relativeRetentionPerformance",
+    "annotationClickThroughRate",
+    "annotationCloseRate",
+    "cardClickRate",
+    "cardTeaserClickRate",
+    "cpm",
+    "playbackBasedCpm",
+}
+
+TIME_DIMENSIONS = ("day", "month", "year")
+ENGAGEMENT_METRICS = ("likes", "comments", "shares")
+TOP_K = 5
+# Relative slope (per period, as a fraction of the mean) below which a trend is "stable"
+TREND_THRESHOLD = 0.01
+
+
+def _fetched_responses(tool_context: ToolContext) -> List[Dict[str, Any]]:
+    """Results of the YouTube tool calls made so far in this request, in order."""
+    fetched = tool_context.state.get(FETCHED_RESPONSES_KEY) or {}
+    if fetched.get("invocation_id") != tool_context.invocation_id:
+        return []
+    return list(fetched.get("responses", {}).values())
+
+
+def analyze_youtube_data(tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Analyze the YouTube data fetched for this request: exact totals, averages, growth,
+    trends, engagement rates, top performers and underperformers. Takes no arguments;
+    it reads the results of the API calls made by the previous agent.
+
+    Returns:
+        The analysis of the fetched response, or {"analyses": [...]} with one analysis
+        per response when several were fetched
+    """
+    responses = _fetched_responses(tool_context)
+    if not responses:
+        return {"error": "No YouTube data was fetched for this request"}
+    analyses = [analyze_api_response(response) for response in responses if "error" not in response]
+    if not analyses:
+        return {"error": "Every YouTube API call of this request failed"}
+    return analyses[0] if len(analyses) == 1 else {"analyses": analyses}
+
+
+def analyze_api_response(api_response: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyze the YouTube API response data and generate insights
-    
+
+    Accepts either the raw API response returned by `execute_dynamic_youtube_query`
+    or a wrapper of the form {"query_understanding", "api_call", "api_response"}.
+
     Args:
         api_response: The response data from the YouTube API call
-    
+
     Returns:
         Dictionary containing analysis results and insights
     """
     # Extract the query understanding and API call info
     query_intent = api_response.get("query_understanding", {}).get("intent", "")
     api_type = api_response.get("api_call", {}).get("api_type", "")
-    
+
     # Get the actual API response data
-    data = api_response.get("api_response", {})
-    
+    data = api_response.get("api_response", api_response)
+    if not api_type:
+        api_type = "analytics" if "columnHeaders" in data else "data"
+
     analysis_result = {
         "original_query": {
             "intent": query_intent,
@@ -27,21 +88,25 @@ def analyze_youtube_data(api_response: Dict[str, Any]) -> Dict[str, Any]:
         "recommendations": [],
         "metadata": {}
     }
-    
+
     # Analyze based on API type
     if api_type == "data":
         if "items" in data:
             analysis_result["summary"] = f"Found {len(data['items'])} items in the response"
             analysis_result["detailed_analysis"] = analyze_data_api_response(data)
     elif api_type == "analytics":
-        analysis_result["summary"] = "Analytics data processed"
+        analysis_result["summary"] = f"Analytics data processed ({len(data.get('rows') or [])} rows)"
         analysis_result["detailed_analysis"] = analyze_analytics_response(data)
-    
+        analysis_result["metadata"] = {
+            "dimensions": _dimension_names(data),
+            "metrics": _metric_names(data),
+        }
+
     # Generate recommendations
     analysis_result["recommendations"] = generate_recommendations(
         analysis_result["detailed_analysis"]
     )
-    
+
     return analysis_result
 
 def analyze_data_api_response(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -51,12 +116,16 @@ def analyze_data_api_response(data: Dict[str, Any]) -> Dict[str, Any]:
         "engagement_metrics": {},
         "metadata_analysis": {}
     }
-    
+
     if "items" in data:
         for item in data["items"]:
             # Add content analysis based on item type (video, channel, playlist)
             process_item_data(item, analysis)
-    
+
+        videos = [item for item in data["items"] if "video" in item.get("kind", "") and "statistics" in item]
+        if len(videos) > 1:
+            analysis["engagement_metrics"] = summarize_video_statistics(videos)
+
     return analysis
 
 def analyze_analytics_response(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -70,16 +139,38 @@ def analyze_analytics_response(data: Dict[str, Any]) -> Dict[str, Any]:
 def generate_recommendations(analysis: Dict[str, Any]) -> list:
     """Generate actionable recommendations based on the analysis"""
     recommendations = []
-    
-    # Add recommendations based on analysis results
-    # This would be expanded based on specific analysis patterns
-    
+
+    growth_patterns = analysis.get("trends", {}).get("growth_patterns", {})
+    for metric, pattern in growth_patterns.items():
+        if pattern.get("trend") == "declining":
+            recommendations.append(
+                f"{metric} is declining ({pattern['slope_pct_per_period']:+.1f}% per period); "
+                "review recent uploads and posting cadence."
+            )
+        elif pattern.get("trend") == "growing":
+            recommendations.append(
+                f"{metric} is growing ({pattern['slope_pct_per_period']:+.1f}% per period); "
+                "keep producing content similar to what drove the increase."
+            )
+
+    improvement = analysis.get("performance_indicators", {}).get("areas_for_improvement", {})
+    if improvement.get("net_subscribers", 0) < 0:
+        recommendations.append(
+            "More subscribers were lost than gained; look at the videos published around the drop."
+        )
+
+    engagement = analysis.get("trends", {}).get("engagement_patterns", {})
+    if engagement.get("engagement_rate") is not None and engagement["engagement_rate"] < 0.02:
+        recommendations.append(
+            "Engagement is below 2% of views; add clearer calls to action for likes and comments."
+        )
+
     return recommendations
 
 def process_item_data(item: Dict[str, Any], analysis: Dict[str, Any]) -> None:
     """Process individual items from the API response"""
     kind = item.get("kind", "")
-    
+
     if "video" in kind:
         process_video_data(item, analysis)
     elif "channel" in kind:
@@ -111,6 +202,31 @@ def process_playlist_data(playlist: Dict[str, Any], analysis: Dict[str, Any]) ->
         "item_count": playlist.get("contentDetails", {}).get("itemCount", 0)
     })
 
+def summarize_video_statistics(videos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate statistics across a list of video resources"""
+    fields = ("viewCount", "likeCount", "commentCount")
+    stats = np.array(
+        [[float(v["statistics"].get(f, 0) or 0) for f in fields] for v in videos]
+    )
+    titles = [v.get("snippet", {}).get("title", v.get("id", "")) for v in videos]
+    views = stats[:, 0]
+    order = np.argsort(-views, kind="stable")[:TOP_K]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(views > 0, (stats[:, 1] + stats[:, 2]) / views, 0.0)
+
+    return {
+        "video_count": len(videos),
+        "total_views": _num(stats[:, 0].sum()),
+        "total_likes": _num(stats[:, 1].sum()),
+        "total_comments": _num(stats[:, 2].sum()),
+        "average_views": _num(views.mean()),
+        "median_views": _num(np.median(views)),
+        "engagement_rate": _num(rates.mean()),
+        "most_viewed": [
+            {"title": titles[i], "views": _num(views[i])} for i in order
+        ],
+    }
+
 def summarize_metrics(data: Dict[str, Any]) -> Dict[str, Any]:
     """Summarize analytics metrics"""
     return {
@@ -133,33 +249,309 @@ def extract_performance_indicators(data: Dict[str, Any]) -> Dict[str, Any]:
         "areas_for_improvement": identify_improvement_areas(data)
     }
 
+# Helpers for the columnHeaders/rows layout of the Analytics API
+def _is_dimension(header: Dict[str, Any], rows: List[List[Any]], index: int) -> bool:
+    if "columnType" in header:
+        return header["columnType"] == "DIMENSION"
+    # Hand-built responses may omit columnType; fall back to the cell type
+    if header.get("dataType"):
+        return header["dataType"] == "STRING"
+    return bool(rows) and isinstance(rows[0][index], str)
+
+def _split_columns(data: Dict[str, Any]) -> Tuple[List[int], List[int]]:
+    headers = data.get("columnHeaders", [])
+    rows = data.get("rows") or []
+    dim_idx, metric_idx = [], []
+    for i, h in enumerate(headers):
+        (dim_idx if _is_dimension(h, rows, i) else metric_idx).append(i)
+    return dim_idx, metric_idx
+
+def _dimension_names(data: Dict[str, Any]) -> List[str]:
+    headers = data.get("columnHeaders", [])
+    return [headers[i]["name"] for i in _split_columns(data)[0]]
+
+def _metric_names(data: Dict[str, Any]) -> List[str]:
+    headers = data.get("columnHeaders", [])
+    return [headers[i]["name"] for i in _split_columns(data)[1]]
+
+def _extract_table(data: Dict[str, Any]) -> Tuple[List[str], List[List[Any]], List[str], np.ndarray]:
+    """
+    Split an analytics response into dimension columns and a float metric matrix.
+
+    Returns:
+        (dimension_names, dimension_values, metric_names, metrics) where
+        dimension_values[i] holds the dimension cells of row i and metrics
+        has shape (rows, metric_count)
+    """
+    headers = data.get("columnHeaders", [])
+    rows = data.get("rows") or []
+    dim_idx, metric_idx = _split_columns(data)
+
+    dims = [headers[i]["name"] for i in dim_idx]
+    metric_names = [headers[i]["name"] for i in metric_idx]
+    dim_values = [[row[i] for i in dim_idx] for row in rows]
+
+    if not rows or not metric_idx:
+        return dims, dim_values, metric_names, np.empty((len(rows), len(metric_idx)))
+
+    metrics = np.array(
+        [[row[i] if row[i] is not None else np.nan for i in metric_idx] for row in rows],
+        dtype=float,
+    )
+    return dims, dim_values, metric_names, metrics
+
+def _time_series(data: Dict[str, Any]) -> Optional[Tuple[str, List[str], List[str], np.ndarray]]:
+    """
+    Return (time_dimension, periods, metric_names, metrics) for a response that
+    is keyed by a single time dimension, with rows sorted chronologically.
+    Multi-dimension responses (e.g. day,country) are aggregated per period.
+    """
+    dims, dim_values, metric_names, metrics = _extract_table(data)
+    time_dim = next((d for d in TIME_DIMENSIONS if d in dims), None)
+    if time_dim is None or metrics.shape[0] == 0:
+        return None
+
+    col = dims.index(time_dim)
+    keys = np.array([str(v[col]) for v in dim_values])
+    periods, inverse = np.unique(keys, return_inverse=True)
+    if len(periods) == len(keys):
+        order = np.argsort(keys)
+        return time_dim, keys[order].tolist(), metric_names, metrics[order]
+
+    # Several rows per period (np.unique returns periods sorted): sum additive metrics,
+    # and average the non-additive ones, weighted by views when the report has them
+    grouped = np.zeros((len(periods), metrics.shape[1]))
+    np.add.at(grouped, inverse, np.nan_to_num(metrics))
+    ratios = [j for j, name in enumerate(metric_names) if name in NON_ADDITIVE_METRICS]
+    if ratios:
+        values = metrics[:, ratios]
+        present = ~np.isnan(values)
+        weights = _weights(metric_names, metrics)
+        row_weights = present * (weights[:, None] if weights is not None else 1.0)
+        weighted, weight_sums, counts = (np.zeros((len(periods), len(ratios))) for _ in range(3))
+        np.add.at(weighted, inverse, np.nan_to_num(values) * row_weights)
+        np.add.at(weight_sums, inverse, row_weights)
+        np.add.at(counts, inverse, present)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # A period whose rows have no views falls back to the plain mean
+            plain = np.where(counts > 0, grouped[:, ratios] / counts, np.nan)
+            grouped[:, ratios] = np.where(weight_sums > 0, weighted / weight_sums, plain)
+    return time_dim, periods.tolist(), metric_names, grouped
+
+def _weights(metric_names: List[str], metrics: np.ndarray) -> Optional[np.ndarray]:
+    """Use views as weights for per-view metrics when the report includes them"""
+    if "views" not in metric_names:
+        return None
+    w = np.nan_to_num(metrics[:, metric_names.index("views")])
+    return w if w.sum() > 0 else None
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    if len(values) < window:
+        return values
+    return np.convolve(values, np.ones(window) / window, mode="valid")
+
+def _num(value: Any) -> Any:
+    """Convert numpy scalars to plain JSON-friendly Python numbers"""
+    value = float(value)
+    if np.isnan(value):
+        return None
+    return int(value) if value.is_integer() else round(value, 4)
+
+def _row_label(dims: List[str], values: List[Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    label = dict(zip(dims, values))
+    video_details = data.get("videoDetails") or {}
+    if "video" in label and label["video"] in video_details:
+        details = video_details[label["video"]]
+        label["title"] = details.get("title")
+        label["embedUrl"] = details.get("embedUrl")
+    return label
+
 # Helper functions for detailed analysis
 def calculate_totals(data: Dict[str, Any]) -> Dict[str, Any]:
     """Calculate total metrics"""
-    return {}  # Implement based on specific metrics
+    _, _, metric_names, metrics = _extract_table(data)
+    if metrics.shape[0] == 0:
+        return {}
+
+    sums = np.nansum(metrics, axis=0)
+    return {
+        name: _num(total)
+        for name, total in zip(metric_names, sums)
+        if name not in NON_ADDITIVE_METRICS
+    }
 
 def calculate_averages(data: Dict[str, Any]) -> Dict[str, Any]:
     """Calculate average metrics"""
-    return {}  # Implement based on specific metrics
+    _, _, metric_names, metrics = _extract_table(data)
+    if metrics.shape[0] == 0:
+        return {}
+
+    means = np.nanmean(metrics, axis=0)
+    averages = {f"{name}_per_row": _num(m) for name, m in zip(metric_names, means)}
+
+    # Per-view metrics are only meaningful when weighted by the views behind them
+    weights = _weights(metric_names, metrics)
+    for j, name in enumerate(metric_names):
+        if name not in NON_ADDITIVE_METRICS:
+            continue
+        column = metrics[:, j]
+        mask = ~np.isnan(column)
+        if weights is not None and weights[mask].sum() > 0:
+            averages[name] = _num(np.average(column[mask], weights=weights[mask]))
+        else:
+            averages[name] = _num(np.nanmean(column))
+    return averages
 
 def calculate_growth(data: Dict[str, Any]) -> Dict[str, Any]:
     """Calculate growth metrics"""
-    return {}  # Implement based on specific metrics
+    series = _time_series(data)
+    if series is None:
+        return {}
+    time_dim, periods, metric_names, metrics = series
+    if len(periods) < 2:
+        return {}
+
+    values = np.nan_to_num(metrics)
+    first, last = values[0], values[-1]
+    prev, curr = values[:-1], values[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        step_pct = np.where(prev != 0, (curr - prev) / prev * 100, np.nan)
+        overall_pct = np.where(first != 0, (last - first) / first * 100, np.nan)
+
+    # Compare the later half of the range with the earlier half
+    half = len(periods) // 2
+    earlier = values[:half].sum(axis=0)
+    later = values[len(periods) - half:].sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half_pct = np.where(earlier != 0, (later - earlier) / earlier * 100, np.nan)
+
+    growth = {}
+    for j, name in enumerate(metric_names):
+        growth[name] = {
+            "first_period": periods[0],
+            "last_period": periods[-1],
+            "first_value": _num(first[j]),
+            "last_value": _num(last[j]),
+            "absolute_change": _num(last[j] - first[j]),
+            "percent_change": _num(overall_pct[j]),
+            "average_period_change_pct": _num(np.nanmean(step_pct[:, j])) if np.any(~np.isnan(step_pct[:, j])) else None,
+            "half_over_half_pct": _num(half_pct[j]),
+        }
+    return {"time_dimension": time_dim, "metrics": growth}
 
 def find_growth_patterns(data: Dict[str, Any]) -> Dict[str, Any]:
     """Find patterns in growth metrics"""
-    return {}  # Implement based on specific patterns
+    series = _time_series(data)
+    if series is None:
+        return {}
+    time_dim, periods, metric_names, metrics = series
+    if len(periods) < 3:
+        return {}
+
+    window = 7 if time_dim == "day" else 3
+    values = np.nan_to_num(metrics)
+    patterns = {}
+    for j, name in enumerate(metric_names):
+        rolling = _rolling_mean(values[:, j], window)
+        x = np.arange(len(rolling))
+        slope = np.polyfit(x, rolling, 1)[0] if len(rolling) > 1 else 0.0
+        mean = rolling.mean()
+        relative = slope / mean if mean else 0.0
+        if relative > TREND_THRESHOLD:
+            trend = "growing"
+        elif relative < -TREND_THRESHOLD:
+            trend = "declining"
+        else:
+            trend = "stable"
+        peak = int(np.argmax(values[:, j]))
+        patterns[name] = {
+            "trend": trend,
+            "slope_per_period": _num(slope),
+            "slope_pct_per_period": float(round(relative * 100, 2)),
+            "rolling_window": window,
+            "rolling_latest": _num(rolling[-1]),
+            "peak_period": periods[peak],
+            "peak_value": _num(values[peak, j]),
+            "volatility": _num(values[:, j].std() / values[:, j].mean()) if values[:, j].mean() else None,
+        }
+    return patterns
 
 def find_engagement_patterns(data: Dict[str, Any]) -> Dict[str, Any]:
     """Find patterns in engagement metrics"""
-    return {}  # Implement based on specific patterns
+    dims, dim_values, metric_names, metrics = _extract_table(data)
+    present = [m for m in ENGAGEMENT_METRICS if m in metric_names]
+    if "views" not in metric_names or not present or metrics.shape[0] == 0:
+        return {}
+
+    views = np.nan_to_num(metrics[:, metric_names.index("views")])
+    interactions = np.nan_to_num(
+        metrics[:, [metric_names.index(m) for m in present]]
+    ).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(views > 0, interactions / views, np.nan)
+
+    patterns = {
+        "engagement_metrics": present,
+        "engagement_rate": _num(interactions.sum() / views.sum()) if views.sum() else None,
+    }
+    if dims and np.any(~np.isnan(rates)):
+        best = int(np.nanargmax(rates))
+        worst = int(np.nanargmin(rates))
+        patterns["most_engaging"] = {**_row_label(dims, dim_values[best], data), "engagement_rate": _num(rates[best])}
+        patterns["least_engaging"] = {**_row_label(dims, dim_values[worst], data), "engagement_rate": _num(rates[worst])}
+    return patterns
 
-def find_top_performers(data: Dict[str, Any]) -> Dict[str, Any]:
+def find_top_performers(data: Dict[str, Any], k: int = TOP_K) -> Dict[str, Any]:
     """Identify top performing content"""
-    return {}  # Implement based on specific criteria
+    dims, dim_values, metric_names, metrics = _extract_table(data)
+    if not dims or metrics.shape[0] == 0:
+        return {}
+    if not metric_names:
+        return {"error": "The report has no metric columns to rank by"}
+
+    primary = "views" if "views" in metric_names else metric_names[0]
+    column = np.nan_to_num(metrics[:, metric_names.index(primary)], nan=-np.inf)
+    k = min(k, len(column))
+    # argpartition selects the top k in O(n); only those k are then sorted
+    top = np.argpartition(-column, k - 1)[:k]
+    top = top[np.argsort(-column[top], kind="stable")]
+    total = np.nansum(metrics[:, metric_names.index(primary)])
+
+    return {
+        "ranked_by": primary,
+        "items": [
+            {
+                **_row_label(dims, dim_values[i], data),
+                **{name: _num(metrics[i, j]) for j, name in enumerate(metric_names)},
+                "share_of_total": _num(column[i] / total) if total else None,
+            }
+            for i in top
+        ],
+    }
 
-def identify_improvement_areas(data: Dict[str, Any]) -> Dict[str, Any]:
+def identify_improvement_areas(data: Dict[str, Any], k: int = TOP_K) -> Dict[str, Any]:
     """Identify areas needing improvement"""
-    return {}  # Implement based on specific criteria
+    dims, dim_values, metric_names, metrics = _extract_table(data)
+    if metrics.shape[0] == 0:
+        return {}
 
+    areas: Dict[str, Any] = {}
+    if "subscribersGained" in metric_names and "subscribersLost" in metric_names:
+        gained = np.nansum(metrics[:, metric_names.index("subscribersGained")])
+        lost = np.nansum(metrics[:, metric_names.index("subscribersLost")])
+        areas["net_subscribers"] = _num(gained - lost)
 
+    if metric_names and dims and not any(d in TIME_DIMENSIONS for d in dims) and metrics.shape[0] > k:
+        primary = "views" if "views" in metric_names else metric_names[0]
+        column = np.nan_to_num(metrics[:, metric_names.index(primary)])
+        median = np.median(column)
+        bottom = np.argsort(column, kind="stable")[:k]
+        areas["underperforming"] = {
+            "ranked_by": primary,
+            "median": _num(median),
+            "items": [
+                {**_row_label(dims, dim_values[i], data), primary: _num(column[i])}
+                for i in bottom if column[i] < median
+            ],
+        }
+    return areas
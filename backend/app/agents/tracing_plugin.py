@@ -0,0 +1,99 @@
+import contextvars
+import json
+import time
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from opentelemetry import trace
+
+from app.utils.metrics import LLM_CALL_DURATION, LLM_TOKENS
+
+# Start of the model call in progress; ADK runs both model callbacks in the same context
+_llm_call_start: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_call_start", default=None)
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str)) if value is not None else 0
+
+
+class TracingPlugin(BasePlugin):
+    """
+    Adds payload sizes and token counts to the spans ADK opens for model and tool calls,
+    and records LLM latency and tokens per agent as metrics.
+
+    ADK runs `after_model_callback` inside its `call_llm` span and the tool callbacks
+    inside `execute_tool <name>`, so the attributes land on those spans.
+    """
+
+    def __init__(self, name: str = "tracing"):
+        super().__init__(name=name)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        # Runs first in the plugin chain; a later plugin answering from cache skips the
+        # after callback, so only real model calls are recorded
+        _llm_call_start.set(time.perf_counter())
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        self._record_metrics(callback_context.agent_name, llm_response)
+        current = trace.get_current_span()
+        if not current.is_recording():
+            return None
+        current.set_attribute("agent.name", callback_context.agent_name)
+        parts = llm_response.content.parts if llm_response.content and llm_response.content.parts else []
+        current.set_attribute("llm.response.chars", sum(len(p.text or "") for p in parts))
+        current.set_attribute("llm.response.function_calls", sum(1 for p in parts if p.function_call))
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            for attribute, value in (
+                ("gen_ai.usage.input_tokens", usage.prompt_token_count),
+                ("gen_ai.usage.output_tokens", usage.candidates_token_count),
+                ("gen_ai.usage.cached_tokens", usage.cached_content_token_count),
+                ("gen_ai.usage.total_tokens", usage.total_token_count),
+            ):
+                if value is not None:
+                    current.set_attribute(attribute, value)
+        return None
+
+    def _record_metrics(self, agent: str, llm_response: LlmResponse) -> None:
+        start = _llm_call_start.get()
+        if start is not None:
+            LLM_CALL_DURATION.labels(agent).observe(time.perf_counter() - start)
+            _llm_call_start.set(None)
+        usage = llm_response.usage_metadata
+        if usage is None:
+            return
+        for kind, value in (
+            ("input", usage.prompt_token_count),
+            ("output", usage.candidates_token_count),
+            ("cached", usage.cached_content_token_count),
+        ):
+            if value:
+                LLM_TOKENS.labels(agent, kind).inc(value)
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext
+    ) -> Optional[dict]:
+        current = trace.get_current_span()
+        if current.is_recording():
+            current.set_attribute("tool.args.size", _size(tool_args))
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: Dict[str, Any], tool_context: ToolContext, result: dict
+    ) -> Optional[dict]:
+        current = trace.get_current_span()
+        if current.is_recording():
+            current.set_attribute("tool.response.size", _size(result))
+            if isinstance(result, dict) and "error" in result:
+                current.set_attribute("tool.error", str(result["error"])[:200])
+        return None
@@ -1,28 +1,162 @@
-from app.database.core import DbSession
 from fastapi import HTTPException
 from google.adk.agents import LlmAgent
 # from routes.auth.service import CurrentUser
 from app.utils.logger import get_service_logger
-from uuid import UUID
-from .agent_runner import call_agent_async, get_or_create_session, get_runner
+from app.utils.tracing import span
+from typing import List, Optional, Sequence
+from uuid import UUID, uuid4
+import asyncio
+import os
+from . import DEFAULT_CONVERSATION_ID
+from .agent_runner import call_agent_async, get_or_create_session, get_runner, get_session_service
+from .batch_fetch import FetchBatch
+from .fixtures import record_case
+from .prefetch import PREFETCH_ENABLED, RequestDataCache, choose_prefetches
+from .relevance import NOTE_STATE_KEY, check_relevance
+from .session_compaction import compact_session
+from .session_locks import session_locks
+from .sub_agents.query_to_apicall_agent.tools import run_dynamic_query
 
 # Setup centralized logging
 logger = get_service_logger("agents_utils")
 
 
+APP_NAME = "test_app"
+# Questions of one batch request that run at once; the rest wait for a free slot
+AGENT_BATCH_PARALLELISM = int(os.getenv("AGENT_BATCH_PARALLELISM", "4"))
+
+
+async def _previous_user_message(user_id: str, session_id: str) -> Optional[str]:
+    """The user's last message in a conversation, if it has any history."""
+    session = await get_session_service().get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+    for event in reversed(session.events if session else []):
+        if event.author == "user" and event.content and event.content.parts:
+            text = " ".join(part.text for part in event.content.parts if part.text)
+            if text:
+                return text
+    return None
+
+
 async def handle_agent_request(
-    db: DbSession,query: str, agent: LlmAgent
+    query: str,
+    agent: LlmAgent,
+    user_id: str,
+    conversation_id: str = DEFAULT_CONVERSATION_ID,
+    verbose: bool = False,
 ) -> str:
-    APP_NAME = "test_app"
     initial_state = {"user:preferences": {"language": "English"}}
-    user_id = '9b9b9a78-6dab-488b-b51b-e8a4ec063fd4'
     if not user_id:
         logger.warning("Unauthorized agent request attempt")
         raise HTTPException(status_code=401, detail="Unauthorized")
-    logger.info(f"Processing agent request for user {user_id}")
-    session_id = "session_001"  # Using a fixed ID for simplicity
-    await get_or_create_session(APP_NAME, str(user_id), session_id, initial_state)
-    runner = get_runner(APP_NAME, agent)
-    response = await call_agent_async(query, runner, str(user_id), session_id)
-    logger.info(f"Agent request processed for user {user_id}")
+    logger.info("Processing agent request for user %s, conversation %s", user_id, conversation_id)
+    # Each conversation of each user has its own ADK session
+    session_id = conversation_id
+    # Clearly off-topic or malformed questions are answered without any LLM call
+    verdict = await check_relevance(query)
+    with span(
+        "agent.request", **{"agent.name": agent.name, "session.id": session_id, "query.chars": len(query)}
+    ) as request_span, record_case(query) as fixture_case, RequestDataCache(run_dynamic_query) as data_cache:
+        # Start likely data fetches now so they overlap with planning
+        if PREFETCH_ENABLED and verdict.answer is None:
+            data_cache.start(choose_prefetches(query))
+        # Turns within one session run one at a time; other sessions proceed in parallel
+        async with session_locks.hold((APP_NAME, str(user_id), session_id)):
+            if verdict.label != "on_topic":
+                # Follow-ups ("and for shares?", "thanks!") only make sense with the previous turn
+                previous = await _previous_user_message(str(user_id), session_id)
+                if previous:
+                    verdict = await check_relevance(query, previous)
+            if verdict.answer is not None:
+                response = verdict.answer
+            else:
+                await get_or_create_session(APP_NAME, str(user_id), session_id, initial_state)
+                runner = get_runner(APP_NAME, agent)
+                # Always set the note so a hint from an earlier turn doesn't stick to this one
+                response = await call_agent_async(
+                    query,
+                    runner,
+                    str(user_id),
+                    session_id,
+                    state_delta={NOTE_STATE_KEY: verdict.note},
+                    verbose=verbose,
+                )
+                try:
+                    with span("session.compact"):
+                        await compact_session(get_session_service(), APP_NAME, str(user_id), session_id)
+                except Exception as e:
+                    # Compaction is an optimization; never fail the request because of it
+                    logger.warning("Session compaction failed for %s: %s", session_id, e)
+        request_span.set_attribute("relevance", verdict.label)
+        request_span.set_attribute("response.chars", len(response))
+        if fixture_case is not None:
+            fixture_case.response = response
+    logger.info("Agent request processed for user %s", user_id)
     return response
+
+
+async def handle_batch_agent_request(
+    questions: Sequence[str],
+    agent: LlmAgent,
+    user_id: str,
+    relevance_notes: Sequence[str] = (),
+    verbose: bool = False,
+) -> List[str]:
+    """
+    Answer several independent questions at once.
+
+    Up to AGENT_BATCH_PARALLELISM questions run concurrently in throwaway sessions and
+    share one FetchBatch, so their YouTube data requests are deduplicated and merged
+    before they go upstream. A question only joins the batch once it gets a slot, so
+    the ones still waiting don't hold up the others' data requests; they reuse the
+    results fetched before them.
+    """
+    if not user_id:
+        logger.warning("Unauthorized agent request attempt")
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    batch_id = uuid4().hex
+    batch = FetchBatch(run_dynamic_query)
+    runner = get_runner(APP_NAME, agent)
+    notes = list(relevance_notes) or [""] * len(questions)
+    limit = asyncio.Semaphore(AGENT_BATCH_PARALLELISM)
+    logger.info("Processing batch %s of %s questions for user %s", batch_id, len(questions), user_id)
+
+    async def answer(index: int, question: str) -> str:
+        session_id = f"batch-{batch_id}-{index}"
+        async with limit:
+            with batch.participant():
+                await get_or_create_session(APP_NAME, str(user_id), session_id, {})
+                try:
+                    return await call_agent_async(
+                        question,
+                        runner,
+                        str(user_id),
+                        session_id,
+                        state_delta={NOTE_STATE_KEY: notes[index]},
+                        verbose=verbose,
+                    )
+                finally:
+                    await get_session_service().delete_session(
+                        app_name=APP_NAME, user_id=str(user_id), session_id=session_id
+                    )
+
+    with span("agent.batch_request", **{"agent.name": agent.name, "batch.questions": len(questions)}) as batch_span:
+        results = await asyncio.gather(
+            *(answer(i, q) for i, q in enumerate(questions)), return_exceptions=True
+        )
+        batch_span.set_attribute("batch.data_requests", batch.requests)
+        batch_span.set_attribute("batch.upstream_calls", batch.upstream_calls)
+
+    answers = []
+    for question, result in zip(questions, results):
+        if isinstance(result, Exception):
+            logger.error("Batch %s question failed: %s", batch_id, result)
+            answers.append(f"Sorry, this question could not be answered: {str(result)}")
+        else:
+            answers.append(result)
+    logger.info(
+        "Batch %s done: %s data requests served by %s upstream calls",
+        batch_id,
+        batch.requests,
+        batch.upstream_calls,
+    )
+    return answers
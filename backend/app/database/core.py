@@ -1,10 +1,13 @@
 import os
-from typing import Annotated
+from typing import Annotated, List, Optional
 
 from fastapi import Depends
-from sqlalchemy import create_engine
+from sqlalchemy import Table, create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
-from sqlalchemy.pool import QueuePool
+
+from .instrumentation import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
@@ -13,13 +16,38 @@ if not DATABASE_URL:
 # Configure engine with connection pooling
 engine = create_engine(
     DATABASE_URL,
-    poolclass=QueuePool,
+    poolclass=InstrumentedQueuePool,
     pool_size=10,
     max_overflow=20,
     pool_timeout=30,
     pool_recycle=1800,
     pool_pre_ping=True,
+    pool_logging_name="sync",
+)
+instrument_engine(engine, "sync")
+
+
+def async_database_url(url: str) -> URL:
+    """The DATABASE_URL with its Postgres driver switched to psycopg 3, which has an async mode."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        return parsed.set(drivername="postgresql+psycopg")
+    return parsed
+
+
+# Async engine for code running on the event loop; it has its own pool so blocking
+# sessions held by sync endpoints can't starve it
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "10")),
+    pool_timeout=float(os.getenv("DB_ASYNC_POOL_TIMEOUT", "10")),
+    pool_recycle=int(os.getenv("DB_ASYNC_POOL_RECYCLE", "1800")),
+    pool_pre_ping=True,
+    pool_logging_name="async",
 )
+instrument_engine(async_engine.sync_engine, "async")
 
 # Create session factory with proper configuration
 SessionLocal = sessionmaker(
@@ -29,9 +57,25 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,  # Prevent detached instance errors
 )
 
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
+async def create_tables(tables: Optional[List[Table]] = None) -> None:
+    """
+    Create the missing tables among `tables`, or of every model defined so far. Models
+    register with Base when their module is imported; each component creates its own
+    tables when it starts.
+    """
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -42,3 +86,12 @@ def get_db():
 
 
 DbSession = Annotated[Session, Depends(get_db)]
+
+
+# Dependency to get an async DB session; use it in async endpoints and for all new persistence
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+AsyncDbSession = Annotated[AsyncSession, Depends(get_async_db)]
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("db_pool")
+
+# Checkouts that wait longer than this for a free connection are logged
+SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+
+
+class PoolStats:
+    """Counters and timings of one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.slow_checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.held_seconds_total = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            slow = seconds * 1000 >= SLOW_CHECKOUT_MS
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning("Pool %s: waited %.0f ms for a connection", self.name, seconds * 1000)
+
+    def snapshot(self, pool: Any = None) -> Dict[str, Any]:
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "slow_checkouts": self.slow_checkouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "held_seconds_total": round(self.held_seconds_total, 6),
+            }
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+            )
+        return data
+
+
+# Pool logging name -> stats; the name survives pool recreation on dispose()
+_pool_stats: Dict[str, PoolStats] = {}
+_instrumented_engines: Dict[str, Engine] = {}
+
+
+class _TimedCheckout:
+    """Measures how long each checkout waits for a free connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            stats = _pool_stats.get(self._orig_logging_name)
+            if stats is not None:
+                stats.observe_wait(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolStats:
+    """
+    Count connects, checkouts, checkins and invalidations on an engine's pool and
+    how long connections are held. Pass the sync engine of an AsyncEngine. The pool
+    must be created with `pool_logging_name=name` for checkout waits to be timed.
+    """
+    stats = _pool_stats.setdefault(name, PoolStats(name))
+    _instrumented_engines[name] = engine
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        with stats._lock:
+            stats.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with stats._lock:
+            stats.checkouts += 1
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        with stats._lock:
+            stats.checkins += 1
+            if checked_out_at is not None:
+                stats.held_seconds_total += time.perf_counter() - checked_out_at
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with stats._lock:
+            stats.invalidations += 1
+
+    return stats
+
+
+def pool_stats_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Current stats of every instrumented pool, keyed by pool name."""
+    return {
+        name: stats.snapshot(_instrumented_engines[name].pool)
+        for name, stats in _pool_stats.items()
+    }
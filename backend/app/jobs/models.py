@@ -0,0 +1,45 @@
+from uuid import uuid4
+
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, String, Text, func
+
+from app.database.core import Base
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class Job(Base):
+    """A background job; its result rows are stored in job_chunks."""
+
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True, default=lambda: uuid4().hex)
+    kind = Column(String(32), nullable=False)
+    user_id = Column(String(128), index=True)
+    params = Column(JSON, nullable=False)
+    status = Column(String(16), nullable=False, default="queued", index=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    message = Column(Text)
+    # Where a resumed run picks up, e.g. {"next_chunk": 3, "start_index": 2001, "pages": 40, "chunks": 12}
+    checkpoint = Column(JSON)
+    column_headers = Column(JSON)
+    row_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(128))
+    # A queued job is not claimed before this time (backoff after a failed attempt)
+    not_before = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+
+class JobChunk(Base):
+    """One stored slice of a job's result rows, in order of `index`."""
+
+    __tablename__ = "job_chunks"
+
+    job_id = Column(String(32), ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    index = Column(Integer, primary_key=True)
+    rows = Column(JSON, nullable=False)
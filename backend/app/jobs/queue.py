@@ -0,0 +1,288 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import or_, select, update
+
+from app.database.core import AsyncSessionLocal, create_tables
+from app.utils.logger import get_service_logger
+
+from .models import Job, JobChunk
+
+logger = get_service_logger("job_queue")
+
+# Jobs run at once in this process; 0 disables the workers (API-only replicas)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# How often idle workers look for jobs submitted by other processes
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "5"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+# A running job whose heartbeat is older than this is requeued (its worker died)
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# A failed job waits this long before its next attempt, doubling with every attempt
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30"))
+JOB_RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_MAX_SECONDS", "900"))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), JOB_RETRY_BACKOFF_MAX_SECONDS))
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job was cancelled or taken over by another worker."""
+
+
+class JobContext:
+    """What a handler sees of its job: parameters, checkpoint, and a way to store progress."""
+
+    def __init__(self, queue: "JobQueue", job: Job):
+        self.job_id = job.id
+        self.kind = job.kind
+        self.params: Dict[str, Any] = job.params
+        self.checkpoint: Dict[str, Any] = dict(job.checkpoint or {})
+        self.row_count = job.row_count
+        self._queue = queue
+
+    async def save_chunk(
+        self,
+        index: int,
+        rows: List[Any],
+        column_headers: Optional[List[Dict[str, Any]]],
+        checkpoint: Dict[str, Any],
+        progress: float,
+        message: str,
+    ) -> None:
+        """
+        Store a slice of result rows together with the checkpoint to resume after it,
+        in one transaction. Raises JobCancelled if the job is no longer ours to run.
+        """
+        async with AsyncSessionLocal() as session, session.begin():
+            values = dict(
+                checkpoint=checkpoint,
+                row_count=Job.row_count + len(rows),
+                progress=progress,
+                message=message,
+                heartbeat_at=_now(),
+            )
+            if column_headers is not None:
+                values["column_headers"] = column_headers
+            result = await session.execute(
+                update(Job)
+                .where(Job.id == self.job_id, Job.status == "running", Job.worker_id == self._queue.worker_id)
+                .values(**values)
+            )
+            if result.rowcount == 0:
+                raise JobCancelled(self.job_id)
+            session.add(JobChunk(job_id=self.job_id, index=index, rows=rows))
+        self.checkpoint = checkpoint
+        self.row_count += len(rows)
+
+
+JobHandler = Callable[[JobContext], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    In-process worker pool for jobs stored in Postgres.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of processes
+    can run workers against the same table. Running jobs send heartbeats; jobs whose
+    worker died are requeued and resume from their last checkpoint; failed jobs are
+    retried from their checkpoint after an exponential backoff. Handlers store results
+    and checkpoints through JobContext.save_chunk.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self) -> List[str]:
+        return list(self._handlers)
+
+    async def start(self) -> None:
+        """
+        Create the job tables and start the workers, in the background: app startup
+        doesn't wait for (or need) the database.
+        """
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._start())]
+
+    async def _start(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                await create_tables([Job.__table__, JobChunk.__table__])
+                break
+            except Exception as e:
+                logger.warning("Could not set up the job tables, retrying in %.0fs: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, JOB_STALE_SECONDS)
+        if self.workers <= 0:
+            return
+        await self._requeue_stale()
+        self._tasks.extend(asyncio.create_task(self._worker(n)) for n in range(self.workers))
+        logger.info("Job queue started with %s workers as %s", self.workers, self.worker_id)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Hand unfinished jobs back so the next process resumes them from their checkpoint
+        try:
+            async with AsyncSessionLocal() as session, session.begin():
+                await session.execute(
+                    update(Job)
+                    .where(Job.status == "running", Job.worker_id == self.worker_id)
+                    .values(status="queued", worker_id=None, attempts=Job.attempts - 1)
+                )
+        except Exception as e:
+            logger.warning("Could not hand running jobs back: %s", e)
+
+    async def submit(self, kind: str, params: Dict[str, Any], user_id: Optional[str] = None) -> Job:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        async with AsyncSessionLocal() as session, session.begin():
+            job = Job(kind=kind, params=params, user_id=user_id, status="queued", progress=0.0, row_count=0, attempts=0)
+            session.add(job)
+        self._wakeup.set()
+        logger.info("Job %s (%s) submitted", job.id, kind)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        async with AsyncSessionLocal() as session:
+            return await session.get(Job, job_id)
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; a running handler stops at its next checkpoint."""
+        async with AsyncSessionLocal() as session, session.begin():
+            result = await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status.in_(("queued", "running")))
+                .values(status="cancelled", finished_at=_now())
+            )
+        return result.rowcount > 0
+
+    async def _requeue_stale(self) -> None:
+        stale_before = _now() - timedelta(seconds=JOB_STALE_SECONDS)
+        async with AsyncSessionLocal() as session, session.begin():
+            stale = Job.status == "running", Job.heartbeat_at < stale_before
+            failed = await session.execute(
+                update(Job)
+                .where(*stale, Job.attempts >= JOB_MAX_ATTEMPTS)
+                .values(status="failed", error="Worker stopped too many times", finished_at=_now())
+            )
+            requeued = await session.execute(update(Job).where(*stale).values(status="queued", worker_id=None))
+        if failed.rowcount or requeued.rowcount:
+            logger.warning("Requeued %s stale jobs, failed %s", requeued.rowcount, failed.rowcount)
+
+    async def _claim(self) -> Optional[Job]:
+        async with AsyncSessionLocal() as session, session.begin():
+            now = _now()
+            next_job = (
+                select(Job.id)
+                .where(
+                    Job.status == "queued",
+                    Job.kind.in_(self.kinds),
+                    or_(Job.not_before.is_(None), Job.not_before <= now),
+                )
+                .order_by(Job.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            result = await session.execute(
+                update(Job)
+                .where(Job.id == next_job)
+                .values(
+                    status="running",
+                    worker_id=self.worker_id,
+                    attempts=Job.attempts + 1,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+                .returning(Job)
+            )
+            return result.scalars().first()
+
+    async def _worker(self, number: int) -> None:
+        polls = 0
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error("Job worker %s could not claim a job: %s", number, e)
+                job = None
+            if job is None:
+                polls += 1
+                if polls * JOB_POLL_SECONDS >= JOB_STALE_SECONDS:
+                    polls = 0
+                    await self._requeue_stale()
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        context = JobContext(self, job)
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        logger.info("Job %s (%s) started, attempt %s", job.id, job.kind, job.attempts)
+        try:
+            await self._handlers[job.kind](context)
+        except JobCancelled:
+            logger.info("Job %s stopped: cancelled or taken over", job.id)
+            return
+        except Exception as e:
+            logger.error("Job %s failed (attempt %s): %s", job.id, job.attempts, e)
+            if job.attempts < JOB_MAX_ATTEMPTS:
+                await self._finish(job.id, status="queued", error=str(e), not_before=_now() + _retry_delay(job.attempts))
+            else:
+                await self._finish(job.id, status="failed", error=str(e))
+            return
+        finally:
+            heartbeat.cancel()
+        await self._finish(job.id, status="succeeded", progress=1.0)
+        logger.info("Job %s succeeded: %s rows", job.id, context.row_count)
+
+    async def _finish(self, job_id: str, status: str, **values: Any) -> None:
+        if status != "queued":
+            values["finished_at"] = _now()
+        async with AsyncSessionLocal() as session, session.begin():
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "running", Job.worker_id == self.worker_id)
+                .values(status=status, worker_id=None if status == "queued" else self.worker_id, **values)
+            )
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                async with AsyncSessionLocal() as session, session.begin():
+                    await session.execute(
+                        update(Job)
+                        .where(Job.id == job_id, Job.worker_id == self.worker_id)
+                        .values(heartbeat_at=_now())
+                    )
+            except Exception as e:
+                logger.warning("Heartbeat for job %s failed: %s", job_id, e)
+
+
+job_queue = JobQueue()
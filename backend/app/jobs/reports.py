@@ -0,0 +1,97 @@
+import asyncio
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+from app.services.report_export import EXPORT_PAGE_SIZE, date_partitions, fetch_report_page
+from app.services.youtube_service import YT_SCOPE, YTA_SCOPE, get_youtube_service
+
+from .queue import JobContext, job_queue
+
+# Date range a backfill job pages through per step
+BACKFILL_CHUNK_DAYS = int(os.getenv("JOB_BACKFILL_CHUNK_DAYS", "30"))
+
+
+def plan_chunks(kind: str, params: Dict[str, Any]) -> List[Tuple[date, date]]:
+    """
+    Date ranges a job fetches one after another, each page by page. Reports use the
+    export partitioning (daily reports by month, others in one range); backfills always
+    step through the range in fixed windows.
+    """
+    start_date = date.fromisoformat(params["start_date"])
+    end_date = date.fromisoformat(params["end_date"])
+    if kind != "backfill":
+        return date_partitions(start_date, end_date, params.get("dimensions"), params.get("sort"))
+    step = params.get("chunk_days") or BACKFILL_CHUNK_DAYS
+    chunks = []
+    current = start_date
+    while current <= end_date:
+        last = min(current + timedelta(days=step - 1), end_date)
+        chunks.append((current, last))
+        current = last + timedelta(days=1)
+    return chunks
+
+
+async def run_report_job(context: JobContext) -> None:
+    """
+    Fetch a report or backfill page by page, storing each page as a chunk together
+    with a checkpoint (date range and startIndex), so a retried or resumed job picks up
+    at the page it had not stored yet, even within a report that has no day dimension.
+    """
+    params = context.params
+    chunks = plan_chunks(context.kind, params)
+    checkpoint = context.checkpoint
+    range_index = checkpoint.get("next_chunk", 0)
+    start_index = checkpoint.get("start_index", 1)
+    # Checkpoints from before page-level chunks stored one chunk per date range
+    page_index = checkpoint.get("pages", range_index)
+    if range_index >= len(chunks):
+        return
+
+    service = await asyncio.to_thread(get_youtube_service, [YT_SCOPE, YTA_SCOPE])
+    while range_index < len(chunks):
+        size = EXPORT_PAGE_SIZE
+        if params.get("max_results"):
+            remaining = params["max_results"] - context.row_count
+            if remaining <= 0:
+                break
+            size = min(size, remaining)
+        range_start, range_end = chunks[range_index]
+        page = await asyncio.to_thread(
+            fetch_report_page,
+            service.analytics,
+            range_start,
+            range_end,
+            params["metrics"],
+            params.get("dimensions"),
+            params.get("filters"),
+            params.get("sort"),
+            start_index,
+            size,
+            params.get("ids") or "channel==MINE",
+        )
+        rows = page.get("rows") or []
+        message = f"Fetched {len(rows)} rows of {range_start.isoformat()} to {range_end.isoformat()}"
+        if len(rows) < size:
+            # A short page ends the date range
+            range_index, start_index = range_index + 1, 1
+        else:
+            start_index += len(rows)
+        await context.save_chunk(
+            page_index,
+            rows,
+            page.get("columnHeaders") if page_index == 0 else None,
+            checkpoint={
+                "next_chunk": range_index,
+                "start_index": start_index,
+                "pages": page_index + 1,
+                "chunks": len(chunks),
+            },
+            progress=range_index / len(chunks),
+            message=message,
+        )
+        page_index += 1
+
+
+job_queue.register("report", run_report_job)
+job_queue.register("backfill", run_report_job)
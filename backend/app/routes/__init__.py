@@ -3,8 +3,12 @@ from fastapi import FastAPI
 from . import analytics
 from .auth.controller import router as auth_router
 from .agents.controller import router as agent_router
+from .jobs.controller import router as jobs_router
+from .profiles import router as profiles_router
 
 def register_routes(app: FastAPI):
     app.include_router(auth_router)
     app.include_router(analytics.router)
-    app.include_router(agent_router)
\ No newline at end of file
+    app.include_router(agent_router)
+    app.include_router(jobs_router)
+    app.include_router(profiles_router)
\ No newline at end of file
@@ -1,32 +1,28 @@
-from typing import Any, Dict, List
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Query, Request, status
 from fastapi.responses import JSONResponse
 
 from app.utils.logger import get_controller_logger
+from app.utils.responses import CompressedRoute, FastJSONResponse
 
-from app.database.core import DbSession
+# Only the light part of the agents package: the agents themselves load ADK and LiteLLM,
+# so they are imported by the handlers (and preloaded in the background at startup)
+from app.agents import DEFAULT_CONVERSATION_ID
 
-from app.agents.main_agent import coordinator_agent
-from app.agents.sub_agents.query_to_apicall_agent.agent import api_executor_agent
-from app.agents.sub_agents.response_analyzer_agent.agent import response_generator_agent
-from app.agents.utils import handle_agent_request
+from .models import BatchAnswer, BatchQueryRequest, BatchQueryResponse
 
 
 logger = get_controller_logger("agents")
-router = APIRouter(prefix="/agents", tags=["agents"])
+router = APIRouter(prefix="/agents", tags=["agents"], route_class=CompressedRoute)
 
-AGENTS = {
-    "coordinator": coordinator_agent,
-    "api_executor": api_executor_agent,
-    "response_generator": response_generator_agent
-}
+AGENTS = ["coordinator", "api_executor", "response_generator"]
 
 @router.get("/list", response_model=List[str])
 def list_agents() -> List[str]:
     """
     List all available agents in the system.
     """
-    return list(AGENTS.keys())
+    return list(AGENTS)
 
 # @router.get("/get/{agent_name}")
 # def get_agent(agent_name: str) -> Any:
@@ -36,17 +32,86 @@ def list_agents() -> List[str]:
 #     return AGENTS.get(agent_name)
 
 @router.post("/general-query")
-async def handle_general_query(db:DbSession,query: str):
+async def handle_general_query(
+    query: str,
+    conversation_id: str = Query(
+        DEFAULT_CONVERSATION_ID,
+        description="Client-generated conversation ID; each conversation has its own agent session",
+        min_length=1,
+        max_length=128,
+        pattern=r"^[A-Za-z0-9_-]+$",
+    ),
+    verbose: bool = Query(False, description="Log every agent event of this request in full"),
+    user_id: Optional[str] = Cookie(None),
+):
     """
     Handle a general YouTube-related query using the coordinator agent.
     """
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    from app.agents.main_agent import coordinator_agent
+    from app.agents.utils import handle_agent_request
+
+    # Off-topic and malformed questions are answered there without any LLM call
     try:
-        response = await handle_agent_request(db,query, coordinator_agent)
-        return response
+        response = await handle_agent_request(
+            query,
+            coordinator_agent,
+            user_id,
+            conversation_id,
+            verbose=verbose,
+        )
+        return FastJSONResponse(response)
     except Exception as e:
         raise
 
 
+@router.post("/batch-query", response_model=BatchQueryResponse)
+async def handle_batch_query(
+    payload: BatchQueryRequest,
+    verbose: bool = Query(False, description="Log every agent event of this request in full"),
+    user_id: Optional[str] = Cookie(None),
+):
+    """
+    Answer several related questions in one request.
+
+    The questions are planned together, and the YouTube data they need is fetched once
+    per distinct need instead of once per question.
+    """
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    from app.agents.main_agent import coordinator_agent
+    from app.agents.relevance import check_relevance
+    from app.agents.utils import handle_batch_agent_request
+
+    answers: List[Optional[str]] = []
+    pending_questions, pending_notes, pending_index = [], [], []
+    for question in payload.questions:
+        verdict = await check_relevance(question)
+        answers.append(verdict.answer)
+        if verdict.answer is None:
+            pending_index.append(len(answers) - 1)
+            pending_questions.append(question)
+            pending_notes.append(verdict.note)
+
+    if pending_questions:
+        results = await handle_batch_agent_request(
+            pending_questions, coordinator_agent, user_id, pending_notes, verbose=verbose
+        )
+        for index, result in zip(pending_index, results):
+            answers[index] = result
+
+    # Already valid: skip FastAPI's second validation pass over the response model
+    return FastJSONResponse(BatchQueryResponse(
+        answers=[BatchAnswer(question=q, answer=a) for q, a in zip(payload.questions, answers)]
+    ).model_dump())
+
 # async def handle_youtube_query(user_query: str) -> Dict[str, Any]:
 #     """
 #     Handle a YouTube query using the query-to-apicall agent and response analyzer agent.
@@ -0,0 +1,19 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BatchQueryRequest(BaseModel):
+    """Model for a batch of independent questions"""
+    questions: List[str] = Field(..., min_length=1, max_length=50)
+
+
+class BatchAnswer(BaseModel):
+    """Model for the answer to one question of a batch"""
+    question: str
+    answer: str
+
+
+class BatchQueryResponse(BaseModel):
+    """Model for batch query response"""
+    answers: List[BatchAnswer]
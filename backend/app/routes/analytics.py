@@ -1,17 +1,43 @@
+import asyncio
+import itertools
 import os
 from datetime import date, timedelta
-from typing import Dict, Optional
+from typing import Any, Dict, List, Literal, Optional
 
+import httplib2
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from fastapi import HTTPException, APIRouter, Query
+from pydantic import BaseModel, Field, model_validator
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-router = APIRouter(prefix="/analytics", tags=["analytics"])
+from app.services.report_export import EXPORT_FORMATS, arrow_available, iter_report_pages, stream_export
+from app.utils.logger import get_controller_logger
+from app.utils.responses import CompressedRoute, FastJSONResponse
+from app.utils.tracing import TracedHttpRequest, refresh_credentials
+
+# Reports can be large: responses are serialized with orjson and compressed when the client accepts it
+router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=CompressedRoute)
+logger = get_controller_logger("analytics")
 
 YTA_SCOPE = "https://www.googleapis.com/auth/yt-analytics.readonly"
 YT_SCOPE = "https://www.googleapis.com/auth/youtube.readonly"
 
+# report_type -> (metrics, dimensions)
+PREDEFINED_REPORTS = {
+    "overview": ("views,likes,comments,shares,subscribersGained,subscribersLost", "day"),
+    "demographics": ("viewerPercentage", "ageGroup,gender"),
+    "traffic_sources": ("views", "insightTrafficSourceType"),
+}
+
+# Most report specs a bulk request may carry, and how many of them run at once
+BULK_MAX_SPECS = int(os.getenv("ANALYTICS_BULK_MAX_SPECS", "20"))
+BULK_PARALLELISM = int(os.getenv("ANALYTICS_BULK_PARALLELISM", "6"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("YOUTUBE_HTTP_TIMEOUT_SECONDS", "20"))
+
 def _load_credentials() -> Credentials:
     client_id = os.getenv("YT_CLIENT_ID")
     client_secret = os.getenv("YT_CLIENT_SECRET")
@@ -35,15 +61,17 @@ def _load_credentials() -> Credentials:
     # Ensure we have a valid access token
     request = Request()
     try:
-        creds.refresh(request)
+        refresh_credentials(creds, request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to refresh YouTube token: {e}")
 
     return creds
 
 def _build_services(creds: Credentials):
-    yta = build("youtubeAnalytics", "v2", credentials=creds, cache_discovery=False)
-    yt = build("youtube", "v3", credentials=creds, cache_discovery=False)
+    yta = build(
+        "youtubeAnalytics", "v2", credentials=creds, cache_discovery=False, requestBuilder=TracedHttpRequest
+    )
+    yt = build("youtube", "v3", credentials=creds, cache_discovery=False, requestBuilder=TracedHttpRequest)
     return yta, yt
 
 def query_yt_analytics(
@@ -97,7 +125,7 @@ async def get_channel_info():
     """
     Get basic channel information and statistics.
     """
-    return get_channel_basic_info()
+    return FastJSONResponse(await run_in_threadpool(get_channel_basic_info))
 
 
 @router.get("/reports")
@@ -117,7 +145,8 @@ async def get_analytics_report(
     Common metrics: views, likes, comments, shares, subscribersGained, subscribersLost, averageViewDuration, etc.
     Common dimensions: day, month, country, video, etc.
     """
-    return query_yt_analytics(
+    return FastJSONResponse(await run_in_threadpool(
+        query_yt_analytics,
         start_date=start_date,
         end_date=end_date,
         metrics=metrics,
@@ -126,12 +155,66 @@ async def get_analytics_report(
         sort=sort,
         max_results=max_results,
         ids=ids
+    ))
+
+
+@router.get("/reports/export")
+async def export_analytics_report(
+    start_date: date = Query(..., description="Start date for analytics (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="End date for analytics (YYYY-MM-DD)"),
+    metrics: str = Query(..., description="Comma-separated list of metrics (e.g., views,likes,comments)"),
+    dimensions: Optional[str] = Query(None, description="Comma-separated list of dimensions"),
+    filters: Optional[str] = Query(None, description="Filters to apply to the query"),
+    sort: Optional[str] = Query(None, description="Sorting options"),
+    max_results: Optional[int] = Query(None, description="Maximum number of rows to export (default: all)", ge=1),
+    ids: str = Query("channel==MINE", description="Channel or content owner ID"),
+    format: str = Query("csv", description="Export format", enum=list(EXPORT_FORMATS)),
+):
+    """
+    Stream an analytics report as CSV, NDJSON or an Arrow IPC stream.
+
+    Takes the same parameters as /analytics/reports. Rows are fetched page by page
+    (daily reports also in date partitions) and each page is written out as soon as it
+    arrives, so memory use doesn't grow with the size of the report.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow export requires pyarrow to be installed")
+
+    creds = await run_in_threadpool(_load_credentials)
+    yta, _ = await run_in_threadpool(_build_services, creds)
+    pages = iter_report_pages(
+        yta,
+        start_date=start_date,
+        end_date=end_date,
+        metrics=metrics,
+        dimensions=dimensions,
+        filters=filters,
+        sort=sort,
+        max_results=max_results,
+        ids=ids,
+    )
+    # Fetch the first page up front so upstream errors still get a proper status code
+    try:
+        first_page = await run_in_threadpool(next, pages, None)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"YouTube Analytics API error: {e}")
+    if first_page is None:
+        raise HTTPException(status_code=502, detail="YouTube Analytics API returned no data")
+
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"youtube-analytics-{start_date.isoformat()}-{end_date.isoformat()}.{extension}"
+    return StreamingResponse(
+        stream_export(itertools.chain([first_page], pages), format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
 @router.get("/reports/predefined")
 async def get_predefined_reports(
-    report_type: str = Query(..., description="Type of predefined report", enum=["overview", "demographics", "traffic_sources"]),
+    report_type: str = Query(..., description="Type of predefined report", enum=list(PREDEFINED_REPORTS)),
     days: int = Query(30, description="Number of days to look back", ge=1, le=365)
 ):
     """
@@ -145,22 +228,101 @@ async def get_predefined_reports(
     end_date = date.today()
     start_date = end_date - timedelta(days=days)
 
-    if report_type == "overview":
-        metrics = "views,likes,comments,shares,subscribersGained,subscribersLost"
-        dimensions = "day"
-    elif report_type == "demographics":
-        metrics = "viewerPercentage"
-        dimensions = "ageGroup,gender"
-    elif report_type == "traffic_sources":
-        metrics = "views"
-        dimensions = "insightTrafficSourceType"
-    else:
+    if report_type not in PREDEFINED_REPORTS:
         raise HTTPException(status_code=400, detail="Invalid report type")
+    metrics, dimensions = PREDEFINED_REPORTS[report_type]
 
-    return query_yt_analytics(
+    return FastJSONResponse(await run_in_threadpool(
+        query_yt_analytics,
         start_date=start_date,
         end_date=end_date,
         metrics=metrics,
         dimensions=dimensions,
         max_results=1000
-    )
+    ))
+
+
+class ReportSpec(BaseModel):
+    """Model for one report of a bulk request"""
+    id: str = Field(..., min_length=1, max_length=64)
+    report: Literal["custom", "channel_info", "overview", "demographics", "traffic_sources"] = "custom"
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    days: int = Field(30, ge=1, le=365)
+    metrics: Optional[str] = None
+    dimensions: Optional[str] = None
+    filters: Optional[str] = None
+    sort: Optional[str] = None
+    max_results: int = Field(1000, ge=1, le=10000)
+    ids: str = "channel==MINE"
+
+    @model_validator(mode="after")
+    def check_custom_report(self) -> "ReportSpec":
+        if self.report == "custom" and not (self.start_date and self.end_date and self.metrics):
+            raise ValueError("custom reports need start_date, end_date and metrics")
+        return self
+
+
+class BulkReportRequest(BaseModel):
+    """Model for a bulk analytics request"""
+    specs: List[ReportSpec] = Field(..., min_length=1, max_length=BULK_MAX_SPECS)
+    parallelism: Optional[int] = Field(None, ge=1, le=BULK_PARALLELISM)
+
+
+def _run_spec(spec: ReportSpec, yta: Any, yt: Any, creds: Credentials) -> Dict:
+    """Run one report spec on the shared clients, with its own HTTP connection (httplib2 isn't thread-safe)."""
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS))
+    if spec.report == "channel_info":
+        return yt.channels().list(part="snippet,statistics", mine=True).execute(http=http)
+
+    if spec.report == "custom":
+        start_date, end_date = spec.start_date, spec.end_date
+        metrics, dimensions = spec.metrics, spec.dimensions
+    else:
+        end_date = date.today()
+        start_date = end_date - timedelta(days=spec.days)
+        metrics, dimensions = PREDEFINED_REPORTS[spec.report]
+    return yta.reports().query(
+        ids=spec.ids,
+        startDate=start_date.isoformat(),
+        endDate=end_date.isoformat(),
+        metrics=metrics,
+        dimensions=dimensions,
+        filters=spec.filters,
+        sort=spec.sort,
+        maxResults=spec.max_results,
+    ).execute(http=http)
+
+
+@router.post("/bulk")
+async def get_bulk_reports(payload: BulkReportRequest):
+    """
+    Run several reports in one request, e.g. everything a dashboard shows.
+
+    Specs share one credential refresh and one set of API clients and run concurrently
+    (at most `parallelism` at a time), so the request takes about as long as its slowest
+    report. Results and per-spec errors are keyed by spec ID.
+    """
+    spec_ids = [spec.id for spec in payload.specs]
+    if len(set(spec_ids)) != len(spec_ids):
+        raise HTTPException(status_code=400, detail="Spec IDs must be unique")
+
+    creds = await run_in_threadpool(_load_credentials)
+    yta, yt = await run_in_threadpool(_build_services, creds)
+    limit = asyncio.Semaphore(payload.parallelism or BULK_PARALLELISM)
+
+    async def run(spec: ReportSpec) -> Dict:
+        async with limit:
+            return await run_in_threadpool(_run_spec, spec, yta, yt, creds)
+
+    outcomes = await asyncio.gather(*(run(spec) for spec in payload.specs), return_exceptions=True)
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for spec, outcome in zip(payload.specs, outcomes):
+        if isinstance(outcome, Exception):
+            errors[spec.id] = f"YouTube API error: {outcome}"
+        else:
+            results[spec.id] = outcome
+    if errors:
+        logger.warning("Bulk analytics: %s of %s reports failed", len(errors), len(payload.specs))
+    return FastJSONResponse({"results": results, "errors": errors})
@@ -3,7 +3,7 @@ from fastapi.responses import RedirectResponse
 from typing import Optional
 from app.utils.logger import get_controller_logger
 from . import models
-from .oauth_service import oauth_service
+from .oauth_service import get_oauth_service
 
 logger = get_controller_logger("auth")
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -18,9 +18,9 @@ async def youtube_login():
     """
     try:
         logger.info("Starting OAuth flow...")
-        auth_url, state = oauth_service.create_authorization_url()
-        logger.info(f"OAuth flow initiated with state: {state}")
-        logger.info(f"Authorization URL: {auth_url}")
+        auth_url, state = get_oauth_service().create_authorization_url()
+        logger.info("OAuth flow initiated with state: %s", state)
+        logger.info("Authorization URL: %s", auth_url)
         
         if not auth_url:
             raise ValueError("Authorization URL is empty")
@@ -30,7 +30,7 @@ async def youtube_login():
             "state": state
         }
     except Exception as e:
-        logger.error(f"Failed to initiate OAuth: {str(e)}", exc_info=True)
+        logger.error("Failed to initiate OAuth: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to initiate YouTube login: {str(e)}"
@@ -45,16 +45,16 @@ async def youtube_callback(callback_data: models.OAuthCallbackRequest, response:
     Exchanges authorization code for access tokens
     """
     try:
-        logger.info(f"Received OAuth callback with code: {callback_data.code[:20]}...")
+        logger.info("Received OAuth callback with code: %s...", callback_data.code[:20])
         
         # Exchange code for tokens
-        token_info = oauth_service.exchange_code_for_tokens(callback_data.code)
+        token_info = await get_oauth_service().exchange_code_for_tokens(callback_data.code)
         
         # Get user's YouTube channel info
         try:
-            channel_info = oauth_service.get_user_channel_info(token_info['user_id'])
+            channel_info = await get_oauth_service().get_user_channel_info(token_info['user_id'])
         except Exception as e:
-            logger.warning(f"Could not fetch channel info: {str(e)}")
+            logger.warning("Could not fetch channel info: %s", e)
             channel_info = {}
         
         # Set secure HTTP-only cookie with user_id
@@ -67,7 +67,7 @@ async def youtube_callback(callback_data: models.OAuthCallbackRequest, response:
             secure=False  # Set to True in production with HTTPS
         )
         
-        logger.info(f"User authenticated successfully: {token_info['user_id']}")
+        logger.info("User authenticated successfully: %s", token_info['user_id'])
         
         return {
             "message": "Authentication successful",
@@ -78,7 +78,7 @@ async def youtube_callback(callback_data: models.OAuthCallbackRequest, response:
         }
     
     except Exception as e:
-        logger.error(f"OAuth callback failed: {str(e)}")
+        logger.error("OAuth callback failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to complete authentication: {str(e)}"
@@ -98,7 +98,7 @@ async def get_current_user(user_id: Optional[str] = Cookie(None)):
     
     try:
         # Check if user has valid credentials
-        credentials = oauth_service.get_user_credentials(user_id)
+        credentials = await get_oauth_service().get_user_credentials(user_id)
         if not credentials:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -107,7 +107,7 @@ async def get_current_user(user_id: Optional[str] = Cookie(None)):
         
         # Get channel info
         try:
-            channel_info = oauth_service.get_user_channel_info(user_id)
+            channel_info = await get_oauth_service().get_user_channel_info(user_id)
             return models.UserSession(
                 user_id=user_id,
                 youtube_connected=True,
@@ -115,7 +115,7 @@ async def get_current_user(user_id: Optional[str] = Cookie(None)):
                 channel_name=channel_info.get('channel_name')
             )
         except Exception as e:
-            logger.warning(f"Could not fetch channel info: {str(e)}")
+            logger.warning("Could not fetch channel info: %s", e)
             return models.UserSession(
                 user_id=user_id,
                 youtube_connected=True
@@ -124,7 +124,7 @@ async def get_current_user(user_id: Optional[str] = Cookie(None)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get user info: {str(e)}")
+        logger.error("Failed to get user info: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch user information"
@@ -143,7 +143,7 @@ async def refresh_token(user_id: str = Cookie(None)):
         )
     
     try:
-        credentials = oauth_service.get_user_credentials(user_id)
+        credentials = await get_oauth_service().get_user_credentials(user_id)
         if not credentials or not credentials.refresh_token:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -151,9 +151,9 @@ async def refresh_token(user_id: str = Cookie(None)):
             )
         
         # Refresh the token
-        token_info = oauth_service.refresh_access_token(user_id, credentials.refresh_token)
+        token_info = await get_oauth_service().refresh_access_token(user_id, credentials.refresh_token)
         
-        logger.info(f"Token refreshed for user: {user_id}")
+        logger.info("Token refreshed for user: %s", user_id)
         
         return {
             "message": "Token refreshed successfully",
@@ -164,7 +164,7 @@ async def refresh_token(user_id: str = Cookie(None)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Token refresh failed: {str(e)}")
+        logger.error("Token refresh failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to refresh token: {str(e)}"
@@ -178,10 +178,10 @@ async def logout(response: Response, user_id: Optional[str] = Cookie(None)):
     """
     if user_id:
         try:
-            oauth_service.revoke_access(user_id)
-            logger.info(f"User logged out: {user_id}")
+            await get_oauth_service().revoke_access(user_id)
+            logger.info("User logged out: %s", user_id)
         except Exception as e:
-            logger.warning(f"Error during logout: {str(e)}")
+            logger.warning("Error during logout: %s", e)
     
     # Clear the cookie
     response.delete_cookie(key="user_id")
@@ -200,7 +200,7 @@ async def auth_status(user_id: Optional[str] = Cookie(None)):
             "youtube_connected": False
         }
     
-    credentials = oauth_service.get_user_credentials(user_id)
+    credentials = await get_oauth_service().get_user_credentials(user_id)
     if not credentials:
         return {
             "authenticated": False,
@@ -208,7 +208,7 @@ async def auth_status(user_id: Optional[str] = Cookie(None)):
         }
     
     try:
-        channel_info = oauth_service.get_user_channel_info(user_id)
+        channel_info = await get_oauth_service().get_user_channel_info(user_id)
         return {
             "authenticated": True,
             "youtube_connected": True,
@@ -5,9 +5,14 @@ from typing import Optional, Dict, Any
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 import secrets
 import tempfile
 
+from app.services.credential_store import credential_store
+from app.utils.tracing import TracedHttpRequest, refresh_credentials
+
 # OAuth Configuration
 SCOPES = [
     'https://www.googleapis.com/auth/youtube.readonly',
@@ -18,20 +23,21 @@ SCOPES = [
 ]
 REDIRECT_URI = os.getenv('OAUTH_REDIRECT_URI')
 
-# Validate REDIRECT_URI is set
-if not REDIRECT_URI:
-    raise ValueError(
-        "OAUTH_REDIRECT_URI environment variable is required. "
-        "Please set it in your .env file (e.g., OAUTH_REDIRECT_URI=https://your-domain.com/oauth/callback)"
-    )
-
 
 class YouTubeOAuthService:
     """Service for handling YouTube OAuth authentication"""
     
     def __init__(self):
+        # Validate REDIRECT_URI is set
+        if not REDIRECT_URI:
+            raise ValueError(
+                "OAUTH_REDIRECT_URI environment variable is required. "
+                "Please set it in your .env file (e.g., OAUTH_REDIRECT_URI=https://your-domain.com/oauth/callback)"
+            )
         self.client_config = self._get_client_config()
-        self.credentials_store: Dict[str, Credentials] = {}
+        # Shared by all workers through Postgres; fails here when no encryption key is set
+        self.credentials_store = credential_store
+        self.credentials_store.validate_key()
     
     def _get_client_config(self) -> Dict[str, Any]:
         """
@@ -101,7 +107,7 @@ class YouTubeOAuthService:
         
         return authorization_url, state
     
-    def exchange_code_for_tokens(self, code: str) -> Dict[str, Any]:
+    async def exchange_code_for_tokens(self, code: str) -> Dict[str, Any]:
         """
         Exchange authorization code for access and refresh tokens
         
@@ -117,13 +123,13 @@ class YouTubeOAuthService:
             redirect_uri=REDIRECT_URI
         )
         
-        flow.fetch_token(code=code)
+        await run_in_threadpool(flow.fetch_token, code=code)
         
         credentials = flow.credentials
         
         # Store credentials
         user_id = self._generate_user_id()
-        self.credentials_store[user_id] = credentials
+        await self.credentials_store.save(user_id, credentials)
         
         return {
             'user_id': user_id,
@@ -133,7 +139,7 @@ class YouTubeOAuthService:
             'scopes': credentials.scopes
         }
     
-    def refresh_access_token(self, user_id: str, refresh_token: str) -> Dict[str, Any]:
+    async def refresh_access_token(self, user_id: str, refresh_token: str) -> Dict[str, Any]:
         """
         Refresh the access token using refresh token
         
@@ -160,10 +166,10 @@ class YouTubeOAuthService:
         )
         
         # Refresh the token
-        credentials.refresh(Request())
+        await run_in_threadpool(refresh_credentials, credentials, Request())
         
         # Update stored credentials
-        self.credentials_store[user_id] = credentials
+        await self.credentials_store.save(user_id, credentials)
         
         return {
             'user_id': user_id,
@@ -171,7 +177,7 @@ class YouTubeOAuthService:
             'token_expiry': credentials.expiry.isoformat() if credentials.expiry else None
         }
     
-    def get_user_credentials(self, user_id: str) -> Optional[Credentials]:
+    async def get_user_credentials(self, user_id: str) -> Optional[Credentials]:
         """
         Get stored credentials for a user
         
@@ -181,9 +187,9 @@ class YouTubeOAuthService:
         Returns:
             Credentials object or None
         """
-        return self.credentials_store.get(user_id)
+        return await self.credentials_store.get(user_id)
     
-    def get_user_channel_info(self, user_id: str) -> Dict[str, Any]:
+    async def get_user_channel_info(self, user_id: str) -> Dict[str, Any]:
         """
         Get YouTube channel information for authenticated user
         
@@ -193,11 +199,16 @@ class YouTubeOAuthService:
         Returns:
             dict: Channel information
         """
-        credentials = self.get_user_credentials(user_id)
+        credentials = await self.get_user_credentials(user_id)
         if not credentials:
             raise ValueError("User not authenticated")
-        
-        youtube = build('youtube', 'v3', credentials=credentials, cache_discovery=False)
+        return await run_in_threadpool(self._fetch_channel_info, credentials)
+    
+    def _fetch_channel_info(self, credentials: Credentials) -> Dict[str, Any]:
+        """Blocking part of `get_user_channel_info`: build the client and call the API."""
+        youtube = build(
+            'youtube', 'v3', credentials=credentials, cache_discovery=False, requestBuilder=TracedHttpRequest
+        )
         
         request = youtube.channels().list(
             part='snippet,statistics,contentDetails',
@@ -218,7 +229,7 @@ class YouTubeOAuthService:
             'thumbnail': channel['snippet']['thumbnails']['default']['url']
         }
     
-    def revoke_access(self, user_id: str) -> bool:
+    async def revoke_access(self, user_id: str) -> bool:
         """
         Revoke access for a user
         
@@ -228,29 +239,31 @@ class YouTubeOAuthService:
         Returns:
             bool: Success status
         """
-        if user_id in self.credentials_store:
-            del self.credentials_store[user_id]
-            return True
-        return False
+        return await self.credentials_store.delete(user_id)
     
     def _generate_user_id(self) -> str:
         """Generate a unique user ID"""
         return secrets.token_urlsafe(16)
     
-    def store_credentials_to_db(self, user_id: str, credentials: Credentials, db_session):
+    async def store_credentials_to_db(self, user_id: str, credentials: Credentials, db_session: AsyncSession):
         """
         Store credentials to database
         
         Args:
             user_id: User identifier
             credentials: OAuth credentials
-            db_session: Database session
+            db_session: Database session; the caller commits
         """
-        # TODO: Implement database storage
-        # For now, using in-memory storage
-        pass
+        await self.credentials_store.save(user_id, credentials, db_session)
+
+
+_oauth_service: Optional[YouTubeOAuthService] = None
 
 
-# Singleton instance
-oauth_service = YouTubeOAuthService()
+def get_oauth_service() -> YouTubeOAuthService:
+    """The shared OAuth service, created (and its configuration checked) on first use."""
+    global _oauth_service
+    if _oauth_service is None:
+        _oauth_service = YouTubeOAuthService()
+    return _oauth_service
 
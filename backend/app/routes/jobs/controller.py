@@ -0,0 +1,116 @@
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Cookie, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.database.core import AsyncSessionLocal
+from app.jobs.models import TERMINAL_STATUSES, Job, JobChunk
+from app.jobs.queue import job_queue
+import app.jobs.reports  # noqa: F401  (registers the report and backfill handlers)
+from app.services.report_export import ENCODERS, EXPORT_FORMATS, arrow_available
+from app.utils.logger import get_controller_logger
+
+from .models import JobRequest, JobStatus
+
+logger = get_controller_logger("jobs")
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# How often the status stream checks for progress
+EVENTS_POLL_SECONDS = 1.0
+
+
+async def _get_job(job_id: str, user_id: Optional[str]) -> Job:
+    job = await job_queue.get(job_id)
+    # Jobs submitted with a user cookie are only visible to that user
+    if job is None or (job.user_id and job.user_id != user_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(payload: JobRequest, user_id: Optional[str] = Cookie(None)):
+    """
+    Run a long report or a backfill in the background.
+
+    Poll GET /jobs/{id} or stream GET /jobs/{id}/events for progress, then download
+    the rows from GET /jobs/{id}/result.
+    """
+    params = payload.model_dump(mode="json", exclude={"kind"})
+    job = await job_queue.submit(payload.kind, params, user_id=user_id)
+    return JobStatus.model_validate(await job_queue.get(job.id))
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, user_id: Optional[str] = Cookie(None)):
+    return JobStatus.model_validate(await _get_job(job_id, user_id))
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, user_id: Optional[str] = Cookie(None)):
+    """Server-sent events with the job's status whenever it changes, until it finishes."""
+    await _get_job(job_id, user_id)
+
+    async def events() -> AsyncIterator[str]:
+        last = None
+        while True:
+            job = await job_queue.get(job_id)
+            if job is None:
+                return
+            current = JobStatus.model_validate(job).model_dump(mode="json")
+            if current != last:
+                yield f"event: status\ndata: {json.dumps(current)}\n\n"
+                last = current
+            if job.status in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/{job_id}/result")
+async def download_job_result(
+    job_id: str,
+    format: str = Query("csv", description="Result format", enum=list(EXPORT_FORMATS)),
+    user_id: Optional[str] = Cookie(None),
+):
+    """Stream the rows of a finished job, one stored chunk at a time."""
+    job = await _get_job(job_id, user_id)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow export requires pyarrow to be installed")
+
+    async def body() -> AsyncIterator[bytes]:
+        encoder = ENCODERS[format]()
+        async with AsyncSessionLocal() as session:
+            indexes = (
+                await session.execute(select(JobChunk.index).where(JobChunk.job_id == job_id).order_by(JobChunk.index))
+            ).scalars().all()
+            if not indexes:
+                yield encoder.page({"columnHeaders": job.column_headers or [], "rows": []})
+            for index in indexes:
+                rows = await session.scalar(
+                    select(JobChunk.rows).where(JobChunk.job_id == job_id, JobChunk.index == index)
+                )
+                yield encoder.page({"columnHeaders": job.column_headers or [], "rows": rows})
+        yield encoder.finish()
+
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="job-{job_id}.{extension}"'},
+    )
+
+
+@router.delete("/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str, user_id: Optional[str] = Cookie(None)):
+    await _get_job(job_id, user_id)
+    if not await job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job has already finished")
+    return JobStatus.model_validate(await job_queue.get(job_id))
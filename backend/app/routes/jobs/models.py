@@ -0,0 +1,42 @@
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class JobRequest(BaseModel):
+    """Model for submitting a report or backfill job"""
+    kind: Literal["report", "backfill"] = "report"
+    start_date: date
+    end_date: date
+    metrics: str
+    dimensions: Optional[str] = None
+    filters: Optional[str] = None
+    sort: Optional[str] = None
+    max_results: Optional[int] = Field(None, ge=1, description="Maximum number of rows (default: all)")
+    ids: str = "channel==MINE"
+    chunk_days: Optional[int] = Field(None, ge=1, le=366, description="Days fetched per backfill step")
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "JobRequest":
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+
+class JobStatus(BaseModel):
+    """Model for the state of a job"""
+    id: str
+    kind: str
+    status: str
+    progress: float
+    message: Optional[str] = None
+    row_count: int
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    not_before: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
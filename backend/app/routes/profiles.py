@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from app.utils.logger import get_controller_logger
+from app.utils.profiling import profile_store, profile_triggers, profiling_enabled, verify_token
+
+logger = get_controller_logger("profiles")
+
+
+def require_profile_token(x_debug_profile: Optional[str] = Header(None)) -> None:
+    # Pretend the endpoints don't exist unless profiling is configured
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not verify_token(x_debug_profile):
+        raise HTTPException(status_code=403, detail="A valid X-Debug-Profile token is required")
+
+
+router = APIRouter(
+    prefix="/debug/profiles",
+    tags=["debug"],
+    dependencies=[Depends(require_profile_token)],
+    include_in_schema=False,
+)
+
+
+class TriggerRequest(BaseModel):
+    """Profile the next `count` requests to paths starting with `path_prefix`"""
+    path_prefix: str = Field(..., min_length=1, pattern=r"^/")
+    count: int = Field(1, ge=1, le=100)
+    ttl_seconds: int = Field(600, ge=1, le=86400)
+
+
+@router.get("", response_model=List[Dict[str, Any]])
+def list_profiles():
+    """Recent profiles, newest first."""
+    return profile_store.list()
+
+
+@router.get("/triggers", response_model=List[Dict[str, Any]])
+def list_triggers():
+    return profile_triggers.active()
+
+
+@router.post("/triggers")
+def arm_trigger(payload: TriggerRequest):
+    """
+    Profile upcoming requests of one shape without the client's cooperation. Triggers are
+    per worker process.
+    """
+    trigger = profile_triggers.arm(payload.path_prefix, payload.count, payload.ttl_seconds)
+    logger.info("Armed profiling of %s requests to %s*", payload.count, payload.path_prefix)
+    return trigger
+
+
+@router.get("/{profile_id}")
+def download_profile(profile_id: str):
+    """The profile in speedscope format (open it at https://www.speedscope.app)."""
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from google.oauth2.credentials import Credentials
+from sqlalchemy import Column, DateTime, LargeBinary, String, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.core import AsyncSessionLocal, Base, DATABASE_URL, create_tables
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("credential_store")
+
+# Fernet keys, comma separated: the first encrypts, all of them decrypt (for key rotation)
+CREDENTIALS_ENCRYPTION_KEYS = os.getenv("CREDENTIALS_ENCRYPTION_KEY", "")
+# Channel every process listens on; the payload is the hashed user key that changed
+NOTIFY_CHANNEL = "oauth_credentials"
+# How often an idle listener checks that its connection is still alive
+CREDENTIALS_LISTEN_PING_SECONDS = float(os.getenv("CREDENTIALS_LISTEN_PING_SECONDS", "30"))
+
+
+class OAuthCredential(Base):
+    """A user's OAuth credentials, encrypted; keyed by a hash of the session user id."""
+
+    __tablename__ = "oauth_credentials"
+
+    user_key = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+def user_key(user_id: str) -> str:
+    # The user id is the session cookie: don't keep it (or send it over NOTIFY) in the clear
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()
+
+
+def _to_json(credentials: Credentials) -> bytes:
+    return json.dumps({
+        "token": credentials.token,
+        "refresh_token": credentials.refresh_token,
+        "token_uri": credentials.token_uri,
+        "client_id": credentials.client_id,
+        "client_secret": credentials.client_secret,
+        "scopes": list(credentials.scopes or []),
+        "expiry": credentials.expiry.isoformat() if credentials.expiry else None,
+    }).encode("utf-8")
+
+
+def _from_json(data: bytes) -> Credentials:
+    info = json.loads(data)
+    # google-auth compares expiry against naive UTC datetimes
+    expiry = datetime.fromisoformat(info["expiry"]) if info.get("expiry") else None
+    return Credentials(
+        token=info.get("token"),
+        refresh_token=info.get("refresh_token"),
+        token_uri=info.get("token_uri"),
+        client_id=info.get("client_id"),
+        client_secret=info.get("client_secret"),
+        scopes=info.get("scopes"),
+        expiry=expiry,
+    )
+
+
+class CredentialStore:
+    """
+    OAuth credentials shared by every worker and replica through Postgres.
+
+    Rows are encrypted with Fernet. Each process keeps a read-through cache that is only
+    used while it is listening for changes: writers send a NOTIFY in the same transaction,
+    and every listener drops that user's entry. When the listener is down the cache is
+    emptied and reads go to the database.
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, Credentials] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation, so a read racing a change doesn't cache the old row
+        self._generation = 0
+        self._listening = False
+        self._listener: Optional[asyncio.Task] = None
+        self._cipher: Optional[MultiFernet] = None
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def cipher(self) -> MultiFernet:
+        if self._cipher is None:
+            self.validate_key()
+        return self._cipher
+
+    def validate_key(self) -> None:
+        """Load the encryption keys; raises ValueError when none is set or one isn't a Fernet key."""
+        generate = (
+            "Generate one with: python -c \"from cryptography.fernet import Fernet; "
+            "print(Fernet.generate_key().decode())\""
+        )
+        keys = [key.strip() for key in CREDENTIALS_ENCRYPTION_KEYS.split(",") if key.strip()]
+        if not keys:
+            raise ValueError(
+                f"CREDENTIALS_ENCRYPTION_KEY environment variable is required to store OAuth credentials. {generate}"
+            )
+        try:
+            self._cipher = MultiFernet([Fernet(key) for key in keys])
+        except ValueError as e:
+            raise ValueError(f"CREDENTIALS_ENCRYPTION_KEY holds an invalid Fernet key ({e}). {generate}") from e
+
+    async def get(self, user_id: str) -> Optional[Credentials]:
+        key = user_key(user_id)
+        with self._lock:
+            credentials = self._cache.get(key)
+            generation = self._generation
+            self.stats["hits" if credentials is not None else "misses"] += 1
+        if credentials is not None:
+            return credentials
+
+        async with AsyncSessionLocal() as session:
+            data = await session.scalar(select(OAuthCredential.data).where(OAuthCredential.user_key == key))
+        if data is None:
+            return None
+        try:
+            credentials = _from_json(self.cipher.decrypt(data))
+        except InvalidToken:
+            logger.error("Stored OAuth credentials could not be decrypted; was the encryption key changed?")
+            return None
+        with self._lock:
+            if self._listening and generation == self._generation:
+                self._cache[key] = credentials
+        return credentials
+
+    async def save(self, user_id: str, credentials: Credentials, session: Optional[AsyncSession] = None) -> None:
+        """Encrypt and upsert a user's credentials; with `session`, the caller commits."""
+        key = user_key(user_id)
+        data = self.cipher.encrypt(_to_json(credentials))
+        statement = insert(OAuthCredential).values(user_key=key, data=data)
+        statement = statement.on_conflict_do_update(
+            index_elements=[OAuthCredential.user_key], set_={"data": data, "updated_at": func.now()}
+        )
+        if session is not None:
+            await self._write(session, key, statement)
+            return
+        async with AsyncSessionLocal() as own_session, own_session.begin():
+            await self._write(own_session, key, statement)
+
+    async def delete(self, user_id: str) -> bool:
+        key = user_key(user_id)
+        async with AsyncSessionLocal() as session, session.begin():
+            deleted = await self._write(
+                session, key, OAuthCredential.__table__.delete().where(OAuthCredential.user_key == key)
+            )
+        return deleted > 0
+
+    async def _write(self, session: AsyncSession, key: str, statement: Any) -> int:
+        result = await session.execute(statement)
+        # Delivered to every listener, this process included, when the transaction commits
+        await session.execute(text("SELECT pg_notify(:channel, :key)"), {"channel": NOTIFY_CHANNEL, "key": key})
+        self._invalidate(key)
+        return result.rowcount
+
+    def _invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            self.stats["invalidations"] += 1
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def start(self) -> None:
+        """
+        Create the credentials table and listen for changes from other processes, in the
+        background; until then the cache stays unused.
+        """
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self) -> None:
+        import psycopg
+        from sqlalchemy.engine import make_url
+
+        conninfo = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = 1.0
+        table_ready = False
+        while True:
+            try:
+                if not table_ready:
+                    await create_tables([OAuthCredential.__table__])
+                    table_ready = True
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    # Changes made before we listened were never announced to this cache
+                    self._invalidate()
+                    self._listening = True
+                    delay = 1.0
+                    logger.info("Listening for OAuth credential changes")
+                    while True:
+                        async for notify in conn.notifies(timeout=CREDENTIALS_LISTEN_PING_SECONDS):
+                            self._invalidate(notify.payload)
+                        await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Credential store could not reach the database, retrying in %.0fs: %s", delay, e)
+            finally:
+                self._listening = False
+                self._invalidate()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+credential_store = CredentialStore()
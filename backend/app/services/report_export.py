@@ -0,0 +1,233 @@
+import csv
+import io
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("report_export")
+
+# Rows requested per upstream page (reports.query startIndex/maxResults)
+EXPORT_PAGE_SIZE = int(os.getenv("ANALYTICS_EXPORT_PAGE_SIZE", "1000"))
+# Daily reports are fetched in date partitions of this many days
+EXPORT_PARTITION_DAYS = int(os.getenv("ANALYTICS_EXPORT_PARTITION_DAYS", "31"))
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+def date_partitions(
+    start_date: date, end_date: date, dimensions: Optional[str], sort: Optional[str]
+) -> List[Tuple[date, date]]:
+    """
+    Split a daily report into consecutive date ranges. Other reports, and daily reports
+    sorted by anything but the day, are fetched as one range so the upstream order holds.
+    """
+    dims = [d.strip() for d in (dimensions or "").split(",")]
+    if "day" not in dims or (sort and sort.strip() not in ("day", "")):
+        return [(start_date, end_date)]
+    partitions = []
+    current = start_date
+    while current <= end_date:
+        last = min(current + timedelta(days=EXPORT_PARTITION_DAYS - 1), end_date)
+        partitions.append((current, last))
+        current = last + timedelta(days=1)
+    return partitions
+
+
+def fetch_report_page(
+    yta: Any,
+    start_date: date,
+    end_date: date,
+    metrics: str,
+    dimensions: Optional[str] = None,
+    filters: Optional[str] = None,
+    sort: Optional[str] = None,
+    start_index: int = 1,
+    max_results: int = EXPORT_PAGE_SIZE,
+    ids: str = "channel==MINE",
+) -> Dict[str, Any]:
+    """One raw page of a YouTube Analytics report, `max_results` rows from `start_index` on."""
+    return yta.reports().query(
+        ids=ids,
+        startDate=start_date.isoformat(),
+        endDate=end_date.isoformat(),
+        metrics=metrics,
+        dimensions=dimensions,
+        filters=filters,
+        sort=sort,
+        startIndex=start_index,
+        maxResults=max_results,
+    ).execute()
+
+
+def iter_report_pages(
+    yta: Any,
+    start_date: date,
+    end_date: date,
+    metrics: str,
+    dimensions: Optional[str] = None,
+    filters: Optional[str] = None,
+    sort: Optional[str] = None,
+    max_results: Optional[int] = None,
+    ids: str = "channel==MINE",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the raw pages of a YouTube Analytics report, one upstream call at a time.
+
+    Each date partition is paged with startIndex until a short page comes back or
+    `max_results` rows (None: all rows) have been yielded.
+    """
+    remaining = max_results
+    for part_start, part_end in date_partitions(start_date, end_date, dimensions, sort):
+        start_index = 1
+        while remaining is None or remaining > 0:
+            size = EXPORT_PAGE_SIZE if remaining is None else min(EXPORT_PAGE_SIZE, remaining)
+            page = fetch_report_page(
+                yta, part_start, part_end, metrics, dimensions, filters, sort, start_index, size, ids
+            )
+            rows = page.get("rows") or []
+            yield page
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < size:
+                break
+            start_index += len(rows)
+        if remaining is not None and remaining <= 0:
+            return
+
+
+def _column_names(page: Dict[str, Any]) -> List[str]:
+    return [header["name"] for header in page.get("columnHeaders", [])]
+
+
+class CsvEncoder:
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._header_written = False
+
+    def page(self, page: Dict[str, Any]) -> bytes:
+        if not self._header_written:
+            self._writer.writerow(_column_names(page))
+            self._header_written = True
+        self._writer.writerows(page.get("rows") or [])
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class NdjsonEncoder:
+    def __init__(self):
+        self._names: Optional[List[str]] = None
+
+    def page(self, page: Dict[str, Any]) -> bytes:
+        if self._names is None:
+            self._names = _column_names(page)
+        return b"".join(orjson.dumps(dict(zip(self._names, row))) + b"\n" for row in page.get("rows") or [])
+
+    def finish(self) -> bytes:
+        return b""
+
+
+_ARROW_TYPES = {"STRING": "string", "INTEGER": "int64", "FLOAT": "float64"}
+
+
+class _ChunkSink:
+    """File-like object the Arrow stream writer writes into; drained after every batch."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ArrowEncoder:
+    """Arrow IPC stream with one record batch per page."""
+
+    def __init__(self):
+        import pyarrow as pa
+
+        self._pa = pa
+        self._sink = _ChunkSink()
+        self._writer = None
+        self._schema = None
+
+    def page(self, page: Dict[str, Any]) -> bytes:
+        pa = self._pa
+        if self._writer is None:
+            self._schema = pa.schema([
+                (header["name"], getattr(pa, _ARROW_TYPES.get(header.get("dataType"), "string"))())
+                for header in page.get("columnHeaders", [])
+            ])
+            self._writer = pa.ipc.new_stream(self._sink, self._schema)
+        rows = page.get("rows") or []
+        if rows:
+            columns = list(zip(*rows))
+            self._writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+                schema=self._schema,
+            ))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        if self._writer is None:
+            return b""
+        self._writer.close()
+        return self._sink.drain()
+
+
+# Encoders turn report pages (dicts with columnHeaders and rows) into the bytes of one
+# export format, a page at a time
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder, "arrow": ArrowEncoder}
+
+
+def stream_export(pages: Iterable[Dict[str, Any]], export_format: str) -> Iterator[bytes]:
+    """Encode report pages as they arrive; an upstream failure after the first page ends the stream."""
+    rows = 0
+
+    def counted(source: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal rows
+        for page in source:
+            rows += len(page.get("rows") or [])
+            yield page
+
+    encoder = ENCODERS[export_format]()
+    try:
+        for page in counted(pages):
+            yield encoder.page(page)
+        yield encoder.finish()
+    except Exception as e:
+        logger.error("Report export (%s) failed after %s rows: %s", export_format, rows, e)
+        raise
+    logger.info("Report export (%s) finished: %s rows", export_format, rows)
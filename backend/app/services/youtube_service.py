@@ -1,6 +1,6 @@
 import os
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import Any, Callable, Dict, List, Optional
 
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
@@ -8,6 +8,8 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from fastapi import HTTPException
 
+from app.utils.tracing import TracedHttpRequest, refresh_credentials
+
 # YouTube API scopes
 YT_SCOPE = "https://www.googleapis.com/auth/youtube.readonly"
 YTA_SCOPE = "https://www.googleapis.com/auth/yt-analytics.readonly"
@@ -41,7 +43,7 @@ def _load_credentials(scopes: List[str] = None) -> Credentials:
     # Ensure we have a valid access token
     request = Request()
     try:
-        creds.refresh(request)
+        refresh_credentials(creds, request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to refresh YouTube token: {e}")
 
@@ -49,16 +51,20 @@ def _load_credentials(scopes: List[str] = None) -> Credentials:
 
 def _build_youtube_service(creds: Credentials):
     """Build YouTube Data API service."""
-    return build("youtube", "v3", credentials=creds, cache_discovery=False)
+    return build("youtube", "v3", credentials=creds, cache_discovery=False, requestBuilder=TracedHttpRequest)
 
 def _build_analytics_service(creds: Credentials):
     """Build YouTube Analytics API service."""
-    return build("youtubeAnalytics", "v2", credentials=creds, cache_discovery=False)
+    return build(
+        "youtubeAnalytics", "v2", credentials=creds, cache_discovery=False, requestBuilder=TracedHttpRequest
+    )
 
 class YouTubeService:
     """Service class for YouTube API operations."""
 
-    def __init__(self, scopes: List[str] = None):
+    def __init__(self, scopes: List[str] = None, execute: Optional[Callable[[Any], Any]] = None):
+        # Runs each API request; callers can wrap it, e.g. to stop a cancelled agent tool call
+        self._execute = execute or (lambda request: request.execute())
         self.creds = _load_credentials(scopes)
         self.youtube = _build_youtube_service(self.creds)
         self.analytics = _build_analytics_service(self.creds) if YTA_SCOPE in (scopes or []) else None
@@ -66,10 +72,10 @@ class YouTubeService:
     def get_channel_info(self) -> Dict[str, Any]:
         """Get channel information and statistics."""
         try:
-            response = self.youtube.channels().list(
+            response = self._execute(self.youtube.channels().list(
                 part="snippet,statistics,contentDetails,brandingSettings",
                 mine=True
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube API error: {e}")
@@ -77,13 +83,13 @@ class YouTubeService:
     def get_videos(self, max_results: int = 50, order: str = "date") -> Dict[str, Any]:
         """Get user's uploaded videos."""
         try:
-            response = self.youtube.search().list(
+            response = self._execute(self.youtube.search().list(
                 part="snippet",
                 forMine=True,
                 type="video",
                 order=order,
                 maxResults=max_results
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube API error: {e}")
@@ -94,7 +100,7 @@ class YouTubeService:
             raise HTTPException(status_code=500, detail="Analytics API not available")
 
         try:
-            response = self.analytics.reports().query(
+            response = self._execute(self.analytics.reports().query(
                 ids=f"channel==MINE",
                 startDate=start_date.strftime("%Y-%m-%d"),
                 endDate=end_date.strftime("%Y-%m-%d"),
@@ -102,7 +108,7 @@ class YouTubeService:
                 dimensions="video",
                 filters=f"video=={video_id}",
                 maxResults=1000
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube Analytics API error: {e}")
@@ -116,7 +122,7 @@ class YouTubeService:
         start_date = end_date - timedelta(days=days)
 
         try:
-            response = self.analytics.reports().query(
+            response = self._execute(self.analytics.reports().query(
                 ids="channel==MINE",
                 startDate=start_date.strftime("%Y-%m-%d"),
                 endDate=end_date.strftime("%Y-%m-%d"),
@@ -124,7 +130,7 @@ class YouTubeService:
                 dimensions="video",
                 sort="-views",
                 maxResults=limit
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube Analytics API error: {e}")
@@ -132,11 +138,11 @@ class YouTubeService:
     def get_playlist_videos(self, playlist_id: str, max_results: int = 50) -> Dict[str, Any]:
         """Get videos from a specific playlist."""
         try:
-            response = self.youtube.playlistItems().list(
+            response = self._execute(self.youtube.playlistItems().list(
                 part="snippet,contentDetails",
                 playlistId=playlist_id,
                 maxResults=max_results
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube API error: {e}")
@@ -144,11 +150,11 @@ class YouTubeService:
     def get_channel_playlists(self, max_results: int = 50) -> Dict[str, Any]:
         """Get user's playlists."""
         try:
-            response = self.youtube.playlists().list(
+            response = self._execute(self.youtube.playlists().list(
                 part="snippet,contentDetails",
                 mine=True,
                 maxResults=max_results
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube API error: {e}")
@@ -166,12 +172,12 @@ class YouTubeService:
     def search_videos(self, query: str, max_results: int = 10) -> Dict[str, Any]:
         """Search for videos on YouTube."""
         try:
-            response = self.youtube.search().list(
+            response = self._execute(self.youtube.search().list(
                 part="snippet",
                 q=query,
                 type="video",
                 maxResults=max_results
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube API error: {e}")
@@ -179,10 +185,10 @@ class YouTubeService:
     def get_video_details(self, video_id: str) -> Dict[str, Any]:
         """Get detailed information about a specific video."""
         try:
-            response = self.youtube.videos().list(
+            response = self._execute(self.youtube.videos().list(
                 part="snippet,statistics,contentDetails",
                 id=video_id
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube API error: {e}")
@@ -190,12 +196,12 @@ class YouTubeService:
     def get_comments(self, video_id: str, max_results: int = 100) -> Dict[str, Any]:
         """Get comments for a specific video."""
         try:
-            response = self.youtube.commentThreads().list(
+            response = self._execute(self.youtube.commentThreads().list(
                 part="snippet",
                 videoId=video_id,
                 maxResults=max_results,
                 order="relevance"
-            ).execute()
+            ))
             return response
         except HttpError as e:
             raise HTTPException(status_code=502, detail=f"YouTube API error: {e}")
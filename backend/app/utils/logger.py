@@ -1,22 +1,181 @@
+import atexit
 import logging
 import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+import orjson
 
 # Global logger configuration
 _loggers_configured = set()
-_app_log_file = "./logs/tubentor.log"
+_app_log_file = os.getenv("LOG_FILE", "./logs/tubentor.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" or "json" (one object per line, for log shippers)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Records waiting for the writer thread; when full, new records are dropped and counted
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed with `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _AppQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread. Only the message is merged here (so later changes
+    to the arguments don't show up in the log); timestamps, tracebacks, JSON and all I/O
+    happen on the writer thread.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block the event loop on a slow disk
+            _AppQueueHandler.dropped += 1
+
+
+class _AppQueueListener(QueueListener):
+    """The single writer thread; it also reports records dropped while it fell behind."""
+
+    _reported = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        dropped = _AppQueueHandler.dropped
+        if dropped > self._reported:
+            warning = logging.makeLogRecord({
+                "name": "incident_mgmt.logging",
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": "Log queue full: dropped %s records",
+                "args": (dropped - self._reported,),
+            })
+            self._reported = dropped
+            super().handle(warning)
+        super().handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room: the base class gives up on a full queue
+        self.queue.put(self._sentinel)
+
+
+def _formatter() -> logging.Formatter:
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    # Create formatter with module name for better tracing
+    return logging.Formatter(
+        "%(asctime)s - [%(name)s] - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
+def _writer_handlers(max_size: int, backup_count: int) -> list:
+    formatter = _formatter()
+
+    # Console handler for development
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    console_handler.setLevel(logging.INFO)  # Only INFO and above to console
+    handlers = [console_handler]
+
+    # File handler for centralized logging; LOG_FILE= (empty) logs to the console only
+    if _app_log_file:
+        os.makedirs(os.path.dirname(_app_log_file) or ".", exist_ok=True)
+        file_handler = RotatingFileHandler(_app_log_file, maxBytes=max_size, backupCount=backup_count)
+        file_handler.setFormatter(formatter)
+        file_handler.setLevel(logging.DEBUG)  # Capture all levels in file
+        handlers.append(file_handler)
+    return handlers
+
+
+_queue_handler: Optional[_AppQueueHandler] = None
+_listener: Optional[_AppQueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _start_listener(max_size: int, backup_count: int) -> _AppQueueHandler:
+    """The queue handler shared by all app loggers, and its single writer thread."""
+    global _queue_handler, _listener
+    with _listener_lock:
+        if _queue_handler is None:
+            log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+            _queue_handler = _AppQueueHandler(log_queue)
+            _listener = _AppQueueListener(
+                log_queue, *_writer_handlers(max_size, backup_count), respect_handler_level=True
+            )
+            _listener.start()
+            atexit.register(stop_logging)
+    return _queue_handler
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the writer thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _restart_after_fork() -> None:
+    # The writer thread doesn't survive fork (gunicorn --preload): give the child its own
+    global _listener
+    if _queue_handler is None:
+        return
+    _queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    handlers = _listener.handlers if _listener is not None else ()
+    _listener = _AppQueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def dropped_records() -> int:
+    """Records dropped because the writer thread fell behind."""
+    return _AppQueueHandler.dropped
 
 
 def setup_logger(
     name: str,
-    level: int = logging.INFO,
+    level: int = getattr(logging, LOG_LEVEL, logging.INFO),
     max_size: int = 50 * 1024 * 1024,  # 50MB for centralized log
     backup_count: int = 10,
 ) -> logging.Logger:
     """
     Configure logger with consistent formatting for centralized logging.
-    All modules will log to the same application log file.
+    All modules log through one queue to a single writer thread, which owns the
+    console and the application log file; logging never does I/O on the caller.
     """
     logger = logging.getLogger(name)
 
@@ -25,31 +184,7 @@ def setup_logger(
         return logger
 
     logger.setLevel(level)
-
-    # Create formatter with module name for better tracing
-    formatter = logging.Formatter(
-        "%(asctime)s - [%(name)s] - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-
-    # Console handler for development
-    if not any(isinstance(h, logging.StreamHandler) for h in logger.handlers):
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(formatter)
-        console_handler.setLevel(logging.INFO)  # Only INFO and above to console
-        logger.addHandler(console_handler)
-
-    # File handler for centralized logging
-    if not any(isinstance(h, RotatingFileHandler) for h in logger.handlers):
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(_app_log_file), exist_ok=True)
-
-        file_handler = RotatingFileHandler(
-            _app_log_file, maxBytes=max_size, backupCount=backup_count
-        )
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(logging.DEBUG)  # Capture all levels in file
-        logger.addHandler(file_handler)
+    logger.addHandler(_start_listener(max_size, backup_count))
 
     # Prevent propagation to root logger to avoid duplicate logs
     logger.propagate = False
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import sys
+import time
+from typing import Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from starlette.requests import Request
+
+from app.utils.logger import dropped_records
+
+# How often the event loop lag is sampled
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("METRICS_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+# Set (to an empty, writable directory) when running several workers: each process
+# writes its samples there and /metrics aggregates them
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Agent requests take seconds, so the buckets go well past the client defaults
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts, per route template and status",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled", ["method"], multiprocess_mode="livesum"
+)
+GOOGLE_API_DURATION = Histogram(
+    "google_api_request_duration_seconds",
+    "Google API calls made through googleapiclient, per API method and status",
+    ["method", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+GOOGLE_AUTH_REFRESH_DURATION = Histogram(
+    "google_auth_refresh_duration_seconds", "OAuth access token refreshes", buckets=_LATENCY_BUCKETS
+)
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds", "LLM calls per agent", ["agent"], buckets=_LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter("llm_tokens", "LLM tokens per agent; kind is input, output or cached", ["agent", "kind"])
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer; high values mean blocking work on the loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+def _route_template(request: Request) -> str:
+    # The template ("/jobs/{job_id}"), never the raw path, to keep the label set bounded
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Record request latency per route template and status code."""
+    in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(request.method)
+    in_progress.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        in_progress.dec()
+        HTTP_REQUEST_DURATION.labels(request.method, _route_template(request), str(status)).observe(
+            time.perf_counter() - start
+        )
+
+
+class StatsCollector(Collector):
+    """
+    Exposes counters the app already keeps: cache hits and misses, dropped log records
+    and connection pool usage. Read at scrape time, so they describe the worker that answers the scrape.
+    """
+
+    def describe(self) -> Iterator[Metric]:
+        # Registering would otherwise call collect(), importing the database at import time
+        return iter(())
+
+    def collect(self) -> Iterator[Metric]:
+        lookups = CounterMetricFamily(
+            "cache_lookups", "Cache lookups; the hit ratio is hit / (hit + miss)", labels=["cache", "result"]
+        )
+        from app.services.credential_store import credential_store
+
+        lookups.add_metric(["oauth_credentials", "hit"], credential_store.stats["hits"])
+        lookups.add_metric(["oauth_credentials", "miss"], credential_store.stats["misses"])
+        # Only present once the agents are loaded; importing them here would load ADK
+        prefetch = sys.modules.get("app.agents.prefetch")
+        if prefetch is not None:
+            stats = prefetch.prefetch_stats
+            used = sum(count for key, count in stats.items() if key.startswith("used."))
+            unused = sum(count for key, count in stats.items() if key.startswith("unused."))
+            lookups.add_metric(["agent_prefetch", "hit"], used)
+            lookups.add_metric(["agent_prefetch", "miss"], unused)
+        yield lookups
+
+        dropped = CounterMetricFamily("log_records_dropped", "Log records dropped because the log queue was full")
+        dropped.add_metric([], dropped_records())
+        yield dropped
+
+        from app.database.instrumentation import pool_stats_snapshot
+
+        pools = pool_stats_snapshot()
+        connections = GaugeMetricFamily(
+            "db_pool_connections", "Pool connections by state", labels=["pool", "state"]
+        )
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["pool"])
+        counters = {
+            key: CounterMetricFamily(f"db_pool_{key}", description, labels=["pool"])
+            for key, description in (
+                ("checkouts", "Connections checked out"),
+                ("connects", "New connections opened"),
+                ("invalidations", "Connections invalidated"),
+                ("slow_checkouts", "Checkouts that waited longer than DB_POOL_SLOW_CHECKOUT_MS"),
+                ("wait_seconds", "Time spent waiting for a connection"),
+                ("held_seconds", "Time connections were held"),
+            )
+        }
+        for name, stats in pools.items():
+            if "checked_out" in stats:
+                connections.add_metric([name, "checked_out"], stats["checked_out"])
+                connections.add_metric([name, "checked_in"], stats["checked_in"])
+                # SQLAlchemy counts overflow from -pool_size until the pool is full
+                connections.add_metric([name, "overflow"], max(0, stats["overflow"]))
+            if "size" in stats:
+                size.add_metric([name], stats["size"])
+            for key, family in counters.items():
+                family.add_metric([name], stats.get(key, stats.get(f"{key}_total", 0)))
+        yield connections
+        yield size
+        yield from counters.values()
+
+
+_stats_collector = StatsCollector()
+REGISTRY.register(_stats_collector)
+
+
+def render_metrics() -> bytes:
+    """All metrics in the Prometheus text format, aggregated over workers in multiprocess mode."""
+    if not MULTIPROC_DIR:
+        return generate_latest(REGISTRY)
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_stats_collector)
+    return generate_latest(registry)
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a sleep."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - self.interval))
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from starlette.requests import Request
+
+from app.utils.logger import get_service_logger
+
+logger = get_service_logger("profiling")
+
+# Signs profiling tokens; when unset the profiler is off and its middleware isn't installed
+PROFILER_SECRET = os.getenv("PROFILER_SECRET", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./logs/profiles")
+# Profiles kept on disk; older ones are deleted
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+
+PROFILE_HEADER = "x-debug-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# Requests to these paths are never profiled (the profile endpoints themselves)
+EXCLUDED_PREFIX = "/debug/profiles"
+_PROFILE_ID = re.compile(r"^[0-9]{14}-[0-9a-f]{8}$")
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILER_SECRET)
+
+
+def sign_token(ttl_seconds: int = 3600) -> str:
+    """A token for the X-Debug-Profile header, valid for `ttl_seconds`."""
+    expires = str(int(time.time()) + ttl_seconds)
+    signature = hmac.new(PROFILER_SECRET.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_token(token: Optional[str]) -> bool:
+    if not token or not PROFILER_SECRET or "." not in token:
+        return False
+    expires, signature = token.split(".", 1)
+    expected = hmac.new(PROFILER_SECRET.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected) and expires.isdigit() and int(expires) > time.time()
+
+
+class ProfileTriggers:
+    """
+    Profile the next `count` requests whose path starts with a prefix, whoever sends them.
+
+    Triggers live in the process that armed them; with several workers, arm each one or
+    send the header instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._triggers: List[Dict[str, Any]] = []
+
+    def arm(self, path_prefix: str, count: int, ttl_seconds: int) -> Dict[str, Any]:
+        trigger = {"path_prefix": path_prefix, "remaining": count, "expires_at": time.time() + ttl_seconds}
+        with self._lock:
+            self._triggers.append(trigger)
+        return dict(trigger)
+
+    def take(self, path: str) -> bool:
+        if not self._triggers:
+            return False
+        now = time.time()
+        with self._lock:
+            self._triggers = [t for t in self._triggers if t["remaining"] > 0 and t["expires_at"] > now]
+            for trigger in self._triggers:
+                if path.startswith(trigger["path_prefix"]):
+                    trigger["remaining"] -= 1
+                    return True
+        return False
+
+    def active(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            return [dict(t) for t in self._triggers if t["remaining"] > 0 and t["expires_at"] > now]
+
+
+class ProfileStore:
+    """Profiles as speedscope JSON files, with a small metadata file next to each."""
+
+    def __init__(self, directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+        self.directory = directory
+        self.keep = keep
+
+    def save(self, session: Any, meta: Dict[str, Any]) -> None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{meta['id']}.speedscope.json"), "w", encoding="utf-8") as f:
+            f.write(SpeedscopeRenderer().render(session))
+        with open(os.path.join(self.directory, f"{meta['id']}.meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        self._prune()
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Newest first; ids start with a UTC timestamp, so they sort by time."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith(".meta.json"):
+                try:
+                    with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # pruned or half-written by another worker
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[str]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.speedscope.json")
+        return path if os.path.exists(path) else None
+
+    def _prune(self) -> None:
+        ids = sorted({name.split(".", 1)[0] for name in os.listdir(self.directory)}, reverse=True)
+        for old in ids[self.keep:]:
+            for suffix in (".speedscope.json", ".meta.json"):
+                try:
+                    os.remove(os.path.join(self.directory, old + suffix))
+                except FileNotFoundError:
+                    pass
+
+
+profile_triggers = ProfileTriggers()
+profile_store = ProfileStore()
+
+
+def _should_profile(request: Request) -> bool:
+    path = request.url.path
+    if path.startswith(EXCLUDED_PREFIX):
+        return False
+    return verify_token(request.headers.get(PROFILE_HEADER)) or profile_triggers.take(path)
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Sample the call stacks of one request when it carries a valid X-Debug-Profile token
+    or matches an armed trigger, and store the result as a speedscope profile.
+
+    Only installed when PROFILER_SECRET is set. The profiler follows the request's own
+    task, so concurrent requests don't show up in its profile; work handed to threads
+    does not show up either.
+    """
+    if not _should_profile(request):
+        return await call_next(request)
+
+    from pyinstrument import Profiler
+
+    profile_id = f"{time.strftime('%Y%m%d%H%M%S', time.gmtime())}-{secrets.token_hex(4)}"
+    profiler = Profiler(interval=PROFILE_INTERVAL_MS / 1000, async_mode="enabled")
+    started = time.perf_counter()
+    profiler.start()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        session = profiler.stop()
+        route = request.scope.get("route")
+        meta = {
+            "id": profile_id,
+            "method": request.method,
+            # The path only: query strings may carry user data
+            "path": request.url.path,
+            "route": getattr(route, "path", None),
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "samples": session.sample_count,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        try:
+            # Rendering walks every sample; keep it off the event loop
+            await asyncio.to_thread(profile_store.save, session, meta)
+            logger.info("Saved profile %s for %s %s (%.1f ms)", profile_id, request.method, meta["path"], meta["duration_ms"])
+        except Exception as e:
+            logger.warning("Could not save profile %s: %s", profile_id, e)
+    response.headers[PROFILE_ID_HEADER] = profile_id
+    return response
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print an X-Debug-Profile token (uses PROFILER_SECRET)")
+    parser.add_argument("--ttl", type=int, default=3600, help="Seconds the token stays valid")
+    args = parser.parse_args()
+    if not PROFILER_SECRET:
+        raise SystemExit("PROFILER_SECRET is not set")
+    print(sign_token(args.ttl))
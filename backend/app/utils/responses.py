@@ -0,0 +1,109 @@
+import gzip
+import os
+from typing import Any, Callable, Coroutine, List, Optional
+
+import orjson
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+# Larger bodies are compressed on a worker thread instead of the event loop
+_THREADPOOL_MIN_BYTES = 256 * 1024
+
+
+def _default(value: Any) -> Any:
+    # Anything orjson can't serialize natively (Decimal, custom types) falls back to str,
+    # like the `default=str` used elsewhere for API payloads
+    return str(value)
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with orjson.
+
+    Return it directly from an endpoint to send raw API dicts as they are: FastAPI
+    skips `jsonable_encoder` and response-model validation for Response instances.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def supported_encodings() -> List[str]:
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best encoding the client accepts: brotli before gzip, q=0 excluded."""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in supported_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+async def compress_response(request: Request, response: Response) -> Response:
+    """Compress a buffered response body in place when it is large enough and the client accepts it."""
+    if isinstance(response, StreamingResponse) or "content-encoding" in response.headers:
+        return response
+    body = getattr(response, "body", b"")
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    response.headers["vary"] = "Accept-Encoding"
+    if encoding is None:
+        return response
+    if len(body) >= _THREADPOOL_MIN_BYTES:
+        compressed = await run_in_threadpool(compress, body, encoding)
+    else:
+        compressed = compress(body, encoding)
+    response.body = compressed
+    response.headers["content-encoding"] = encoding
+    response.headers["content-length"] = str(len(compressed))
+    return response
+
+
+class CompressedRoute(APIRoute):
+    """
+    Route class that negotiates gzip or brotli for large responses.
+
+    Set it as `route_class` on routers that return big payloads. Streaming responses
+    are passed through unchanged.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def compressed_handler(request: Request) -> Response:
+            return await compress_response(request, await handler(request))
+
+        return compressed_handler
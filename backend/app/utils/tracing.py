@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from starlette.requests import Request
+
+from app.utils.logger import get_service_logger
+from app.utils.metrics import GOOGLE_API_DURATION, GOOGLE_AUTH_REFRESH_DURATION
+
+logger = get_service_logger("tracing")
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+# "none", "console" or "file"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "./logs/traces.jsonl")
+# Return the Server-Timing breakdown on every response, not only when asked for
+TRACING_TIMING_HEADER = os.getenv("TRACING_TIMING_HEADER", "false").lower() in ("1", "true", "yes")
+TIMING_REQUEST_HEADER = "x-debug-timing"
+
+tracer = trace.get_tracer("tubentor")
+
+# Span name prefix -> bucket of the per-request timing breakdown
+_TIMING_BUCKETS = (
+    ("agent.request", "agent"),
+    ("call_llm", "llm"),
+    ("execute_tool", "tool"),
+    ("google_api.execute", "youtube"),
+    ("google_auth.refresh", "token_refresh"),
+    ("session.", "session"),
+)
+
+
+def _bucket(span_name: str) -> Optional[str]:
+    for prefix, bucket in _TIMING_BUCKETS:
+        if span_name.startswith(prefix):
+            return bucket
+    return None
+
+
+class TimingSpanProcessor(SpanProcessor):
+    """
+    Sums span durations per bucket for the traces of in-flight HTTP requests.
+
+    Only traces registered by the middleware are tracked, so spans of background
+    work cost a dict lookup. Spans may end on worker threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[int, Dict[str, list]] = {}
+
+    def track(self, trace_id: int) -> None:
+        with self._lock:
+            self._active[trace_id] = defaultdict(lambda: [0.0, 0])
+
+    def collect(self, trace_id: int) -> Dict[str, list]:
+        with self._lock:
+            return self._active.pop(trace_id, {})
+
+    def on_end(self, span: ReadableSpan) -> None:
+        bucket = _bucket(span.name)
+        if bucket is None or span.end_time is None or span.start_time is None:
+            return
+        with self._lock:
+            timings = self._active.get(span.context.trace_id)
+            if timings is not None:
+                entry = timings[bucket]
+                entry[0] += (span.end_time - span.start_time) / 1e6
+                entry[1] += 1
+
+
+timing_processor = TimingSpanProcessor()
+_tracing_configured = False
+
+
+def setup_tracing() -> None:
+    """Install the tracer provider with the configured exporter. Safe to call more than once."""
+    global _tracing_configured
+    if _tracing_configured or not TRACING_ENABLED:
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "tubentor-api"}))
+    provider.add_span_processor(timing_processor)
+    if TRACING_EXPORTER == "console":
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+    elif TRACING_EXPORTER == "file":
+        os.makedirs(os.path.dirname(TRACING_FILE) or ".", exist_ok=True)
+        out = open(TRACING_FILE, "a", encoding="utf-8")
+        exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    elif TRACING_EXPORTER != "none":
+        logger.warning("Unknown TRACING_EXPORTER '%s', spans will not be exported", TRACING_EXPORTER)
+
+    trace.set_tracer_provider(provider)
+    _tracing_configured = True
+    logger.info("Tracing enabled (exporter: %s)", TRACING_EXPORTER)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Start a span as the current span, skipping attributes that are None."""
+    with tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+
+def refresh_credentials(credentials, request) -> None:
+    """Refresh OAuth credentials inside a span, so token refreshes show up in request timings."""
+    with span("google_auth.refresh"), GOOGLE_AUTH_REFRESH_DURATION.time():
+        credentials.refresh(request)
+
+
+class TracedHttpRequest(HttpRequest):
+    """
+    googleapiclient request that wraps every `execute()` in a span.
+
+    Pass it as `requestBuilder` to `googleapiclient.discovery.build` so each call made
+    through the resulting client is traced with its API method and response size.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._response_bytes = 0
+        postproc = self.postproc
+
+        def measured_postproc(resp, content):
+            self._response_bytes = len(content or b"")
+            return postproc(resp, content)
+
+        self.postproc = measured_postproc
+
+    def execute(self, http=None, num_retries=0):
+        start = time.perf_counter()
+        status = "error"
+        with span(
+            "google_api.execute",
+            **{"google_api.method": self.methodId, "http.request.method": self.method},
+        ) as current:
+            try:
+                result = super().execute(http=http, num_retries=num_retries)
+                status = "200"
+            except HttpError as e:
+                status = str(e.resp.status)
+                raise
+            finally:
+                GOOGLE_API_DURATION.labels(self.methodId or "unknown", status).observe(time.perf_counter() - start)
+            current.set_attribute("http.response.body.size", self._response_bytes)
+            return result
+
+
+def _server_timing(timings: Dict[str, list], total_ms: float) -> str:
+    entries = [
+        f'{bucket};dur={duration:.1f};desc="{count} spans"'
+        for bucket, (duration, count) in sorted(timings.items())
+    ]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+async def tracing_middleware(request: Request, call_next):
+    """
+    Open a server span per HTTP request and attach the timing breakdown as a
+    `Server-Timing` header when TRACING_TIMING_HEADER is set or the client sends
+    `X-Debug-Timing: 1`.
+    """
+    if not _tracing_configured:
+        return await call_next(request)
+
+    want_timing = TRACING_TIMING_HEADER or request.headers.get(TIMING_REQUEST_HEADER) == "1"
+    with tracer.start_as_current_span(
+        f"{request.method} {request.url.path}", kind=trace.SpanKind.SERVER
+    ) as current:
+        trace_id = current.get_span_context().trace_id
+        if want_timing:
+            timing_processor.track(trace_id)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            timings = timing_processor.collect(trace_id) if want_timing else None
+        current.set_attribute("http.response.status_code", response.status_code)
+        if timings is not None:
+            total_ms = (time.perf_counter() - start) * 1000
+            response.headers["Server-Timing"] = _server_timing(timings, total_ms)
+        return response
@@ -0,0 +1,205 @@
+"""
+Record/replay benchmark for the agent pipeline.
+
+Fixtures hold the model completions and YouTube tool results of real agent requests.
+Record them from a running API with AGENT_FIXTURE_RECORD_DIR set (every
+/agents/general-query request is appended to <dir>/agent_sessions.jsonl), or from the
+command line:
+
+    python -m benchmarks.agent_replay record --out ./fixtures "How is my channel doing?"
+
+Replay runs offline - no API keys, OAuth credentials or network - through the real
+coordinator agent, runner and plugins; only the model and the YouTube tools are
+served from the fixtures, after a simulated latency:
+
+    python -m benchmarks.agent_replay replay --fixtures benchmarks/fixtures/agent_sessions.jsonl \\
+        --requests 200 --concurrency 16 --llm-latency 0.8 --youtube-latency 0.25
+
+It reports p50/p95/p99 per stage (each agent's model calls, YouTube calls, the whole
+request, and the framework time that is not spent waiting on either) and the
+throughput at the given concurrency. Replayed answers are compared with the recorded
+ones, so a change that alters the pipeline's behaviour shows up as mismatches.
+
+benchmarks/fixtures/agent_sessions.jsonl is a small synthetic sample in the recorded
+format, so the benchmark runs in CI.
+
+Run from the backend directory.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Sessions live in memory for the benchmark, whatever the environment configures
+os.environ.pop("DATABASE_URL", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.agents.agent_runner import call_agent_async, get_or_create_session, get_runner, get_session_service  # noqa: E402
+from app.agents.fixtures import SimulatedLatency, load_cases, record_case, replay_case, use_fixture_models  # noqa: E402
+from app.agents.main_agent import coordinator_agent  # noqa: E402
+
+APP_NAME = "agent_replay_benchmark"
+USER_ID = "benchmark"
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "agent_sessions.jsonl")
+
+
+def _quiet_app_logs() -> None:
+    """Per-request INFO logs would drown the report (and corrupt --json output)."""
+    for name, logger in list(logging.root.manager.loggerDict.items()):
+        if name.startswith("incident_mgmt") and isinstance(logger, logging.Logger):
+            logger.setLevel(logging.WARNING)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _busy_time(intervals: List[Tuple[float, float]]) -> float:
+    """Total length of the union of (start, end) intervals; parallel tool calls overlap."""
+    total, end = 0.0, float("-inf")
+    for start, finish in sorted(intervals):
+        if finish <= end:
+            continue
+        total += finish - max(start, end)
+        end = finish
+    return total
+
+
+async def _run_one(runner, case: Dict, index: int, latency: SimulatedLatency) -> Tuple[float, List, bool]:
+    session_id = f"replay-{index}"
+    await get_or_create_session(APP_NAME, USER_ID, session_id, {})
+    try:
+        started = time.perf_counter()
+        with replay_case(case, latency) as replayed:
+            response = await call_agent_async(case["query"], runner, USER_ID, session_id)
+        elapsed = time.perf_counter() - started
+    finally:
+        await get_session_service().delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    matches = case.get("response") is None or response == case["response"]
+    return elapsed, replayed.timings, matches
+
+
+async def replay(cases: List[Dict], requests: int, concurrency: int, latency: SimulatedLatency, warmup: int) -> Dict:
+    use_fixture_models(coordinator_agent)
+    runner = get_runner(APP_NAME, coordinator_agent)
+
+    for i in range(warmup):
+        await _run_one(runner, cases[i % len(cases)], -1 - i, SimulatedLatency(llm=0, youtube=0))
+
+    stages: Dict[str, List[float]] = defaultdict(list)
+    errors: List[str] = []
+    mismatches = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index, mismatches
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            try:
+                elapsed, timings, matches = await _run_one(runner, cases[index % len(cases)], index, latency)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            stages["request"].append(elapsed)
+            for stage, start, finish in timings:
+                stages[stage].append(finish - start)
+            stages["framework"].append(max(0.0, elapsed - _busy_time([(s, f) for _, s, f in timings])))
+            mismatches += not matches
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    completed = len(stages["request"])
+    return {
+        "requests": requests,
+        "completed": completed,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "response_mismatches": mismatches,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(completed / wall, 2) if wall else 0.0,
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+            for stage, values in sorted(stages.items())
+        },
+    }
+
+
+async def record(queries: List[str], directory: str) -> None:
+    """Run queries through the real model and YouTube APIs, recording each as a fixture case."""
+    use_fixture_models(coordinator_agent)
+    runner = get_runner(APP_NAME, coordinator_agent)
+    for i, query in enumerate(queries):
+        session_id = f"record-{i}"
+        await get_or_create_session(APP_NAME, USER_ID, session_id, {})
+        with record_case(query, directory) as case:
+            case.response = await call_agent_async(query, runner, USER_ID, session_id)
+        print(f"Recorded {query!r}: {len(case.llm_calls)} model calls, {len(case.tool_calls)} tool calls")
+
+
+def _print_report(report: Dict) -> None:
+    print(
+        f"{report['completed']}/{report['requests']} requests at concurrency {report['concurrency']} "
+        f"in {report['wall_seconds']}s: {report['requests_per_second']} req/s"
+    )
+    print(f"{'stage':<40}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for stage, row in report["stages"].items():
+        print(f"{stage:<40}{row['count']:>8}{row['p50_ms']:>12}{row['p95_ms']:>12}{row['p99_ms']:>12}")
+    if report["errors"]:
+        print(f"{report['errors']} failed, first: {report['first_error']}")
+    if report["response_mismatches"]:
+        print(f"{report['response_mismatches']} answers differ from the recording")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="Replay fixtures offline and report latencies")
+    replay_parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    replay_parser.add_argument("--requests", type=int, default=100)
+    replay_parser.add_argument("--concurrency", type=int, default=8)
+    replay_parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests run first")
+    replay_parser.add_argument("--llm-latency", type=float, help="Seconds per model call (default: as recorded)")
+    replay_parser.add_argument("--youtube-latency", type=float, help="Seconds per YouTube call (default: as recorded)")
+    replay_parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for recorded latencies")
+    replay_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    record_parser = commands.add_parser("record", help="Record fixtures from live model and YouTube calls")
+    record_parser.add_argument("--out", required=True, help="Directory for agent_sessions.jsonl")
+    record_parser.add_argument("queries", nargs="+")
+
+    args = parser.parse_args()
+    _quiet_app_logs()
+    if args.command == "record":
+        asyncio.run(record(args.queries, args.out))
+        return 0
+
+    cases = load_cases(args.fixtures)
+    latency = SimulatedLatency(llm=args.llm_latency, youtube=args.youtube_latency, scale=args.latency_scale)
+    report = asyncio.run(replay(cases, args.requests, args.concurrency, latency, args.warmup))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 1 if report["errors"] or report["response_mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
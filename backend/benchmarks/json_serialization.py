@@ -0,0 +1,101 @@
+"""
+Serialization and wire-size benchmark for large analytics reports.
+
+Builds a synthetic YouTube Analytics report (10k rows by default) and compares
+FastAPI's default path - jsonable_encoder plus JSONResponse rendering - with the
+orjson FastJSONResponse used by the analytics and agent routes, then measures the
+bytes on the wire and compression time for each negotiated encoding.
+
+    python -m benchmarks.json_serialization --rows 10000
+
+Run from the backend directory.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.utils.responses import FastJSONResponse, compress, supported_encodings  # noqa: E402
+
+METRICS = ["views", "estimatedMinutesWatched", "averageViewDuration", "likes", "comments", "shares", "subscribersGained"]
+
+
+def build_report(rows: int, seed: int = 7) -> Dict:
+    """A report shaped like reports().query with day, video and country dimensions."""
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    headers = [
+        {"name": "day", "columnType": "DIMENSION", "dataType": "STRING"},
+        {"name": "video", "columnType": "DIMENSION", "dataType": "STRING"},
+        {"name": "country", "columnType": "DIMENSION", "dataType": "STRING"},
+    ] + [{"name": m, "columnType": "METRIC", "dataType": "INTEGER"} for m in METRICS]
+    countries = ["US", "IN", "GB", "DE", "BR", "CA", "FR", "JP"]
+    return {
+        "kind": "youtubeAnalytics#resultTable",
+        "columnHeaders": headers,
+        "rows": [
+            [
+                (start + timedelta(days=i % 365)).isoformat(),
+                f"vid{rng.randrange(500):05d}",
+                rng.choice(countries),
+                *(rng.randrange(100000) for _ in METRICS),
+            ]
+            for i in range(rows)
+        ],
+    }
+
+
+def timed(func: Callable[[], bytes], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    report = build_report(args.rows)
+    serializers = {
+        "default (jsonable_encoder + json)": lambda: JSONResponse(jsonable_encoder(report)).body,
+        "orjson (FastJSONResponse)": lambda: FastJSONResponse(report).body,
+    }
+
+    print(f"{args.rows} rows, median of {args.repeat} runs")
+    print(f"{'serializer':<40}{'median ms':>12}{'p95 ms':>12}{'bytes':>12}")
+    bodies = {}
+    for name, serialize in serializers.items():
+        timings = timed(serialize, args.repeat)
+        bodies[name] = serialize()
+        p95 = sorted(timings)[int(0.95 * (len(timings) - 1))]
+        print(f"{name:<40}{statistics.median(timings) * 1000:>12.2f}{p95 * 1000:>12.2f}{len(bodies[name]):>12}")
+
+    body = bodies["orjson (FastJSONResponse)"]
+    print()
+    print(f"{'encoding':<40}{'median ms':>12}{'bytes':>12}{'ratio':>12}")
+    print(f"{'identity':<40}{0:>12.2f}{len(body):>12}{1:>12.2f}")
+    for encoding in supported_encodings():
+        timings = timed(lambda: compress(body, encoding), max(3, args.repeat // 4))
+        size = len(compress(body, encoding))
+        print(f"{encoding:<40}{statistics.median(timings) * 1000:>12.2f}{size:>12}{len(body) / size:>12.2f}")
+    if "br" not in supported_encodings():
+        print("(brotli not installed; only gzip is negotiated)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
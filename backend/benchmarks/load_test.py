@@ -0,0 +1,542 @@
+"""
+Load test for the main endpoints, with latency budgets.
+
+Boots the app under uvicorn in a separate process, with every call to Google (OAuth
+token refreshes, YouTube Data and Analytics API requests) answered by an in-process stub
+after a simulated latency, and the agents' model completions replayed from
+benchmarks/fixtures/agent_sessions.jsonl (see agent_replay.py). Then drives each endpoint
+over HTTP at the given concurrency and reports throughput and latency percentiles:
+
+    python -m benchmarks.load_test --requests 200 --concurrency 16
+
+The database is real: set DATABASE_URL to a scratch Postgres database. The run stores a
+test user's OAuth credentials and one agent session per agent request there.
+
+Budgets (p50/p95 latency and minimum throughput per endpoint) are checked in as
+benchmarks/load_test_budgets.json, together with the scenario they were measured under;
+they are checked whenever the run uses that scenario. Exits with 1 when a budget is
+exceeded or a request fails. After an intended change in performance, rewrite them
+(with headroom for slower machines) with --update-budgets.
+
+Run from the backend directory.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES = os.path.join(BACKEND_DIR, "benchmarks", "fixtures", "agent_sessions.jsonl")
+DEFAULT_BUDGETS = os.path.join(BACKEND_DIR, "benchmarks", "load_test_budgets.json")
+
+USER_ID = "load-test-user"
+# Budgets leave this much room over the measured latency when rewritten
+BUDGET_HEADROOM = 1.5
+
+
+# --- Stub backends (run in the server process) ---
+
+def _number(*parts: Any) -> int:
+    """A stable pseudo-random count for generated report data."""
+    return zlib.crc32("|".join(map(str, parts)).encode()) % 5000
+
+
+_DIMENSION_VALUES = {
+    "ageGroup": ["age13-17", "age18-24", "age25-34", "age35-44", "age45-54", "age55-64", "age65-"],
+    "gender": ["female", "male", "user_specified"],
+    "insightTrafficSourceType": ["ADVERTISING", "BROWSE", "EXT_URL", "NOTIFICATION", "PLAYLIST", "SUBSCRIBER", "YT_SEARCH"],
+    "country": ["US", "IN", "GB", "DE", "BR", "CA", "FR", "JP", "AU", "MX"],
+    "video": [f"video{i:02d}" for i in range(10)],
+}
+
+
+def _analytics_report(params: Dict[str, str]) -> Dict[str, Any]:
+    """A YouTube Analytics reports.query response with one row per dimension value."""
+    dimensions = [d for d in params.get("dimensions", "").split(",") if d]
+    metrics = [m for m in params.get("metrics", "views").split(",") if m]
+    start = date.fromisoformat(params.get("startDate", date.today().isoformat()))
+    end = date.fromisoformat(params.get("endDate", date.today().isoformat()))
+    rows: List[List[Any]] = [[]]
+    for dimension in dimensions:
+        if dimension == "day":
+            values = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+        elif dimension == "month":
+            values = sorted({(start + timedelta(days=i)).strftime("%Y-%m") for i in range((end - start).days + 1)})
+        else:
+            values = _DIMENSION_VALUES.get(dimension, ["value"])
+        rows = [row + [value] for row in rows for value in values]
+    rows = rows[: int(params.get("maxResults", "1000"))]
+    return {
+        "kind": "youtubeAnalytics#resultTable",
+        "columnHeaders": (
+            [{"name": d, "columnType": "DIMENSION", "dataType": "STRING"} for d in dimensions]
+            + [{"name": m, "columnType": "METRIC", "dataType": "INTEGER"} for m in metrics]
+        ),
+        "rows": [row + [_number(*row, metric) for metric in metrics] for row in rows],
+    }
+
+
+def _data_api_item(resource: str, index: int) -> Dict[str, Any]:
+    item_id = f"{resource}{index:02d}"
+    return {
+        "kind": f"youtube#{resource}",
+        "id": item_id,
+        "snippet": {
+            "title": f"Load test {resource} {index}",
+            "description": "Generated by the load test stub",
+            "publishedAt": "2026-01-01T00:00:00Z",
+            "channelId": "channel00",
+            "thumbnails": {"default": {"url": f"https://i.ytimg.com/{item_id}/default.jpg"}},
+            "resourceId": {"videoId": f"video{index:02d}"},
+        },
+        "statistics": {
+            "viewCount": str(_number(item_id, "views") * 100),
+            "likeCount": str(_number(item_id, "likes")),
+            "commentCount": str(_number(item_id, "comments") // 10),
+            "subscriberCount": "12345",
+            "videoCount": "42",
+        },
+        "contentDetails": {"duration": "PT8M12S", "relatedPlaylists": {"uploads": "uploads00"}},
+    }
+
+
+def _data_api_list(resource: str, params: Dict[str, str]) -> Dict[str, Any]:
+    """A YouTube Data API list response; a channel list is the authorized user's own channel."""
+    count = 1 if resource == "channel" else min(int(params.get("maxResults", "5")), 50)
+    return {
+        "kind": f"youtube#{resource}ListResponse",
+        "pageInfo": {"totalResults": count, "resultsPerPage": count},
+        "items": [_data_api_item(resource, i) for i in range(count)],
+    }
+
+
+# Data API collection -> resource kind of its items
+_DATA_API_RESOURCES = {
+    "channels": "channel",
+    "videos": "video",
+    "search": "searchResult",
+    "playlists": "playlist",
+    "playlistItems": "playlistItem",
+    "commentThreads": "commentThread",
+}
+
+
+class StubGoogle:
+    """Answers Google OAuth and YouTube API requests with generated data after a fixed latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def respond(self, url: str) -> Tuple[int, Dict[str, Any]]:
+        time.sleep(self.latency)
+        parts = urlsplit(url)
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        if parts.path.endswith("/token"):
+            return 200, {"access_token": "stub-access-token", "expires_in": 3600, "token_type": "Bearer"}
+        if parts.path.endswith("/reports"):
+            return 200, _analytics_report(params)
+        if "/youtube/v3/" in parts.path:
+            collection = parts.path.rsplit("/", 1)[-1]
+            return 200, _data_api_list(_DATA_API_RESOURCES.get(collection, collection), params)
+        return 404, {"error": {"code": 404, "message": f"Not stubbed: {parts.path}"}}
+
+    def install(self) -> None:
+        """Route httplib2 (googleapiclient) and requests-based (google-auth) calls to the stub."""
+        import httplib2
+        from google.auth import transport
+        from google.auth.transport import requests as auth_requests
+
+        stub = self
+
+        class StubResponse(transport.Response):
+            def __init__(self, status: int, data: bytes):
+                self._status, self._data = status, data
+
+            @property
+            def status(self) -> int:
+                return self._status
+
+            @property
+            def headers(self) -> Dict[str, str]:
+                return {"content-type": "application/json"}
+
+            @property
+            def data(self) -> bytes:
+                return self._data
+
+        def http_request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+            status, payload = stub.respond(uri)
+            response = httplib2.Response({"status": str(status), "content-type": "application/json"})
+            return response, json.dumps(payload).encode()
+
+        def auth_request(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+            status, payload = stub.respond(url)
+            return StubResponse(status, json.dumps(payload).encode())
+
+        httplib2.Http.request = http_request
+        auth_requests.Request.__call__ = auth_request
+
+
+class ReplayedLlm:
+    """
+    ASGI wrapper that replays the recorded model completions (and agent tool results) of
+    the fixture case whose question an /agents/general-query request asks.
+    """
+
+    def __init__(self, app, cases: List[Dict[str, Any]], latency):
+        self.app = app
+        self.cases = {case["query"]: case for case in cases}
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        case = None
+        if scope["type"] == "http" and scope["path"] == "/agents/general-query":
+            query = parse_qs(scope["query_string"].decode()).get("query", [""])[-1]
+            case = self.cases.get(query)
+        if case is None:
+            return await self.app(scope, receive, send)
+        from app.agents.fixtures import replay_case
+
+        with replay_case(case, self.latency):
+            await self.app(scope, receive, send)
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the app with stubbed backends; started by the load test in a subprocess."""
+    sys.path.insert(0, BACKEND_DIR)
+    StubGoogle(args.youtube_latency).install()
+
+    import uvicorn
+    from google.oauth2.credentials import Credentials
+
+    from app.agents.fixtures import SimulatedLatency, load_cases, use_fixture_models
+    from app.agents.main_agent import coordinator_agent
+    from app.database.core import async_engine, create_tables
+    from app.services.credential_store import credential_store
+    from main import app
+
+    async def store_credentials() -> None:
+        await create_tables()
+        await credential_store.save(USER_ID, Credentials(
+            token="stub-access-token",
+            refresh_token="stub-refresh-token",
+            token_uri="https://oauth2.googleapis.com/token",
+            client_id=os.environ["YT_CLIENT_ID"],
+            client_secret=os.environ["YT_CLIENT_SECRET"],
+            expiry=datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=1),
+        ))
+        # Its pooled connections belong to this loop, not the server's
+        await async_engine.dispose()
+
+    use_fixture_models(coordinator_agent)
+    asyncio.run(store_credentials())
+    # The model is replayed; YouTube tool results too, at the same latency as the stub
+    latency = SimulatedLatency(llm=args.llm_latency, youtube=args.youtube_latency)
+    wrapped = ReplayedLlm(app, load_cases(args.fixtures), latency)
+    uvicorn.run(wrapped, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+# --- Load generator ---
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    # Query parameters of the i-th request
+    params: Callable[[int], Dict[str, Any]]
+    authenticated: bool = False
+    # The JSON body the i-th request must return, when it is known
+    expected: Optional[Callable[[int], Any]] = None
+
+
+def endpoints(cases: List[Dict[str, Any]], run_id: str) -> List[Endpoint]:
+    today = date.today()
+    report_types = ["overview", "demographics", "traffic_sources"]
+    return [
+        Endpoint("analytics_report", "GET", "/analytics/reports", lambda i: {
+            "start_date": (today - timedelta(days=28)).isoformat(),
+            "end_date": today.isoformat(),
+            "metrics": "views,likes,comments,shares",
+            "dimensions": "day",
+        }),
+        Endpoint("predefined_report", "GET", "/analytics/reports/predefined", lambda i: {
+            "report_type": report_types[i % len(report_types)],
+            "days": 30,
+        }),
+        Endpoint("auth_status", "GET", "/auth/status", lambda i: {}, authenticated=True),
+        Endpoint("general_query", "POST", "/agents/general-query", lambda i: {
+            "query": cases[i % len(cases)]["query"],
+            # A new conversation per request, so session history doesn't grow over the run
+            "conversation_id": f"load-{run_id}-{i}",
+        }, authenticated=True, expected=lambda i: cases[i % len(cases)].get("response")),
+    ]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def drive(client, endpoint: Endpoint, requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    """Send `requests` requests to one endpoint, `concurrency` at a time."""
+    headers = {"cookie": f"user_id={USER_ID}"} if endpoint.authenticated else None
+
+    async def send(index: int) -> Tuple[float, Optional[str]]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(
+                endpoint.method, endpoint.path, params=endpoint.params(index), headers=headers
+            )
+            await response.aread()
+        except Exception as e:
+            return time.perf_counter() - started, f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            return elapsed, f"HTTP {response.status_code}: {response.text[:200]}"
+        expected = endpoint.expected(index) if endpoint.expected else None
+        if expected is not None and response.json() != expected:
+            # A replayed agent answered differently from the recording
+            return elapsed, f"Unexpected response: {response.text[:200]}"
+        return elapsed, None
+
+    for i in range(warmup):
+        await send(-1 - i)
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            elapsed, error = await send(index)
+            if error is None:
+                latencies.append(elapsed)
+            else:
+                errors.append(error)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    result: Dict[str, Any] = {
+        "requests": requests,
+        "errors": len(errors),
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(latencies) / wall, 2),
+    }
+    if latencies:
+        for pct in (50, 95, 99):
+            result[f"p{pct}_ms"] = round(percentile(latencies, pct) * 1000, 1)
+        result["max_ms"] = round(max(latencies) * 1000, 1)
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        OAUTH_REDIRECT_URI=env.get("OAUTH_REDIRECT_URI", "http://localhost/auth/callback"),
+        YT_CLIENT_ID=env.get("YT_CLIENT_ID", "load-test"),
+        YT_CLIENT_SECRET=env.get("YT_CLIENT_SECRET", "load-test"),
+        YT_REFRESH_TOKEN=env.get("YT_REFRESH_TOKEN", "stub-refresh-token"),
+        LOG_LEVEL="WARNING",
+        LOG_FILE="",
+        TRACING_EXPORTER="none",
+        AGENT_FIXTURE_RECORD_DIR="",
+    )
+    if not env.get("CREDENTIALS_ENCRYPTION_KEY"):
+        from cryptography.fernet import Fernet
+
+        env["CREDENTIALS_ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+    env.pop("PROFILER_SECRET", None)
+    return env
+
+
+def _start_server(args: argparse.Namespace, log) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.load_test", "serve",
+        "--port", str(port),
+        "--fixtures", args.fixtures,
+        "--youtube-latency", str(args.youtube_latency),
+        "--llm-latency", str(args.llm_latency),
+    ]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=server_env(), stdout=log, stderr=subprocess.STDOUT)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def _wait_until_up(client, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not come up")
+
+
+async def load_test(args: argparse.Namespace, selected: List[Endpoint], base_url: str, server) -> Dict[str, Dict]:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        await _wait_until_up(client, server)
+        results = {}
+        for endpoint in selected:
+            results[endpoint.name] = await drive(client, endpoint, args.requests, args.concurrency, args.warmup)
+        return results
+
+
+def scenario(args: argparse.Namespace) -> Dict[str, Any]:
+    """The settings budgets are measured under."""
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "youtube_latency": args.youtube_latency,
+        "llm_latency": args.llm_latency,
+    }
+
+
+def check_budgets(results: Dict[str, Dict], budgets: Dict[str, Dict]) -> List[str]:
+    """Budgets the results exceed."""
+    failures = []
+    for name, result in results.items():
+        budget = budgets.get(name, {})
+        for key in ("p50_ms", "p95_ms"):
+            if key in budget and key in result and result[key] > budget[key]:
+                failures.append(f"{name}: {key} {result[key]} > budget {budget[key]}")
+        if "min_rps" in budget and result["requests_per_second"] < budget["min_rps"]:
+            failures.append(f"{name}: {result['requests_per_second']} req/s < budget {budget['min_rps']}")
+    return failures
+
+
+def updated_budgets(results: Dict[str, Dict]) -> Dict[str, Dict]:
+    return {
+        name: {
+            "p50_ms": round(result["p50_ms"] * BUDGET_HEADROOM),
+            "p95_ms": round(result["p95_ms"] * BUDGET_HEADROOM),
+            "min_rps": round(result["requests_per_second"] / BUDGET_HEADROOM, 1),
+        }
+        for name, result in results.items()
+        if "p50_ms" in result
+    }
+
+
+def _print_report(results: Dict[str, Dict], args: argparse.Namespace) -> None:
+    print(
+        f"{args.requests} requests per endpoint at concurrency {args.concurrency}; "
+        f"stub latency: YouTube {args.youtube_latency * 1000:.0f} ms, LLM {args.llm_latency * 1000:.0f} ms"
+    )
+    print(f"{'endpoint':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<20}{r['requests_per_second']:>10}{r.get('p50_ms', '-'):>10}{r.get('p95_ms', '-'):>10}"
+            f"{r.get('p99_ms', '-'):>10}{r.get('max_ms', '-'):>10}{r['errors']:>8}"
+        )
+        if r["errors"]:
+            print(f"  first error: {r['first_error']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budgets", default=DEFAULT_BUDGETS, help="Budgets file; its scenario is the default")
+    parser.add_argument("--requests", type=int, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, help="Requests in flight at once")
+    parser.add_argument("--youtube-latency", type=float, help="Seconds per Google call (token refreshes included)")
+    parser.add_argument("--llm-latency", type=float, help="Seconds per model call")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests per endpoint, run first")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--endpoints", help="Comma-separated endpoint names (default: all)")
+    parser.add_argument("--update-budgets", action="store_true", help="Rewrite the budgets from this run")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("command", nargs="?", choices=["serve"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    budgets: Dict[str, Any] = {"scenario": {}, "endpoints": {}}
+    if os.path.exists(args.budgets):
+        with open(args.budgets, encoding="utf-8") as f:
+            budgets = json.load(f)
+    defaults = {"requests": 200, "concurrency": 16, "youtube_latency": 0.05, "llm_latency": 0.2}
+    for key, default in defaults.items():
+        if getattr(args, key) is None:
+            setattr(args, key, budgets["scenario"].get(key, default))
+
+    if args.command == "serve":
+        serve(args)
+        return 0
+
+    if not os.getenv("DATABASE_URL"):
+        print("DATABASE_URL must point at a (scratch) Postgres database", file=sys.stderr)
+        return 2
+    with open(args.fixtures, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    selected = endpoints(cases, run_id=str(int(time.time())))
+    if args.endpoints:
+        wanted = set(args.endpoints.split(","))
+        selected = [endpoint for endpoint in selected if endpoint.name in wanted]
+
+    with tempfile.TemporaryFile("w+") as log:
+        server, base_url = _start_server(args, log)
+        try:
+            results = asyncio.run(load_test(args, selected, base_url, server))
+        except RuntimeError as e:
+            log.seek(0)
+            print(f"{e}; server output:\n{log.read()[-4000:]}", file=sys.stderr)
+            return 2
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_report(results, args)
+
+    if args.update_budgets:
+        budgets = {"scenario": scenario(args), "endpoints": {**budgets["endpoints"], **updated_budgets(results)}}
+        with open(args.budgets, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, indent=2)
+            f.write("\n")
+        print(f"Budgets written to {args.budgets}")
+        return 0
+
+    failed = any(result["errors"] for result in results.values())
+    if budgets["scenario"] != scenario(args):
+        print("Budgets not checked: this run's scenario differs from the one in the budgets file")
+    else:
+        failures = check_budgets(results, budgets["endpoints"])
+        for failure in failures:
+            print(f"Over budget: {failure}")
+        failed = failed or bool(failures)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
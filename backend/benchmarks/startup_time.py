@@ -0,0 +1,147 @@
+"""
+Startup benchmark: how long a fresh worker takes to import the app and run its startup.
+
+Each run is a new interpreter that imports `main` under `python -X importtime` and then
+enters the app's lifespan, with the database pointed at a closed port and no network
+needed. Reports the median import and startup times, the slowest imports of `main`, and
+whether the heavy agent stack (ADK, LiteLLM) was imported - it should load on first use
+or in the background, never during import.
+
+    python -m benchmarks.startup_time --runs 5 --budget-ms 1500
+
+Run from the backend directory. Exits with 1 when the median import time is over
+--budget-ms or a deferred module was imported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from cryptography.fernet import Fernet
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported while importing the app
+DEFERRED_MODULES = ("google.adk", "litellm", "app.agents.main_agent")
+
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+deferred_loaded = [m for m in {deferred!r} if m in sys.modules]
+from fastapi.testclient import TestClient
+entered = time.perf_counter()
+with TestClient(main.app):
+    up = time.perf_counter()
+print("STARTUP " + json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (up - entered) * 1000,
+    "deferred_loaded": deferred_loaded,
+}}))
+"""
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        # Nothing listens here: startup must not need the database
+        DATABASE_URL="postgresql+psycopg://bench@127.0.0.1:9/bench",
+        OAUTH_REDIRECT_URI=env.get("OAUTH_REDIRECT_URI", "http://localhost/auth/callback"),
+        YT_CLIENT_ID=env.get("YT_CLIENT_ID", "bench"),
+        YT_CLIENT_SECRET=env.get("YT_CLIENT_SECRET", "bench"),
+        CREDENTIALS_ENCRYPTION_KEY=env.get("CREDENTIALS_ENCRYPTION_KEY", Fernet.generate_key().decode()),
+        AGENTS_PRELOAD="false",
+        TRACING_EXPORTER="none",
+    )
+    return env
+
+
+def main_imports(stderr: str) -> Dict[str, int]:
+    """
+    Cumulative microseconds of each module imported directly by `main`, from -X importtime
+    output (which lists a module's imports before the module, one indent level deeper).
+    """
+    pending: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            pending[name.strip()] = int(cumulative)
+        elif depth == 0:
+            if name.strip() == "main":
+                return pending
+            pending = {}
+    return pending
+
+
+def run_once() -> Tuple[dict, Dict[str, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(deferred=DEFERRED_MODULES)],
+        cwd=BACKEND_DIR,
+        env=child_env(),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    result = next((line[len("STARTUP "):] for line in proc.stdout.splitlines() if line.startswith("STARTUP ")), None)
+    if proc.returncode != 0 or result is None:
+        raise RuntimeError(f"App failed to start:\n{proc.stderr[-4000:]}")
+    return json.loads(result), main_imports(proc.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports of main to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when the median import time is higher")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    results, per_module = [], defaultdict(list)
+    for _ in range(args.runs):
+        result, imports = run_once()
+        results.append(result)
+        for name, micros in imports.items():
+            per_module[name].append(micros / 1000)
+
+    summary = {
+        "runs": args.runs,
+        "import_ms": statistics.median(r["import_ms"] for r in results),
+        "startup_ms": statistics.median(r["startup_ms"] for r in results),
+        "deferred_loaded": sorted({m for r in results for m in r["deferred_loaded"]}),
+        "top_imports_ms": dict(
+            sorted(((n, statistics.median(t)) for n, t in per_module.items()), key=lambda item: -item[1])[: args.top]
+        ),
+    }
+    failed = bool(summary["deferred_loaded"]) or (
+        args.budget_ms is not None and summary["import_ms"] > args.budget_ms
+    )
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"median of {args.runs} fresh interpreters")
+        print(f"{'import main':<40}{summary['import_ms']:>12.1f} ms")
+        print(f"{'lifespan startup':<40}{summary['startup_ms']:>12.1f} ms")
+        if args.budget_ms is not None:
+            print(f"{'budget':<40}{args.budget_ms:>12.1f} ms")
+        print()
+        print(f"{'slowest imports of main':<40}{'ms':>12}")
+        for name, millis in summary["top_imports_ms"].items():
+            print(f"{name:<40}{millis:>12.1f}")
+        if summary["deferred_loaded"]:
+            print(f"\nimported during startup but should be deferred: {', '.join(summary['deferred_loaded'])}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,49 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from app.agents import preload_agents
+from app.database.core import async_engine
+from app.jobs.queue import job_queue
 from app.routes import register_routes
+from app.routes.auth.oauth_service import get_oauth_service
+from app.services.credential_store import credential_store
+from app.utils.metrics import METRICS_CONTENT_TYPE, loop_lag_monitor, metrics_middleware, render_metrics
+from app.utils.profiling import profiling_enabled, profiling_middleware
+from app.utils.tracing import setup_tracing, tracing_middleware
+
+# Import the agents (ADK, LiteLLM) in the background once the server is up, instead of
+# on the first agent request
+AGENTS_PRELOAD = os.getenv("AGENTS_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+
+# Importing this module only defines the app; everything that touches config files,
+# the network or the database happens here or on first use
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_tracing()
+    # Fail fast on missing OAuth configuration or encryption key (reads env and files only)
+    get_oauth_service()
+    credential_store.start()
+    loop_lag_monitor.start()
+    if AGENTS_PRELOAD:
+        asyncio.get_running_loop().run_in_executor(None, preload_agents)
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await credential_store.stop()
+    await loop_lag_monitor.stop()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Tubenor API",
     description="API for managing YouTube analytics and content",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 
@@ -19,6 +56,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Only installed when PROFILER_SECRET is set, so requests pay nothing otherwise
+if profiling_enabled():
+    app.middleware("http")(profiling_middleware)
+app.middleware("http")(tracing_middleware)
+# Outermost, so the latency includes the other middleware
+app.middleware("http")(metrics_middleware)
+
 register_routes(app)
 @app.get("/")
 async def root():
@@ -28,4 +72,9 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 
@@ -0,0 +1,7 @@
+import os
+
+# Set before the app modules are imported: the database engines are created (without
+# connecting) at import time, and logs should go to the console only
+os.environ.setdefault("DATABASE_URL", os.getenv("TEST_DATABASE_URL", "postgresql+psycopg://localhost/tubenor_test"))
+os.environ.setdefault("LOG_FILE", "")
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
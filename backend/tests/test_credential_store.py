@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+from google.oauth2.credentials import Credentials
+
+from app.services import credential_store as store_module
+from app.services.credential_store import CredentialStore, _from_json, _to_json, user_key
+
+
+def _store(monkeypatch, *keys):
+    monkeypatch.setattr(store_module, "CREDENTIALS_ENCRYPTION_KEYS", ",".join(keys))
+    return CredentialStore()
+
+
+def _credentials():
+    return Credentials(
+        token="access",
+        refresh_token="refresh",
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="client",
+        client_secret="secret",
+        scopes=["https://www.googleapis.com/auth/youtube.readonly"],
+        expiry=datetime(2026, 1, 1, 12, 30),
+    )
+
+
+def test_user_key_is_a_stable_hash():
+    assert user_key("session-1") == user_key("session-1")
+    assert user_key("session-1") != user_key("session-2")
+    assert "session-1" not in user_key("session-1")
+
+
+def test_encrypted_credentials_round_trip(monkeypatch):
+    store = _store(monkeypatch, Fernet.generate_key().decode())
+    data = store.cipher.encrypt(_to_json(_credentials()))
+    assert b"refresh" not in data
+
+    restored = _from_json(store.cipher.decrypt(data))
+    assert restored.token == "access"
+    assert restored.refresh_token == "refresh"
+    assert restored.client_secret == "secret"
+    assert list(restored.scopes) == ["https://www.googleapis.com/auth/youtube.readonly"]
+    assert restored.expiry == datetime(2026, 1, 1, 12, 30)
+
+
+def test_rotated_key_still_decrypts_rows_written_with_the_old_one(monkeypatch):
+    old, new = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    data = _store(monkeypatch, old).cipher.encrypt(_to_json(_credentials()))
+
+    rotated = _store(monkeypatch, new, old)
+    assert _from_json(rotated.cipher.decrypt(data)).refresh_token == "refresh"
+    # New rows are written with the first key, so the old one can be dropped later
+    rewritten = rotated.cipher.encrypt(_to_json(_credentials()))
+    assert _from_json(_store(monkeypatch, new).cipher.decrypt(rewritten)).token == "access"
+    with pytest.raises(InvalidToken):
+        _store(monkeypatch, new).cipher.decrypt(data)
+
+
+def test_validate_key_requires_a_key(monkeypatch):
+    with pytest.raises(ValueError, match="CREDENTIALS_ENCRYPTION_KEY environment variable is required"):
+        _store(monkeypatch, "").validate_key()
+
+
+def test_validate_key_rejects_a_malformed_key(monkeypatch):
+    with pytest.raises(ValueError, match="invalid Fernet key"):
+        _store(monkeypatch, Fernet.generate_key().decode(), "not-a-key").validate_key()
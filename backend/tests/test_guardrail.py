@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from app.agents.guardrail import GuardrailEngine, block_keyword_guardrail, guardrail_engine
+
+
+def _content(role: str, text: str) -> types.Content:
+    return types.Content(role=role, parts=[types.Part(text=text)])
+
+
+def _callback_context(user_text: str) -> SimpleNamespace:
+    return SimpleNamespace(user_content=_content("user", user_text), agent_name="response_generator_agent", state={})
+
+
+def test_finds_blocked_keyword_case_insensitively():
+    engine = GuardrailEngine(block=["forbidden"])
+    assert engine.find_blocked("This is FORBIDDEN content") == "FORBIDDEN"
+    assert engine.find_blocked("nothing to see") is None
+
+
+def test_whole_words_only_by_default():
+    engine = GuardrailEngine(block=["block"])
+    assert engine.find_blocked("my video got blocked") is None
+    assert GuardrailEngine(block=["block"], whole_words=False).find_blocked("blocked") == "block"
+
+
+def test_allowed_phrase_takes_precedence():
+    engine = GuardrailEngine(block=["block"], allow=["unblock my video", "block list"])
+    assert engine.find_blocked("please check my block list") is None
+    assert engine.find_blocked("check my block list, then block it") == "block"
+
+
+def test_no_keywords_blocks_nothing():
+    assert GuardrailEngine(block=[]).find_blocked("anything at all") is None
+
+
+def test_blocks_on_the_users_message():
+    keyword = guardrail_engine.block[0]
+    context = _callback_context(f"please {keyword} this")
+    response = block_keyword_guardrail(context, LlmRequest(contents=[_content("user", "hello")]))
+    assert response is not None
+    assert context.state["guardrail_block_keyword_triggered"] is True
+
+
+def test_ignores_other_agents_output_in_the_request():
+    # ADK passes the api executor's tool results to the next agent as role 'user'
+    # "For context:" messages; a blocked word in a video title must not block the answer
+    keyword = guardrail_engine.block[0]
+    request = LlmRequest(contents=[
+        _content("user", "How did my latest video do?"),
+        _content("user", f"For context: [api_executor_agent] returned {{'title': 'Do not {keyword} me'}}"),
+    ])
+    assert block_keyword_guardrail(_callback_context("How did my latest video do?"), request) is None
+
+
+def test_passes_without_user_content():
+    context = SimpleNamespace(user_content=None, agent_name="agent", state={})
+    assert block_keyword_guardrail(context, LlmRequest(contents=[])) is None
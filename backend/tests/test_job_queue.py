@@ -0,0 +1,170 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, text, update
+
+from app.database.core import AsyncSessionLocal, async_engine, create_tables
+from app.jobs import queue as queue_module
+from app.jobs.models import Job, JobChunk
+from app.jobs.queue import JobCancelled, JobQueue, _now, _retry_delay
+
+
+def test_retry_delay_doubles_per_attempt_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(queue_module, "JOB_RETRY_BACKOFF_SECONDS", 30.0)
+    monkeypatch.setattr(queue_module, "JOB_RETRY_BACKOFF_MAX_SECONDS", 100.0)
+    assert [_retry_delay(n).total_seconds() for n in range(1, 5)] == [30.0, 60.0, 100.0, 100.0]
+
+
+def _job(attempts):
+    return SimpleNamespace(id="job-1", kind="test", params={}, checkpoint=None, row_count=0, attempts=attempts)
+
+
+def _run_with(handler, job, monkeypatch):
+    """Run one job through JobQueue._run without a database; returns the _finish calls."""
+    finished = []
+    queue = JobQueue(workers=0)
+    queue.register("test", handler)
+
+    async def fake_finish(job_id, status, **values):
+        finished.append((status, values))
+
+    async def idle_heartbeat(job_id):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(queue, "_finish", fake_finish)
+    monkeypatch.setattr(queue, "_heartbeat", idle_heartbeat)
+    asyncio.run(queue._run(job))
+    return finished
+
+
+async def _fail(context):
+    raise RuntimeError("upstream error")
+
+
+def test_failed_attempt_is_requeued_after_the_backoff(monkeypatch):
+    monkeypatch.setattr(queue_module, "JOB_MAX_ATTEMPTS", 3)
+    before = _now()
+    [(status, values)] = _run_with(_fail, _job(attempts=2), monkeypatch)
+    assert status == "queued"
+    assert values["error"] == "upstream error"
+    assert values["not_before"] - before >= _retry_delay(2)
+
+
+def test_last_attempt_fails_the_job(monkeypatch):
+    monkeypatch.setattr(queue_module, "JOB_MAX_ATTEMPTS", 3)
+    [(status, values)] = _run_with(_fail, _job(attempts=3), monkeypatch)
+    assert status == "failed"
+    assert "not_before" not in values
+
+
+def test_cancelled_job_is_left_alone(monkeypatch):
+    async def cancelled(context):
+        raise JobCancelled("job-1")
+
+    assert _run_with(cancelled, _job(attempts=1), monkeypatch) == []
+
+
+def test_successful_job_finishes(monkeypatch):
+    async def succeed(context):
+        pass
+
+    assert _run_with(succeed, _job(attempts=1), monkeypatch) == [("succeeded", {"progress": 1.0})]
+
+
+# Claiming needs Postgres (FOR UPDATE SKIP LOCKED): these run against DATABASE_URL when it is
+# reachable. Each test uses its own job kind, so other rows in the table are never touched.
+
+def _with_database(test):
+    async def run():
+        try:
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            return e
+        try:
+            await create_tables([Job.__table__, JobChunk.__table__])
+            await test()
+        finally:
+            await async_engine.dispose()
+
+    error = asyncio.run(run())
+    if error is not None:
+        pytest.skip(f"database not reachable: {error}")
+
+
+async def _submit(queue, kind, **values):
+    job = await queue.submit(kind, {})
+    if values:
+        async with AsyncSessionLocal() as session, session.begin():
+            await session.execute(update(Job).where(Job.id == job.id).values(**values))
+    return job.id
+
+
+async def _cleanup(kind):
+    async with AsyncSessionLocal() as session, session.begin():
+        await session.execute(delete(Job).where(Job.kind == kind))
+
+
+def _queue(kind):
+    queue = JobQueue(workers=0)
+    queue.register(kind, _fail)
+    return queue
+
+
+def test_claim_takes_the_oldest_due_job_once():
+    kind = f"test-{uuid4().hex[:8]}"
+
+    async def test():
+        queue, other = _queue(kind), _queue(kind)
+        try:
+            first = await _submit(queue, kind)
+            second = await _submit(queue, kind)
+            claimed = await queue._claim()
+            assert claimed.id == first
+            assert (claimed.status, claimed.worker_id, claimed.attempts) == ("running", queue.worker_id, 1)
+            assert (await other._claim()).id == second
+            assert await queue._claim() is None
+        finally:
+            await _cleanup(kind)
+
+    _with_database(test)
+
+
+def test_claim_waits_for_the_backoff():
+    kind = f"test-{uuid4().hex[:8]}"
+
+    async def test():
+        queue = _queue(kind)
+        try:
+            job_id = await _submit(queue, kind, not_before=_now() + timedelta(minutes=5))
+            assert await queue._claim() is None
+            async with AsyncSessionLocal() as session, session.begin():
+                await session.execute(update(Job).where(Job.id == job_id).values(not_before=_now()))
+            assert (await queue._claim()).id == job_id
+        finally:
+            await _cleanup(kind)
+
+    _with_database(test)
+
+
+def test_stale_jobs_are_requeued_until_they_run_out_of_attempts(monkeypatch):
+    kind = f"test-{uuid4().hex[:8]}"
+    monkeypatch.setattr(queue_module, "JOB_MAX_ATTEMPTS", 3)
+
+    async def test():
+        queue = _queue(kind)
+        stale = dict(status="running", worker_id="dead-worker", heartbeat_at=_now() - timedelta(hours=1))
+        try:
+            retried = await _submit(queue, kind, attempts=1, **stale)
+            exhausted = await _submit(queue, kind, attempts=3, **stale)
+            await queue._requeue_stale()
+            assert (await queue.get(retried)).status == "queued"
+            assert (await queue.get(retried)).worker_id is None
+            assert (await queue.get(exhausted)).status == "failed"
+        finally:
+            await _cleanup(kind)
+
+    _with_database(test)
@@ -0,0 +1,112 @@
+import asyncio
+
+from app.agents.sub_agents.query_to_apicall_agent import tools
+from app.agents.sub_agents.query_to_apicall_agent.output_budget import (
+    decode_cursor,
+    encode_cursor,
+    estimate_tokens,
+    fit_to_budget,
+)
+
+
+def _thread(i, likes):
+    return {
+        "id": f"c{i}",
+        "snippet": {
+            "totalReplyCount": 0,
+            "topLevelComment": {"snippet": {
+                "authorDisplayName": f"user{i}",
+                "textOriginal": "x" * 200,
+                "likeCount": likes,
+                "publishedAt": f"2026-01-{i + 1:02d}T00:00:00Z",
+            }},
+        },
+    }
+
+
+def _comments(count, next_page_token=None):
+    response = {"kind": "youtube#commentThreadListResponse", "items": [_thread(i, i) for i in range(count)]}
+    if next_page_token:
+        response["nextPageToken"] = next_page_token
+    return response
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(7)) == (None, 7)
+    assert decode_cursor(encode_cursor(3, "PAGE2")) == ("PAGE2", 3)
+
+
+def test_missing_or_invalid_cursor_starts_at_the_beginning():
+    assert decode_cursor(None) == (None, 0)
+    assert decode_cursor("not a cursor") == (None, 0)
+    assert decode_cursor(encode_cursor(-5)) == (None, 0)
+
+
+def test_result_within_budget_is_returned_unchanged():
+    response = _comments(3, next_page_token="PAGE2")
+    assert fit_to_budget("comments", response, budget_tokens=10_000) is response
+
+
+def test_unknown_query_type_is_not_trimmed():
+    response = {"rows": [[1]] * 1000}
+    assert fit_to_budget("analytics", response, budget_tokens=10) is response
+
+
+def test_truncation_ranks_items_and_stays_within_budget():
+    result = fit_to_budget("comments", _comments(40), budget_tokens=800)
+    likes = [item["likeCount"] for item in result["items"]]
+    assert likes == sorted(likes, reverse=True)
+    assert likes[0] == 39
+    assert estimate_tokens(result) <= 800
+    truncated = result["truncated"]
+    assert truncated["returned"] == len(likes)
+    assert truncated["returned"] + truncated["omitted"] == 40
+    assert truncated["omittedLikes"] == sum(range(40 - len(likes)))
+
+
+def test_cursor_continues_on_the_same_upstream_page():
+    response = _comments(40, next_page_token="PAGE2")
+    first = fit_to_budget("comments", response, budget_tokens=800)
+    page_token, offset = decode_cursor(first["truncated"]["cursor"])
+    assert (page_token, offset) == (None, first["truncated"]["returned"])
+
+    second = fit_to_budget("comments", response, first["truncated"]["cursor"], budget_tokens=800)
+    seen = {item["id"] for item in first["items"]}
+    assert seen.isdisjoint(item["id"] for item in second["items"])
+    assert second["items"][0]["likeCount"] == 39 - offset
+
+
+def test_exhausted_page_hands_over_to_the_next_upstream_page():
+    response = _comments(40, next_page_token="PAGE2")
+    cursor = None
+    for _ in range(40):
+        result = fit_to_budget("comments", response, cursor, budget_tokens=800)
+        cursor = result["truncated"]["cursor"]
+        if result["truncated"]["omitted"] == 0:
+            break
+    assert "nextPageToken" not in result
+    assert result["truncated"]["more_pages"] is True
+    assert decode_cursor(cursor) == ("PAGE2", 0)
+
+
+def test_last_page_has_no_cursor():
+    response = _comments(3)
+    result = fit_to_budget("comments", response, encode_cursor(0, "PAGE2"), budget_tokens=10_000)
+    assert len(result["items"]) == 3
+    assert result["truncated"]["more_pages"] is False
+    assert "cursor" not in result["truncated"]
+
+
+def test_tool_fetches_the_page_named_by_the_cursor(monkeypatch):
+    fetched = []
+
+    async def fake_fetch(args):
+        fetched.append(args)
+        return _comments(2)
+
+    monkeypatch.setattr(tools, "_fetch_dynamic_query", fake_fetch)
+    asyncio.run(tools.execute_dynamic_youtube_query("comments", video_id="v1"))
+    asyncio.run(tools.execute_dynamic_youtube_query("comments", video_id="v1", cursor=encode_cursor(0, "PAGE2")))
+    assert "page_token" not in fetched[0]
+    assert fetched[1]["page_token"] == "PAGE2"
+    assert "cursor" not in fetched[1]
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.agents import relevance
+from app.agents.relevance import (
+    MALFORMED_RESPONSE,
+    OFF_TOPIC_RESPONSE,
+    RelevanceClassifier,
+    RelevanceVerdict,
+    check_relevance,
+)
+
+ON_TOPIC = "How many views did my channel get last month?"
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    trained = RelevanceClassifier()
+    trained.train()
+    return trained
+
+
+@pytest.mark.parametrize("query", [ON_TOPIC, "What were my top videos last week?"])
+def test_youtube_questions_are_on_topic(classifier, query):
+    verdict = classifier.classify(query)
+    assert verdict.label == "on_topic"
+    assert verdict.answer is None and verdict.note == ""
+
+
+@pytest.mark.parametrize("query", ["What's a good recipe for lasagna?", "Write me a poem about the ocean"])
+def test_unrelated_questions_are_rejected(classifier, query):
+    verdict = classifier.classify(query)
+    assert verdict.label == "off_topic"
+    assert verdict.answer == OFF_TOPIC_RESPONSE
+
+
+@pytest.mark.parametrize("query", ["???", "", "1 2 3"])
+def test_queries_without_words_are_malformed(classifier, query):
+    verdict = classifier.classify(query)
+    assert verdict == RelevanceVerdict("malformed", 0.0)
+    assert verdict.answer == MALFORMED_RESPONSE
+
+
+def test_typos_stay_close_to_the_real_words(classifier):
+    assert classifier.classify("hwo mnay veiws did i get").label != "off_topic"
+
+
+def test_follow_up_takes_its_topic_from_the_previous_turn(classifier):
+    assert classifier.classify("and for shares?").label != "on_topic"
+    assert classifier.classify("and for shares?", previous=ON_TOPIC).label == "on_topic"
+
+
+def test_unrelated_follow_up_is_flagged_but_not_rejected(classifier):
+    verdict = classifier.classify("What's a good recipe for lasagna?", previous=ON_TOPIC)
+    assert verdict.label == "borderline"
+    assert verdict.answer is None
+    assert f"{verdict.score:.2f}" in verdict.note
+
+
+def test_disabled_check_lets_everything_through(monkeypatch):
+    monkeypatch.setattr(relevance, "RELEVANCE_CHECK_ENABLED", False)
+    assert asyncio.run(check_relevance("???")) == RelevanceVerdict("on_topic", 1.0)
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents.sub_agents.query_to_apicall_agent.tools import FETCHED_RESPONSES_KEY, record_fetched_response
+from app.agents.sub_agents.response_analyzer_agent.tools import (
+    _time_series,
+    analyze_youtube_data,
+    calculate_growth,
+    calculate_totals,
+    find_top_performers,
+)
+
+
+def _report(dimensions, metrics, rows):
+    headers = [{"name": d, "columnType": "DIMENSION", "dataType": "STRING"} for d in dimensions]
+    headers += [{"name": m, "columnType": "METRIC", "dataType": "INTEGER"} for m in metrics]
+    return {"kind": "youtubeAnalytics#resultTable", "columnHeaders": headers, "rows": rows}
+
+
+def _tool_context(invocation_id="inv-1", call_id="call-1", state=None):
+    return SimpleNamespace(invocation_id=invocation_id, function_call_id=call_id, state={} if state is None else state)
+
+
+def test_single_dimension_series_is_sorted_by_period():
+    data = _report(["day"], ["views"], [["2026-01-02", 20], ["2026-01-01", 10]])
+    time_dim, periods, names, values = _time_series(data)
+    assert time_dim == "day"
+    assert periods == ["2026-01-01", "2026-01-02"]
+    assert values[:, 0].tolist() == [10, 20]
+
+
+def test_multi_dimension_series_sums_additive_and_weights_non_additive_metrics():
+    data = _report(
+        ["day", "country"],
+        ["views", "averageViewDuration", "viewerPercentage"],
+        [
+            ["2026-01-01", "US", 300, 100, 60.0],
+            ["2026-01-01", "IN", 100, 20, 40.0],
+            ["2026-01-02", "US", 100, 50, 70.0],
+        ],
+    )
+    _, periods, names, values = _time_series(data)
+    assert periods == ["2026-01-01", "2026-01-02"]
+    by_name = dict(zip(names, values.T))
+    assert by_name["views"].tolist() == [400, 100]
+    # Weighted by views, not summed: (300*100 + 100*20) / 400
+    assert by_name["averageViewDuration"].tolist() == [80, 50]
+    assert by_name["viewerPercentage"].tolist() == [55.0, 70.0]
+
+
+def test_non_additive_metrics_without_views_are_averaged_per_period():
+    data = _report(
+        ["day", "ageGroup"],
+        ["viewerPercentage"],
+        [["2026-01-01", "age18-24", 30.0], ["2026-01-01", "age25-34", 70.0], ["2026-01-02", "age18-24", 40.0]],
+    )
+    _, _, _, values = _time_series(data)
+    assert values[:, 0].tolist() == [50.0, 40.0]
+
+
+def test_growth_of_a_ratio_metric_stays_in_range():
+    data = _report(
+        ["day", "country"],
+        ["views", "averageViewPercentage"],
+        [["2026-01-01", "US", 10, 40.0], ["2026-01-01", "IN", 10, 60.0], ["2026-01-02", "US", 10, 55.0]],
+    )
+    growth = calculate_growth(data)["metrics"]["averageViewPercentage"]
+    assert growth["first_value"] == 50
+    assert growth["last_value"] == 55
+
+
+def test_totals_leave_out_non_additive_metrics():
+    data = _report(["day"], ["views", "averageViewDuration"], [["2026-01-01", 10, 30], ["2026-01-02", 5, 60]])
+    assert calculate_totals(data) == {"views": 15}
+
+
+def test_top_performers_without_metrics_reports_an_error():
+    data = _report(["video"], [], [["video01"], ["video02"]])
+    assert "error" in find_top_performers(data)
+
+
+def test_fetched_responses_accumulate_within_a_request():
+    tool = SimpleNamespace(name="execute_dynamic_youtube_query")
+    state = {}
+    first = _report(["day"], ["views"], [["2026-01-01", 1], ["2026-01-02", 2]])
+    second = {"kind": "youtube#videoListResponse", "items": []}
+    record_fetched_response(tool, {}, _tool_context(call_id="a", state=state), first)
+    record_fetched_response(tool, {}, _tool_context(call_id="b", state=state), second)
+    assert list(state[FETCHED_RESPONSES_KEY]["responses"]) == ["a", "b"]
+
+    analysis = analyze_youtube_data(_tool_context(state=state))
+    assert len(analysis["analyses"]) == 2
+
+
+def test_fetched_responses_of_an_earlier_request_are_ignored():
+    tool = SimpleNamespace(name="execute_dynamic_youtube_query")
+    state = {}
+    record_fetched_response(tool, {}, _tool_context(invocation_id="old", state=state), {"items": []})
+    assert analyze_youtube_data(_tool_context(invocation_id="new", state=state)) == {
+        "error": "No YouTube data was fetched for this request"
+    }
+    record_fetched_response(tool, {}, _tool_context(invocation_id="new", call_id="x", state=state), {"items": []})
+    assert list(state[FETCHED_RESPONSES_KEY]["responses"]) == ["x"]
+
+
+@pytest.mark.parametrize("name", ["analyze_youtube_data", "transfer_to_agent"])
+def test_other_tools_are_not_recorded(name):
+    state = {}
+    record_fetched_response(SimpleNamespace(name=name), {}, _tool_context(state=state), {"items": []})
+    assert state == {}
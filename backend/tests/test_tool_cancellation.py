@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.agents.sub_agents.query_to_apicall_agent import tools
+from app.services.youtube_service import YouTubeService
+
+
+class _Request:
+    def __init__(self, log, delay=0.0):
+        self.log = log
+        self.delay = delay
+
+    def execute(self):
+        time.sleep(self.delay)
+        self.log.append("executed")
+        return {"items": [{"statistics": {"subscriberCount": "5"}}]}
+
+
+class _Channels:
+    def __init__(self, log, delay):
+        self.log = log
+        self.delay = delay
+
+    def list(self, **params):
+        return _Request(self.log, self.delay)
+
+
+class _Youtube:
+    def __init__(self, delay=0.0):
+        self.log = []
+        self.delay = delay
+
+    def channels(self):
+        return _Channels(self.log, self.delay)
+
+
+def _service(youtube, execute=None):
+    # Skip __init__: it loads credentials and builds the real clients
+    service = object.__new__(YouTubeService)
+    service._execute = execute or (lambda request: request.execute())
+    service.youtube = youtube
+    return service
+
+
+def test_service_executes_requests_through_its_hook():
+    youtube = _Youtube()
+    seen = []
+    service = _service(youtube, lambda request: seen.append(request) or request.execute())
+    assert service.get_subscriber_count() == 5
+    assert len(seen) == 1 and youtube.log == ["executed"]
+
+
+def test_agent_tools_build_the_service_with_the_cancellable_executor(monkeypatch):
+    created = {}
+
+    class FakeService:
+        def __init__(self, **kwargs):
+            created.update(kwargs)
+
+    monkeypatch.setattr(tools, "_youtube_service", None)
+    monkeypatch.setattr(tools, "YouTubeService", FakeService)
+    tools.get_youtube_service()
+    assert created["execute"] is tools._execute
+
+
+def test_cancelled_tool_call_issues_no_further_service_requests():
+    youtube = _Youtube()
+    service = _service(youtube, tools._execute)
+    cancel_event = threading.Event()
+    token = tools._cancel_event.set(cancel_event)
+    try:
+        service.get_channel_info()
+        cancel_event.set()
+        with pytest.raises(tools.ToolCancelledError):
+            service.get_channel_info()
+    finally:
+        tools._cancel_event.reset(token)
+    assert youtube.log == ["executed"]
+
+
+def test_timed_out_tool_call_stops_before_its_next_request(monkeypatch):
+    youtube = _Youtube(delay=0.2)
+    service = _service(youtube, tools._execute)
+    finished = threading.Event()
+
+    def two_requests():
+        try:
+            service.get_channel_info()
+            service.get_channel_info()
+        finally:
+            finished.set()
+
+    monkeypatch.setattr(tools, "TOOL_TIMEOUT_SECONDS", 0.05)
+    result = asyncio.run(tools._run_tool(two_requests))
+    assert "timed out" in result["error"]
+    assert finished.wait(5)
+    assert youtube.log == ["executed"]
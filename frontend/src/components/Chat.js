@@ -17,6 +17,10 @@ const Chat = () => {
   const [checkingAuth, setCheckingAuth] = useState(true);
   const [channelInfo, setChannelInfo] = useState(null);
   const messagesEndRef = useRef(null);
+  // One backend agent session per chat; turns of this chat share its history
+  const conversationIdRef = useRef(
+    `${Date.now().toString(36)}${Math.random().toString(36).slice(2, 10)}`
+  );
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -65,7 +69,10 @@ const Chat = () => {
         '/agents/general-query',
         null,
         {
-          params: { query: userMessage.content }
+          params: {
+            query: userMessage.content,
+            conversation_id: conversationIdRef.current
+          }
         }
       );
 